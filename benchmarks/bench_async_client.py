@@ -0,0 +1,109 @@
+"""
+Benchmark the asyncio client: messages per second, and per second of client CPU (one core), for
+one or more sessions sharing an event loop.
+
+Every session has a server.py process of its own (the server keeps a single session), writing
+to --sink /dev/null. The servers run in other processes, so the process time of the benchmark is
+the client's alone: "per core" divides the messages by it. Over loopback the Python server is
+usually the slower side, so the wall-clock rate is the server's limit while the per-core rate is
+the client's cost. send() runs --concurrency sends at a time, each a datagram of its own;
+send_many() sends --concurrency messages per call, coalesced into BATCH datagrams.
+
+Run from the repository root:
+    python -m benchmarks.bench_async_client [--messages 20000] [--sessions 1 4 8] [--concurrency 256]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from utils.async_client import ReliableUDPClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MESSAGE = "x" * 64
+
+
+def port_is_free(port):
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        probe.bind(("127.0.0.1", port))
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def free_port():
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    return port
+
+
+def start_servers(count, directory):
+    """Start `count` servers (their logs go to `directory`). Returns (processes, ports)."""
+    processes, ports = [], []
+    for _ in range(count):
+        port = free_port()
+        processes.append(subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "server.py"), "--listen-ip", "127.0.0.1", "--listen-port", str(port),
+             "--sink", os.devnull], cwd=directory, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        while port_is_free(port):  # Wait until the server has bound its socket
+            time.sleep(0.01)
+        ports.append(port)
+    return processes, ports
+
+
+async def send_session(port, messages, concurrency, mode, window):
+    async with ReliableUDPClient("127.0.0.1", port, max_window=window) as client:
+        for start in range(0, messages, concurrency):
+            count = min(concurrency, messages - start)
+            if mode == "send":
+                await asyncio.gather(*(client.send(MESSAGE) for _ in range(count)))
+            else:
+                await client.send_many([MESSAGE] * count)
+        return client.stats()
+
+
+async def run(ports, messages, concurrency, mode, window):
+    """Send `messages` per session, all sessions at once. Returns (wall seconds, CPU seconds, stats)."""
+    wall, cpu = time.perf_counter(), time.process_time()
+    stats = await asyncio.gather(*(send_session(port, messages, concurrency, mode, window) for port in ports))
+    return time.perf_counter() - wall, time.process_time() - cpu, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the asyncio client")
+    parser.add_argument('--messages', type=int, default=20000, help="Messages per session")
+    parser.add_argument('--sessions', type=int, nargs="+", default=[1, 4, 8], help="Sessions on the event loop")
+    parser.add_argument('--concurrency', type=int, default=256, help="Messages awaited together")
+    parser.add_argument('--window', type=int, default=64, help="Datagrams in flight per session")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        processes, ports = start_servers(max(args.sessions), directory)
+        try:
+            print(f"{'mode':<10} {'sessions':>8} {'messages/s':>12} {'per core':>12} {'CPU µs/msg':>11} "
+                  f"{'retransmits':>12}")
+            for mode in ("send", "send_many"):
+                for sessions in args.sessions:
+                    total = sessions * args.messages
+                    wall, cpu, stats = asyncio.run(run(ports[:sessions], args.messages, args.concurrency, mode,
+                                                       args.window))
+                    retransmissions = sum(session["retransmissions"] for session in stats)
+                    print(f"{mode:<10} {sessions:>8} {total / wall:>12,.0f} {total / cpu:>12,.0f} "
+                          f"{cpu / total * 1e6:>11.2f} {retransmissions:>12}")
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == "__main__":
+    main()
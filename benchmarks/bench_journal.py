@@ -0,0 +1,68 @@
+"""
+Benchmark the server's delivery journal: group commit against a commit per message, and the time
+to reopen (recover) journals of growing size.
+
+Commits flush with msync(), so the numbers depend on the file system the journal is on: use
+--dir to put it on the disk the server would use (tmpfs makes every flush nearly free).
+
+Run from the repository root:
+    python -m benchmarks.bench_journal [--messages 100000] [--dir /var/tmp]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from utils.journal import GROUP_COMMIT_MESSAGES, Journal
+
+SENDER = ("127.0.0.1", 40000)
+SIZES = (10000, 100000, 1000000)
+MESSAGE = "x" * 64
+
+
+def append(path, count, commit_messages):
+    """Append `count` messages; returns the seconds it took, including the final commit."""
+    journal = Journal(path, size=count * 96, commit_messages=commit_messages)
+    start = time.perf_counter()
+    for seq in range(1, count + 1):
+        journal.append(seq, MESSAGE, SENDER)
+    journal.commit()
+    elapsed = time.perf_counter() - start
+    journal.close()
+    return elapsed
+
+
+def reopen(path):
+    start = time.perf_counter()
+    journal = Journal(path, size=0)
+    elapsed = time.perf_counter() - start
+    journal.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the delivery journal")
+    parser.add_argument('--messages', type=int, default=100000, help="Messages appended with group commit")
+    parser.add_argument('--dir', default=None, help="Directory for the journal files (default: the temp directory)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        path = os.path.join(directory, "journal")
+        print(f"📒 Journal in {directory}\n")
+
+        per_message = max(args.messages // 50, 100)  # A commit per message is slow; time fewer of them
+        grouped = append(path, args.messages, GROUP_COMMIT_MESSAGES) / args.messages
+        os.remove(path)
+        single = append(path, per_message, 1) / per_message
+        os.remove(path)
+        print(f"Group commit ({GROUP_COMMIT_MESSAGES} messages)  {grouped * 1e6:8.2f} µs per message")
+        print(f"Commit per message            {single * 1e6:8.2f} µs per message ({single / grouped:.0f}x)\n")
+
+        for size in SIZES:
+            append(path, size, GROUP_COMMIT_MESSAGES)
+            print(f"Reopen after {size:8} messages  {reopen(path) * 1000:7.2f} ms")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
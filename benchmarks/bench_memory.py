@@ -0,0 +1,142 @@
+"""
+Benchmark the memory held per in-flight packet by the proxy, client and server.
+
+Each component is driven into a state with PACKETS packets in flight, and tracemalloc measures
+the memory it allocated for them:
+
+- proxy: packets in the delay queue (every packet delayed), received into pooled buffers that
+  the worker releases as usual, and held in the delay pool's MTU-sized buffers;
+- client: datagrams sent by the windowed sender and not yet acknowledged (measured once the
+  window is full and the sender waits for its first ACK), including the encoded datagrams;
+- server: out-of-order messages in the reorder buffer, then, once the gap is filled, the
+  acknowledgments cached for duplicates and RESEND_ACK.
+
+Run from the repository root:
+    python -m benchmarks.bench_memory [--packets 100000]
+"""
+import argparse
+import gc
+import os
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+import proxy
+from client import send_windowed
+from server import ServerSession
+from utils.buffer_pool import BufferPool
+from utils.congestion import FixedWindow
+from utils.logger import client_logger, proxy_logger
+
+CLIENT = ("127.0.0.1", 40000)
+SERVER = ("127.0.0.1", 5000)
+
+
+class WindowFull(Exception):
+    """Raised by the benchmark socket to stop the sender once its window is full."""
+
+
+class MeasuringSocket:
+    """Swallows the client's datagrams and measures memory when the sender first waits for an ACK."""
+
+    def __init__(self, baseline):
+        self.baseline = baseline
+        self.held = None
+
+    def settimeout(self, timeout):
+        pass
+
+    def getsockname(self):
+        return CLIENT
+
+    def sendto(self, data, address):
+        pass
+
+    def recvfrom(self, buffer_size):
+        self.held = tracemalloc.get_traced_memory()[0] - self.baseline
+        raise WindowFull()
+
+
+def measure(function):
+    """Run `function` and return the traced memory it still holds at the end, in bytes."""
+    gc.collect()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    state = function()
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - baseline
+    del state
+    return held
+
+
+def fill_delay_queue(packets):
+    pool = BufferPool(initial=1)
+    config = dict(proxy.proxy_config, **{"client-delay": 1.0, "client-drop": 0.0,
+                                         "client-delay-time": (60000, 60000)})
+    original = dict(proxy.proxy_config)
+    proxy.proxy_config.update(config)
+    try:
+        for seq in range(1, packets + 1):
+            buffer = pool.acquire()
+            message = b"%d:hello %d" % (seq, seq)
+            buffer[:len(message)] = message
+            data = memoryview(buffer)[:len(message)]
+            proxy.handle_drops_and_delays(seq, (CLIENT[0], 40000 + seq % 1000), None, False, "client-to-server",
+                                          None, *SERVER, data)
+            pool.release(buffer)
+    finally:
+        proxy.proxy_config.clear()
+        proxy.proxy_config.update(original)
+    return proxy.delayed_packets
+
+
+def measure_client(packets):
+    messages = [f"hi {i}" for i in range(packets)]
+    gc.collect()
+    client_socket = MeasuringSocket(tracemalloc.get_traced_memory()[0])
+    try:
+        send_windowed(client_socket, *SERVER, messages, 1, 2.0, FixedWindow(max_window=packets))
+    except WindowFull:
+        pass
+    return client_socket.held
+
+
+def measure_server(packets):
+    session = ServerSession(receive_window=packets + 1)
+    now = time.monotonic_ns()
+
+    def buffer_messages():
+        for seq in range(2, packets + 2):
+            session.accept(seq, f"hi {seq}", (CLIENT[0], 40000 + seq % 1000), now)
+        return session
+
+    buffered = measure(buffer_messages)
+
+    def deliver():
+        session.accept(1, "hi 1", CLIENT, now)
+        return session
+
+    return buffered, buffered + measure(deliver)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory per in-flight packet")
+    parser.add_argument('--packets', type=int, default=100000, help="Packets in flight")
+    args = parser.parse_args()
+
+    proxy_logger.disabled = client_logger.disabled = True
+    tracemalloc.start()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        proxy_bytes = measure(lambda: fill_delay_queue(args.packets))
+        client_bytes = measure_client(args.packets)
+        buffered_bytes, delivered_bytes = measure_server(args.packets)
+    tracemalloc.stop()
+
+    print(f"🧮 {args.packets} packets in flight\n")
+    for name, held in (("proxy delay queue", proxy_bytes), ("client in flight", client_bytes),
+                       ("server reorder buffer", buffered_bytes), ("server ACK cache", delivered_bytes)):
+        print(f"{name:<22} {held / 1e6:9.2f} MB  {held / args.packets:8.1f} bytes/packet")
+
+
+if __name__ == "__main__":
+    main()
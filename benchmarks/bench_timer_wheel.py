@@ -0,0 +1,80 @@
+"""
+Benchmark the client's retransmission timers: TimerWheel against a naive scan of per-packet deadlines.
+
+Both structures start with OUTSTANDING armed timers. Each step then simulates one event of a busy
+sender: the clock advances, an in-order ACK releases the oldest packet, whose timer is the
+earliest one (cancel), a new packet is sent (arm) and the socket wait is computed (earliest
+deadline). As in the client, overdue timers are only collected (expire) and re-armed as
+retransmissions once that wait times out, so the wheel's expire() falls behind the clock.
+
+Run from the repository root:
+    python -m benchmarks.bench_timer_wheel [--outstanding 10000] [--steps 20000]
+"""
+import argparse
+import time
+
+from utils.timer_wheel import TimerWheel
+
+TIMEOUT = 2.0  # Seconds, the client's default retransmission timeout
+
+
+class NaiveTimers:
+    """Per-packet deadlines in a dict; finding the earliest or expired ones scans every packet."""
+
+    def __init__(self, now=0.0):
+        self.deadlines = {}
+
+    def schedule(self, key, deadline):
+        self.deadlines[key] = deadline
+
+    def cancel(self, key):
+        return self.deadlines.pop(key, None) is not None
+
+    def expire(self, now):
+        expired = sorted((deadline, key) for key, deadline in self.deadlines.items() if deadline <= now)
+        for _, key in expired:
+            del self.deadlines[key]
+        return [key for _, key in expired]
+
+    def next_deadline(self):
+        return min(self.deadlines.values()) if self.deadlines else None
+
+
+def run(timers, outstanding, steps):
+    """Drive `timers` through the workload. Returns (seconds, expirations)."""
+    step = TIMEOUT / outstanding  # One send and one ACK per step keeps `outstanding` timers armed
+    for key in range(outstanding):
+        timers.schedule(key, key * step + TIMEOUT)
+
+    now, oldest, expirations = 0.0, 0, 0
+    start = time.perf_counter()
+    for key in range(outstanding, outstanding + steps):
+        now += step
+        timers.cancel(oldest)
+        oldest += 1
+        timers.schedule(key, now + TIMEOUT)
+        if timers.next_deadline() <= now:
+            for expired in timers.expire(now):
+                timers.schedule(expired, now + TIMEOUT)
+                expirations += 1
+    return time.perf_counter() - start, expirations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retransmission timer structures")
+    parser.add_argument('--outstanding', type=int, default=10000, help="Timers armed at any time")
+    parser.add_argument('--steps', type=int, default=20000, help="Send/ACK events to simulate")
+    args = parser.parse_args()
+
+    print(f"⏱️ {args.outstanding} outstanding packets, {args.steps} events\n")
+    results = {}
+    for name, timers in (("naive scan", NaiveTimers()), ("timer wheel", TimerWheel())):
+        elapsed, expirations = run(timers, args.outstanding, args.steps)
+        results[name] = elapsed
+        print(f"{name:<12} {elapsed:8.3f} s  {elapsed / args.steps * 1e6:10.2f} µs/event  "
+              f"({expirations} expirations)")
+    print(f"\n🚀 Speedup: {results['naive scan'] / results['timer wheel']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,442 @@
+import queue
 import socket
-from datetime import datetime
+import sys
+import threading
+import time
+from array import array
 
+from utils.congestion import CONGESTION_CONTROLS, FixedWindow
+from utils.fec import FecEncoder
+from utils.instrumentation import ClientRecorder
+from utils.logger import client_logger, log_event
+from utils.pacing import Pacer
 from utils.parsing import parse_client
+from utils.protocol import (DEFAULT_BATCH_BYTES, DEFAULT_COMPRESSION_THRESHOLD, DEFAULT_MTU_BYTES, HELLO_PREFIX,
+                            MessageCoalescer, build_datagrams, parse_ack)
+from utils.socket_buffers import describe_kernel_drops, set_buffer_sizes
+from utils.timer_wheel import TimerWheel
 
+MAX_ATTEMPTS = 5  # Transmissions per packet before giving up
 
-def udp_client(server_ip, server_port, timeout=2):
-    # Create a UDP socket
+
+def log_window(congestion, client_socket, server_ip, server_port):
+    """Log the current congestion window so it can be plotted over time."""
+    source_ip, source_port = client_socket.getsockname()
+    log_event(client_logger, "Window", None, None, source_ip, source_port, server_ip, server_port,
+              f"cwnd={congestion.cwnd:.2f} ssthresh={congestion.ssthresh:.2f}", None)
+
+
+def log_terminate(client_socket, sequence_number, server_ip, server_port):
+    """Log the end of the session, which also separates sessions in the log."""
+    source_ip, source_port = client_socket.getsockname()
+    log_event(client_logger, "Terminate", sequence_number, None, source_ip, source_port, server_ip, server_port,
+              None, None)
+
+
+def wait_for_window(client_socket, server_ip, server_port, last_ack):
+    """
+    Wait for the server's closed receive window to reopen. The server sends a window update
+    on its own; in case that is lost, the window is probed with RESEND_ACK after every timeout.
+
+    Returns:
+        int or None: The reopened window, or None if the server stopped answering the probes.
+    """
+    print(f"🪟 Receive window closed at SEQ {last_ack}. Waiting for a window update.")
+    probes = 0
+    while probes < MAX_ATTEMPTS:
+        try:
+            data, _ = client_socket.recvfrom(1024)
+        except socket.timeout:
+            probes += 1
+            client_socket.sendto(f"RESEND_ACK:{last_ack}".encode(), (server_ip, server_port))
+            print(f"🪟 Probing the closed receive window (Probe {probes})")
+            continue
+        try:
+            _, window = parse_ack(data)
+        except ValueError:
+            continue
+        probes = 0  # The server is alive; keep waiting for as long as its window stays closed
+        if window != 0:
+            print(f"🪟 Receive window reopened: {window}")
+            return window
+    print(f"❌ No answer to {MAX_ATTEMPTS} window probes.")
+    return None
+
+
+def offer_compression(client_socket, server_ip, server_port, codec):
+    """
+    Offer a compression codec to the server with HELLO and wait for its answer.
+
+    Returns:
+        str: The codec to use for the session, or None if the server declined or never answered.
+    """
+    hello = HELLO_PREFIX + codec.encode()
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        client_socket.sendto(hello, (server_ip, server_port))
+        print(f"🤝 Offered {codec} compression to the server (Attempt {attempt})")
+        try:
+            data, _ = client_socket.recvfrom(1024)
+            while not data.startswith(HELLO_PREFIX):  # Ignore stray ACKs
+                data, _ = client_socket.recvfrom(1024)
+        except socket.timeout:
+            continue
+        answer = data[len(HELLO_PREFIX):].decode(errors="replace")
+        if answer == codec:
+            print(f"✅ Server accepted {codec} compression.\n")
+            return codec
+        print(f"⚠️ Server declined {codec} compression ({answer}). Sending uncompressed.\n")
+        return None
+    print(f"⚠️ No answer to the compression offer after {MAX_ATTEMPTS} attempts. Sending uncompressed.\n")
+    return None
+
+
+def read_lines(lines):
+    """Reader thread for --batch-linger: puts every input line on the queue, then None at the end of input."""
+    for line in sys.stdin:
+        lines.put(line.rstrip("\n"))
+    lines.put(None)
+
+
+def read_burst(lines, message, sequence_number, batch_bytes, linger):
+    """
+    Collect the lines entered within `linger` seconds of `message`, so that they share BATCH
+    datagrams. The burst ends early once the first batch is full, or at 'exit' or the end of input.
+
+    Returns:
+        tuple[list[str], bool]: The messages, and whether the client should exit once they are sent.
+    """
+    coalescer = MessageCoalescer(batch_bytes, linger)
+    messages = [message]
+    coalescer.add(sequence_number, message.encode())
+    while not coalescer.due():
+        try:
+            line = lines.get(timeout=max(coalescer.deadline - time.monotonic(), 0))
+        except queue.Empty:
+            break
+        if line is None or line.lower() == "exit":
+            return messages, True
+        messages.append(line)
+        if coalescer.add(sequence_number + len(messages) - 1, line.encode()):
+            break  # A full datagram is ready; lingering longer would only delay it
+    return messages, False
+
+
+def describe_range(first, last):
+    return f"SEQ {first}" if first == last else f"SEQ {first}-{last}"
+
+
+def send_windowed(client_socket, server_ip, server_port, messages, sequence_number, timeout, congestion,
+                  batch_bytes=0, mtu=DEFAULT_MTU_BYTES, compress_threshold=None, clock=time.perf_counter, fec=None,
+                  recorder=None, pacer=None):
+    """
+    Send messages with up to congestion.window datagrams in flight.
+
+    The server only acknowledges in-order deliveries, so its ACKs are cumulative: one ACK can
+    release several datagrams, and a repeated ACK for the last delivered sequence means a later
+    datagram is missing. New datagrams must also fit in the receive window advertised in the
+    ACKs; while it is closed the sender waits for it to reopen. If a datagram fails after
+    MAX_ATTEMPTS transmissions, the remaining messages are abandoned. Send times and
+    retransmission deadlines come from `clock` (seconds), which the simulator replaces with its
+    virtual clock. With a FecEncoder as `fec`, single-message datagrams are followed by parity, so
+    the server can rebuild a lost one without a retransmission. A ClientRecorder as `recorder`
+    gets every datagram's transmissions, acknowledgment or failure. With a Pacer as `pacer`, every
+    datagram sent (fragments, retransmissions and parity included) waits for its send slot.
+
+    Returns:
+        int: The next sequence number to use.
+    """
+    destination = (server_ip, server_port)
+    datagrams = build_datagrams(messages, sequence_number, batch_bytes, mtu, compress_threshold)
+    base = 0  # Index of the oldest unacknowledged datagram
+    next_index = 0  # Index of the next datagram that has never been sent
+    last_ack = sequence_number - 1
+    # Per datagram index: the first and last send times and the transmissions so far; datagrams
+    # base to next_index - 1 are in flight
+    first_send_times = array("d", bytes(8 * len(datagrams)))
+    send_times = array("d", bytes(8 * len(datagrams)))
+    attempts = bytearray(len(datagrams))
+    peer_window = None  # Receive window advertised by the server; unknown until its first ACK
+    timers = TimerWheel(now=clock())  # Retransmission deadlines, keyed by datagram index
+
+    def transmit(index):
+        first, last, payloads = datagrams[index]
+        for payload in payloads:
+            send(payload)
+        now = clock()  # After any pacing wait, which is not part of the round trip
+        send_times[index] = now
+        attempts[index] += 1
+        timers.schedule(index, now + timeout)
+        fragments = f" in {len(payloads)} fragments" if len(payloads) > 1 else ""
+        if attempts[index] == 1:
+            first_send_times[index] = now
+            print(f"✅ [{describe_range(first, last)}] Sent{fragments} (window {congestion.window})")
+            if recorder is not None:
+                recorder.sent(first, content(index))
+        else:
+            print(f"🔁 [{describe_range(first, last)}] Retransmitted "
+                  f"(Attempt {attempts[index]}, window {congestion.window})")
+            if recorder is not None:
+                recorder.retransmitted(first, content(index))
+        if attempts[index] == 1 and fec is not None:
+            protect(index)
+
+    def send(datagram):
+        if pacer is not None:
+            pacer.pace(len(datagram))
+        client_socket.sendto(datagram, destination)
+
+    def content(index):
+        """The message a datagram carries, or its range for batches (as logged)."""
+        first, last, _ = datagrams[index]
+        return messages[first - sequence_number] if first == last else f"BATCH {first}-{last}"
+
+    def protect(index):
+        """Add a first transmission to the FEC block, sending the block's parity once it closes."""
+        first, last, payloads = datagrams[index]
+        if first == last and len(payloads) == 1:
+            parity = fec.add(first, payloads[0])
+        else:
+            parity = fec.flush()  # Batches and fragments are not protected; they close the block
+        if parity is None and index == len(datagrams) - 1:
+            parity = fec.flush()  # Protect the tail too, where a loss would otherwise wait out a timeout
+        if parity is not None:
+            send(parity)
+            print(f"🛡️ [{describe_range(*fec.last_block)}] Sent parity (block size {fec.block_size})")
+
+    def within_window(index):
+        """
+        Whether a datagram fits in the receive window. A batch must end within it, or the server drops
+        its tail if it arrives out of order; only the oldest unacknowledged one, which cannot be out of
+        order, just has to start within it.
+        """
+        if peer_window is None:
+            return True
+        first, last, _ = datagrams[index]
+        return (last if index > base else first) <= last_ack + peer_window
+
+    def hold_outside_window(indexes, now):
+        """Reschedule the expired datagrams beyond the congestion window (resent once it reopens); returns the rest."""
+        inside = []
+        for index in indexes:
+            if index < base + congestion.window:
+                inside.append(index)
+            else:
+                timers.schedule(index, now + timeout)
+        return inside
+
+    try:
+        while base < len(datagrams):
+            # Fill the congestion window with new datagrams, as far as the receive window allows
+            while next_index < len(datagrams) and next_index - base < congestion.window and within_window(next_index):
+                if pacer is not None and base < next_index and pacer.wait_time() > 0:
+                    break  # Read ACKs until the next send slot rather than leave them queued while pacing
+                transmit(next_index)
+                next_index += 1
+
+            # Nothing in flight and nothing sent: the receive window is closed
+            if base == next_index:
+                client_socket.settimeout(timeout)
+                peer_window = wait_for_window(client_socket, server_ip, server_port, last_ack)
+                if peer_window is None:
+                    abandoned = len(messages) - (datagrams[base][0] - sequence_number)
+                    print(f"❌ Abandoning {abandoned} queued message(s).\n")
+                    if fec is not None:
+                        fec.discard()
+                    return datagrams[base][0]
+                continue
+
+            # Wait for an ACK until the earliest retransmission deadline, or the next send slot
+            wait = timers.next_deadline() - clock()
+            if pacer is not None and next_index < len(datagrams):
+                wait = min(wait, pacer.wait_time())
+            client_socket.settimeout(max(wait, 0.001))
+            try:
+                data, addr = client_socket.recvfrom(1024)
+            except socket.timeout:
+                now = clock()
+                # Datagrams left outside a shrunken window keep waiting; they are not a new loss signal
+                expired = hold_outside_window(sorted(timers.expire(now)), now)
+                if not expired:
+                    continue
+                failed = [index for index in expired if attempts[index] >= MAX_ATTEMPTS]
+                if failed:
+                    first, last, _ = datagrams[failed[0]]
+                    print(f"❌ Failed to receive acknowledgment for {describe_range(first, last)} after "
+                          f"{MAX_ATTEMPTS} attempts. Abandoning {len(messages) - (first - sequence_number)} "
+                          f"queued message(s).\n")
+                    if recorder is not None:
+                        for index in range(base, next_index):  # Every datagram in flight is given up on
+                            recorder.failed(datagrams[index][0], content(index))
+                    if fec is not None:
+                        fec.discard()
+                    return datagrams[base][0]
+
+                print(f"⏳ Timeout! Retrying from {describe_range(*datagrams[expired[0]][:2])}...")
+                congestion.on_timeout()
+                log_window(congestion, client_socket, server_ip, server_port)
+                for index in hold_outside_window(expired, now):
+                    transmit(index)
+                continue
+
+            try:
+                ack, window = parse_ack(data)
+            except ValueError:
+                continue
+            # An ACK that only opens the window is a window update, not a duplicate ACK (buffering the
+            # out-of-order datagrams that cause duplicate ACKs shrinks the window instead)
+            window_update = window is not None and peer_window is not None and window > peer_window
+            if window is not None:
+                peer_window = window
+
+            if ack > last_ack and base < next_index and datagrams[base][1] <= ack:
+                acked, rtt = 0, None
+                while base < next_index and datagrams[base][1] <= ack:
+                    timers.cancel(base)
+                    # Karn's rule: only datagrams sent once give an unambiguous RTT sample
+                    now = clock()
+                    rtt = now - send_times[base] if attempts[base] == 1 else None
+                    if recorder is not None:
+                        first, last, _ = datagrams[base]
+                        size = sum(len(message.encode())
+                                   for message in messages[first - sequence_number:last - sequence_number + 1])
+                        recorder.acknowledged(first, ack, round((now - first_send_times[base]) * 1e9),
+                                              round(rtt * 1e9) if rtt is not None else None, size)
+                    if fec is not None:
+                        fec.observe(attempts[base] > 1)
+                    acked += 1
+                    base += 1
+                last_ack = ack
+                congestion.on_ack(acked, rtt)
+                log_window(congestion, client_socket, server_ip, server_port)
+                latency = f" (Latency: {rtt * 1000:.2f} ms)" if rtt is not None else ""
+                print(f"📥 [ACK {ack}] Received from {addr}{latency}")
+            elif ack == last_ack and base < next_index and not window_update:
+                if congestion.on_duplicate_ack():
+                    print(f"⚠️ Duplicate ACKs for SEQ {ack}. Fast retransmit of "
+                          f"{describe_range(*datagrams[base][:2])}.")
+                    log_window(congestion, client_socket, server_ip, server_port)
+                    transmit(base)
+    finally:
+        client_socket.settimeout(timeout)
+
+    print(f"📥 All {len(messages)} message(s) acknowledged in {len(datagrams)} datagram(s).\n")
+    return sequence_number + len(messages)
+
+
+def udp_client(server_ip, server_port, timeout=2, auto_send_count=4, congestion_control=None, max_window=64,
+               batch_bytes=0, mtu=DEFAULT_MTU_BYTES, compression=None,
+               compress_threshold=DEFAULT_COMPRESSION_THRESHOLD, fec=None, rate=None, recv_buffer=None,
+               send_buffer=None, batch_linger=0.0):
+    # Create a UDP socket, with the requested buffer sizes (ACK bursts overflow a small receive buffer)
     client_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    set_buffer_sizes(client_socket, recv_buffer, send_buffer)
     # Set a timeout for acknowledgment
     client_socket.settimeout(timeout)
 
     sequence_number = 1  # Tracks the sequence number for each message
-    auto_send_count = 4  # Number of additional messages to auto-send
 
-    # Dictionary to store the send timestamp for each sequence
+    # Optional congestion controller; without one the client sends stop-and-wait
+    congestion = None
+    if congestion_control is not None:
+        congestion = CONGESTION_CONTROLS[congestion_control](max_window=max_window)
+    elif fec is not None:
+        # Parity only helps while several datagrams are in flight
+        print(f"⚠️ FEC needs windowed sending; using a fixed window of {max_window}.")
+        congestion = FixedWindow(max_window=max_window)
+    if batch_linger and not batch_bytes:
+        print(f"⚠️ Lingering needs batching; using --batch-bytes {DEFAULT_BATCH_BYTES}.")
+        batch_bytes = DEFAULT_BATCH_BYTES
+    if congestion is None and batch_bytes:
+        congestion = FixedWindow(max_window=1)  # Batches are sent stop-and-wait as well
+
+    # Optional forward error correction: a block size, or "auto" to adapt it to the observed losses
+    fec_encoder = None
+    if fec is not None:
+        fec_encoder = FecEncoder(None if fec == "auto" else fec)
+
+    # Optional pacing of every datagram: (rate, unit) in packets or bytes per second
+    pacer = Pacer(*rate) if rate is not None else None
+
+    # Send time (time.perf_counter_ns()) of each unacknowledged stop-and-wait sequence number
     send_timestamps = {}
+    # Per-packet events for the client log, and the summary printed on exit
+    recorder = ClientRecorder(client_socket, server_ip, server_port)
+    recorder.start()
+    # Receive window from the server's last ACK; the stop-and-wait sends below wait while it is closed
+    peer_window = None
 
     print(f"🚀 Client started. Sending messages to {server_ip}:{server_port}\n")
 
+    # Compression is only used once the server has agreed to it
+    if compression is not None:
+        compression = offer_compression(client_socket, server_ip, server_port, compression)
+    if compression is None:
+        compress_threshold = None
+
+    # With --batch-linger, input is read by a thread, so that the lines entered while a batch lingers can join it
+    lines = None
+    if batch_linger:
+        lines = queue.Queue()
+        threading.Thread(target=read_lines, args=(lines,), name="input-reader", daemon=True).start()
+    exiting = False  # 'exit' (or the end of input) arrived within the last burst
+
     source_ip = None
     source_port = None
 
     try:
         while True:
             # Get the first message input from the user
-            message = input("📤 Enter message to send (or type 'exit' to quit): ")
+            if exiting:
+                message = "exit"
+            elif lines is not None:
+                print("📤 Enter message to send (or type 'exit' to quit): ", end="", flush=True)
+                message = lines.get()
+                message = "exit" if message is None else message
+            else:
+                message = input("📤 Enter message to send (or type 'exit' to quit): ")
             if message.lower() == "exit":
                 # Send a termination message to the server
                 terminate_message = "TERMINATE"
                 client_socket.sendto(terminate_message.encode(), (server_ip, server_port))
+                log_terminate(client_socket, sequence_number, server_ip, server_port)
                 print("👋 Sent termination message to server. Exiting client.")
                 break
 
+            # Windowed, batched, fragmented and compressed sends go through the windowed sender (a
+            # window of one unit is stop-and-wait); otherwise the messages are sent one by one below
+            needs_fragments = len(f"{sequence_number}:{message}".encode()) > mtu
+            needs_compression = compress_threshold is not None and len(message.encode()) >= compress_threshold
+            if congestion is not None or needs_fragments or needs_compression:
+                burst = [message]
+                if lines is not None:
+                    burst, exiting = read_burst(lines, message, sequence_number, batch_bytes, batch_linger)
+                messages = burst + [f"hi {i + 2}" for i in range(auto_send_count)]
+                sequence_number = send_windowed(client_socket, server_ip, server_port, messages, sequence_number,
+                                                timeout, congestion or FixedWindow(max_window=1), batch_bytes, mtu,
+                                                compress_threshold, fec=fec_encoder, recorder=recorder,
+                                                pacer=pacer)
+                continue
+
             while True:
                 # Prepare the message with the sequence number
                 message_with_seq = f"{sequence_number}:{message}"
 
+                if peer_window == 0:
+                    peer_window = wait_for_window(client_socket, server_ip, server_port, sequence_number - 1)
+
                 # Store the send timestamp for the sequence number
-                send_timestamps[sequence_number] = datetime.now()
+                send_timestamps[sequence_number] = time.perf_counter_ns()
 
                 for attempt in range(5):  # Retry up to 5 times
                     try:
-                        # Send the message
+                        # Send the message, in its send slot when paced
+                        if pacer is not None:
+                            pacer.pace(len(message_with_seq.encode()))
                         client_socket.sendto(message_with_seq.encode(), (server_ip, server_port))
+                        if attempt == 0:
+                            recorder.sent(sequence_number, message)
+                        else:
+                            recorder.retransmitted(sequence_number, message)
 
                         # Capture the source IP and port after sending
                         source_ip, source_port = client_socket.getsockname()
@@ -54,12 +448,15 @@ def udp_client(server_ip, server_port, timeout=2):
                         data, addr = client_socket.recvfrom(1024)
                         ack_message = data.decode()  # Decode the received message
 
-                        # Parse acknowledgment (expecting "ACK:<sequence>")
+                        # Parse acknowledgment (expecting "ACK:<sequence>:<window>")
                         if ack_message.startswith("ACK:"):
-                            ack = int(ack_message.split(":")[1])
+                            ack, window = parse_ack(data)
+                            peer_window = window if window is not None else peer_window
                             if ack == sequence_number:
-                                latency_ms = (datetime.now() - send_timestamps[sequence_number]).total_seconds() * 1000
-                                print(f"📥 [ACK {ack}] Received from {addr} (Latency: {latency_ms:.2f} ms)\n")
+                                latency_ns = time.perf_counter_ns() - send_timestamps[sequence_number]
+                                recorder.acknowledged(sequence_number, ack, latency_ns,
+                                                      latency_ns if attempt == 0 else None, len(message.encode()))
+                                print(f"📥 [ACK {ack}] Received from {addr} (Latency: {latency_ns / 1e6:.2f} ms)\n")
 
                                 # Clean up the timestamp for the acknowledged sequence number
                                 del send_timestamps[sequence_number]
@@ -73,6 +470,7 @@ def udp_client(server_ip, server_port, timeout=2):
 
                 else:
                     # If all attempts fail, log and move to the next message
+                    recorder.failed(sequence_number, message)
                     print(f"❌ Failed to receive acknowledgment for SEQ {sequence_number} after 5 attempts.\n")
                     break  # Exit the loop for this message
 
@@ -83,26 +481,39 @@ def udp_client(server_ip, server_port, timeout=2):
             for i in range(auto_send_count):
                 auto_message = f"hi {i + 2}"
                 message_with_seq = f"{sequence_number}:{auto_message}"
-                send_timestamps[sequence_number] = datetime.now()  # Track timestamp for auto-send messages
+                if peer_window == 0:
+                    peer_window = wait_for_window(client_socket, server_ip, server_port, sequence_number - 1)
+                send_timestamps[sequence_number] = time.perf_counter_ns()  # Track timestamp for auto-send messages
                 for attempt in range(5):
                     try:
+                        if pacer is not None:
+                            pacer.pace(len(message_with_seq.encode()))
                         client_socket.sendto(message_with_seq.encode(), (server_ip, server_port))
+                        if attempt == 0:
+                            recorder.sent(sequence_number, auto_message)
+                        else:
+                            recorder.retransmitted(sequence_number, auto_message)
                         print(f"✅ [SEQ {sequence_number}] Sent: '{auto_message}'")
 
                         # Wait for acknowledgment
                         data, addr = client_socket.recvfrom(1024)
                         ack_message = data.decode()
                         if ack_message.startswith("ACK:"):
-                            ack = int(ack_message.split(":")[1])
+                            ack, window = parse_ack(data)
+                            peer_window = window if window is not None else peer_window
                             if ack == sequence_number:
-                                latency_ms = (datetime.now() - send_timestamps[ack]).total_seconds() * 1000
-                                print(f"📥 [ACK {ack}] Received for '{auto_message}' (Latency: {latency_ms:.2f} ms)\n")
+                                latency_ns = time.perf_counter_ns() - send_timestamps[ack]
+                                recorder.acknowledged(sequence_number, ack, latency_ns,
+                                                      latency_ns if attempt == 0 else None, len(auto_message.encode()))
+                                print(f"📥 [ACK {ack}] Received for '{auto_message}' "
+                                      f"(Latency: {latency_ns / 1e6:.2f} ms)\n")
                                 del send_timestamps[ack]  # Clean up timestamp
                                 sequence_number += 1
                                 break
                     except socket.timeout:
                         print(f"⏳ Timeout for '{auto_message}'! Retrying... (Attempt {attempt + 1})")
                 else:
+                    recorder.failed(sequence_number, auto_message)
                     print(f"❌ Failed to send '{auto_message}' after 5 attempts.")
 
     except KeyboardInterrupt:
@@ -110,13 +521,23 @@ def udp_client(server_ip, server_port, timeout=2):
         terminate_message = "TERMINATE"
         try:
             client_socket.sendto(terminate_message.encode(), (server_ip, server_port))
+            log_terminate(client_socket, sequence_number, server_ip, server_port)
             print("🚨 Termination message sent successfully.")
         except Exception as e:
             print(f"❌ Failed to send termination message: {e}")
         finally:
             print("👋 Goodbye!")
+    finally:
+        recorder.close()
+        print(recorder.report())
+        if pacer is not None:
+            print(pacer.report())
+        print(describe_kernel_drops(client_socket))
 
 
 if __name__ == "__main__":
     parsed_args = parse_client()
-    udp_client(parsed_args.target_ip, parsed_args.target_port, parsed_args.timeout)
+    udp_client(parsed_args.target_ip, parsed_args.target_port, parsed_args.timeout, parsed_args.auto_send,
+               parsed_args.cc, parsed_args.max_window, parsed_args.batch_bytes, parsed_args.mtu, parsed_args.compress,
+               parsed_args.compress_threshold, parsed_args.fec, parsed_args.rate, parsed_args.recv_buffer,
+               parsed_args.send_buffer, parsed_args.batch_linger)
@@ -0,0 +1,211 @@
+import csv
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from utils.experiment import GRID_DEFAULTS, allocate_ports, count_log_events, load_grid
+from utils.parsing import parse_experiments
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STARTUP_TIMEOUT = 10  # Seconds for the server and proxy to report that they are listening
+SHUTDOWN_TIMEOUT = 5  # Seconds to wait after Ctrl+C before killing a server or proxy
+LATENCY_PATTERN = re.compile(r"Latency: ([\d.]+) ms")
+RESULT_COLUMNS = ["run", *GRID_DEFAULTS, "status", "duration_s", "expected", "delivered", "acknowledged",
+                  "retransmissions", "failed", "mean_latency_ms", "proxy_forwarded", "proxy_delayed",
+                  "proxy_dropped", "proxy_duplicate"]
+
+
+def port_is_free(port):
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        probe.bind(("127.0.0.1", port))
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def wait_for_output(path, marker, process):
+    """Wait until a started process has written `marker` to its output file."""
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline and process.poll() is None:
+        with open(path, encoding="utf-8", errors="replace") as output:
+            if marker in output.read():
+                return True
+        time.sleep(0.05)
+    return False
+
+
+def stop(process):
+    """Stop a server or proxy with Ctrl+C so it can flush its logs, killing it if it hangs."""
+    if process.poll() is None:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(SHUTDOWN_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def client_arguments(params, proxy_port):
+    arguments = ["--target-ip", "127.0.0.1", "--target-port", str(proxy_port), "--timeout", str(params["timeout"]),
+                 "--auto-send", str(params["auto-send"]), "--max-window", str(params["max-window"])]
+    if params["cc"] is not None:
+        arguments += ["--cc", params["cc"]]
+    return arguments
+
+
+def proxy_arguments(params, proxy_port, server_port, control_port):
+    arguments = ["--listen-ip", "127.0.0.1", "--listen-port", str(proxy_port), "--target-ip", "127.0.0.1",
+                 "--target-port", str(server_port), "--control-port", str(control_port)]
+    for param in ("client-drop", "server-drop", "client-delay", "server-delay"):
+        arguments += [f"--{param}", str(params[param])]
+    for param in ("client-delay-time", "server-delay-time"):
+        arguments += [f"--{param}", "{}-{}".format(*params[param])]
+    return arguments
+
+
+def run_trio(index, params, output_dir, base_port, run_timeout):
+    """
+    Run one client/proxy/server trio on its own ports, in its own directory (so each run has its
+    own packet_logs_*.log files), and summarize it.
+
+    Returns:
+        dict: The run's parameters and results, keyed like RESULT_COLUMNS.
+    """
+    run_dir = os.path.join(output_dir, f"run_{index:04d}")
+    os.makedirs(run_dir, exist_ok=True)
+    server_port, proxy_port, control_port = allocate_ports(index, base_port)
+    result = {"run": index, **params, "status": "ok"}
+    busy = [port for port in (server_port, proxy_port, control_port) if not port_is_free(port)]
+    if busy:
+        result["status"] = f"ports in use: {busy}"
+        return result
+
+    environment = dict(os.environ, PYTHONUNBUFFERED="1")
+    outputs = {name: os.path.join(run_dir, f"{name}.out") for name in ("server", "proxy", "client")}
+    processes = []
+    try:
+        with open(outputs["server"], "w") as server_output, open(outputs["proxy"], "w") as proxy_output:
+            server = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"), "--listen-ip", "127.0.0.1",
+                                       "--listen-port", str(server_port)],
+                                      cwd=run_dir, stdout=server_output, stderr=subprocess.STDOUT, env=environment)
+            processes.append(server)
+            proxy = subprocess.Popen([sys.executable, os.path.join(ROOT, "proxy.py"),
+                                      *proxy_arguments(params, proxy_port, server_port, control_port)],
+                                     cwd=run_dir, stdout=proxy_output, stderr=subprocess.STDOUT, env=environment)
+            processes.append(proxy)
+        if not (wait_for_output(outputs["server"], "listening", server)
+                and wait_for_output(outputs["proxy"], "Control interface listening", proxy)):
+            result["status"] = "startup failed"
+            return result
+
+        typed = "".join("x" * params["payload-bytes"] + "\n" for _ in range(params["rounds"]))
+        start = time.monotonic()
+        with open(outputs["client"], "w") as client_output:
+            try:
+                subprocess.run([sys.executable, os.path.join(ROOT, "client.py"), *client_arguments(params, proxy_port)],
+                               cwd=run_dir, input=typed + "exit\n", stdout=client_output, stderr=subprocess.STDOUT,
+                               text=True, env=environment, timeout=run_timeout)
+            except subprocess.TimeoutExpired:
+                result["status"] = "timeout"
+        result["duration_s"] = round(time.monotonic() - start, 3)
+    finally:
+        for process in reversed(processes):
+            stop(process)
+
+    with open(outputs["client"], encoding="utf-8", errors="replace") as client_output:
+        client_text = client_output.read()
+    latencies = [float(value) for value in LATENCY_PATTERN.findall(client_text)]
+    events = count_log_events(run_dir)
+    result.update({
+        "expected": params["rounds"] * (1 + params["auto-send"]),
+        "delivered": events["server"].get("Received", 0) + events["server"].get("Received (Buffered)", 0),
+        "acknowledged": client_text.count("📥 [ACK"),
+        # Windowed sends print each resend; stop-and-wait prints the timeout that triggers it
+        "retransmissions": client_text.count("Retransmitted" if params["cc"] else "Timeout"),
+        "failed": client_text.count("❌ Failed"),
+        "mean_latency_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+        "proxy_forwarded": events["proxy"].get("Forwarded", 0),
+        "proxy_delayed": events["proxy"].get("Delayed", 0),
+        "proxy_dropped": events["proxy"].get("Dropped", 0),
+        "proxy_duplicate": events["proxy"].get("Duplicate", 0),
+    })
+    return result
+
+
+def format_value(value):
+    if isinstance(value, tuple):
+        return "{}-{}".format(*value)
+    return "" if value is None else str(value)
+
+
+def write_results(path, results):
+    with open(path, "w", newline="") as results_file:
+        writer = csv.DictWriter(results_file, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        for result in results:
+            writer.writerow({column: format_value(result.get(column)) for column in RESULT_COLUMNS})
+
+
+def print_table(results, varied):
+    columns = ["run", *varied, "status", "delivered", "expected", "failed", "retransmissions", "mean_latency_ms",
+               "duration_s"]
+    rows = [[format_value(result.get(column)) for column in columns] for result in results]
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+
+
+def main():
+    args = parse_experiments()
+    try:
+        runs = load_grid(args.grid) * args.repeat
+    except (OSError, ValueError) as e:
+        print(f"❌ Invalid grid {args.grid}: {e}")
+        exit(1)
+    try:
+        allocate_ports(len(runs) - 1, args.base_port)
+    except ValueError as e:
+        print(f"❌ {e}")
+        exit(1)
+
+    output_dir = os.path.abspath(args.output or os.path.join("experiments", datetime.now().strftime("%Y%m%d-%H%M%S")))
+    os.makedirs(output_dir, exist_ok=True)
+    varied = [param for param in GRID_DEFAULTS if len({format_value(run[param]) for run in runs}) > 1]
+    print(f"🧪 Running {len(runs)} experiment(s), {args.jobs} at a time, in {output_dir}\n")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [pool.submit(run_trio, index, params, output_dir, args.base_port, args.run_timeout)
+                   for index, params in enumerate(runs)]
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                print(f"{'✅' if result['status'] == 'ok' else '⚠️'} [{len(results)}/{len(runs)}] Run {result['run']}: "
+                      f"{result['status']}, {result.get('delivered', 0)}/{result.get('expected', '?')} delivered "
+                      f"in {result.get('duration_s', 0)} s")
+        except KeyboardInterrupt:
+            print("\n👋 Interrupted; cancelling the remaining runs.")
+            for future in futures:
+                future.cancel()
+
+    results.sort(key=lambda result: result["run"])
+    results_path = os.path.join(output_dir, "results.csv")
+    write_results(results_path, results)
+    print()
+    print_table(results, varied)
+    print(f"\n📊 Results written to {results_path}")
+
+
+if __name__ == "__main__":
+    main()
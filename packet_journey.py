@@ -0,0 +1,41 @@
+import time
+
+from utils.log_index import ingest, open_index, packet_journey, slowest_packets
+from utils.parsing import parse_packet_journey
+
+
+def show_journey(connection, seq, session=None):
+    session, events = packet_journey(connection, seq, session)
+    if not events:
+        print(f"⚠️ No events for SEQ {seq}" + (f" in session {session}" if session is not None else ""))
+        return
+    first, previous = events[0][0], events[0][0]
+    print(f"🧭 [SEQ {seq}] Session {session}: {len(events)} events over {events[-1][0] - first} ms\n")
+    for time_ms, component, event, ack, source, destination, message, latency in events:
+        details = f" ACK {ack}" if ack is not None else ""
+        details += f" latency {latency:.2f} ms" if latency is not None else ""
+        details += f" '{message}'" if message else ""
+        print(f"  +{time_ms - first:>6} ms (Δ {time_ms - previous:>5} ms)  {component:<6} {event:<18} "
+              f"{source} -> {destination}{details}")
+        previous = time_ms
+
+
+def main():
+    args = parse_packet_journey()
+    connection = open_index(args.db)
+    if args.command == "ingest":
+        start = time.perf_counter()
+        added = ingest(connection, args.log_dir)
+        print(f"📚 Indexed {added} new events from {args.log_dir} into {args.db} "
+              f"in {time.perf_counter() - start:.2f} s")
+    elif args.command == "show":
+        show_journey(connection, args.seq, args.session)
+    elif args.command == "slowest":
+        print(f"🐢 Slowest packets{f' in session {args.session}' if args.session is not None else ''}:\n")
+        for session, seq, span, count in slowest_packets(connection, args.limit, args.session):
+            print(f"  Session {session} [SEQ {seq}]: {span} ms across {count} events")
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
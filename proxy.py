@@ -1,12 +1,24 @@
+import heapq
+import queue
 import random
+import signal
 import socket
 import threading
 import time
-from datetime import datetime
 
+from utils.buffer_pool import BufferPool
 from utils.controller import handle_control
+from utils.events import events_status, publish_packet
+from utils.fec import FEC_PREFIX
 from utils.logger import proxy_logger, log_event
 from utils.parsing import parse_proxy
+from utils.pcap import PcapWriter
+from utils.profiler import register_thread
+from utils.protocol import (BATCH_PREFIX, DEFAULT_MTU_BYTES, FRAG_PREFIX, HEADER_PEEK_BYTES, HELLO_PREFIX,
+                            batch_sequence_range, parse_fragment, parse_sequence)
+from utils.rules import load_rules, match_flow, rules_status
+from utils.schedule import start_schedule
+from utils.socket_buffers import describe_kernel_drops, set_buffer_sizes, socket_statistics
 
 # Shared proxy configuration
 proxy_config = {
@@ -18,12 +30,35 @@ proxy_config = {
     "server-delay-time": (0, 0),  # Tuple for range (min, max) in milliseconds
 }
 
-# Dictionary to store delayed packets
+# Outcomes of handle_drops_and_delays
+FORWARD, DROP, DELAY = "forward", "drop", "delay"
+
+
+class DelayedPacket:
+    """A packet waiting in the delay queue; ordered by the monotonic time (ns) it is due."""
+    __slots__ = ("due", "data", "destination", "source", "seq_number")
+
+    def __init__(self, due, data, destination, source, seq_number):
+        self.due = due
+        self.data = data
+        self.destination = destination
+        self.source = source
+        self.seq_number = seq_number
+
+    def __lt__(self, other):
+        return self.due < other.due
+
+
+# Heaps of DelayedPacket per direction, soonest due first
 delayed_packets = {
     "client-to-server": [],
     "server-to-client": []
 }
 
+# Pool of MTU-sized buffers that delayed packets are held in until they are forwarded, so the delay
+# queue neither pins 64 KiB receive buffers nor allocates a copy per packet
+delay_pool = BufferPool(buffer_size=DEFAULT_MTU_BYTES, max_free=1024)
+
 # Deduplication cache with timestamps
 dedup_cache = {
     "client-to-server": {},  # Maps sequence numbers to their receive time
@@ -31,6 +66,27 @@ dedup_cache = {
 }
 CACHE_TIMEOUT = 10  # Cache timeout in seconds
 
+# Optional pcapng capture of every datagram and the proxy's verdict (--pcap)
+packet_capture = None
+
+# Bounded queues from the receive thread to the per-direction workers (sized by --queue-size)
+DEFAULT_QUEUE_SIZE = 256
+direction_queues = {
+    "client-to-server": queue.Queue(DEFAULT_QUEUE_SIZE),
+    "server-to-client": queue.Queue(DEFAULT_QUEUE_SIZE),
+}
+# Each counter has a single writer: the receive thread (enqueued, overflow, high_water) or the
+# direction's worker (processed, forwarded, the simulated drops and delays, and the receive-to-send
+# times in seconds)
+queue_stats = {
+    direction: {"enqueued": 0, "overflow": 0, "high_water": 0, "processed": 0, "forwarded": 0,
+                "simulated_drops": 0, "simulated_delays": 0, "forward_time_total": 0.0, "forward_time_max": 0.0}
+    for direction in direction_queues
+}
+
+# Last client seen, where server-to-client packets are sent
+client_address = None
+
 # Track last acknowledged sequence for handling retransmissions
 last_acknowledged_sequence = {
     "client-to-server": 0,
@@ -38,11 +94,29 @@ last_acknowledged_sequence = {
 }
 
 
-def is_retransmission(direction, seq_number):
+def check_duplicate(direction, seq_number, is_ack, acknowledged=last_acknowledged_sequence):
     """
-    Check if the packet is a retransmission based on the last acknowledged sequence number.
+    Run a packet through the duplicate filter, recording the highest ACK let through.
+
+    Args:
+        acknowledged (dict): Highest forwarded ACK per direction (the proxy's own by default).
+
+    Returns:
+        str: "duplicate" if the packet should be discarded, "retransmission" for a repeat of the
+        last acknowledged sequence (forwarded, so the client sees duplicate ACKs), otherwise "new".
     """
-    return seq_number > last_acknowledged_sequence[direction]
+    if seq_number < acknowledged[direction]:
+        return "duplicate"
+    verdict = "retransmission" if seq_number == acknowledged[direction] else "new"
+    if is_ack:
+        acknowledged[direction] = max(acknowledged[direction], seq_number)
+    return verdict
+
+
+def capture(source, destination, data, verdict):
+    """Record a datagram in the packet capture, if one is running."""
+    if packet_capture is not None:
+        packet_capture.record(source, destination, data, verdict)
 
 
 def cleanup_cache(direction):
@@ -56,36 +130,52 @@ def cleanup_cache(direction):
     }
 
 
-def clear_expired_cache():
-    """Clear deduplication cache periodically to prevent memory bloat."""
-    while True:
-        time.sleep(CACHE_TIMEOUT)
-        dedup_cache["client_to_server"].clear()
-        dedup_cache["server_to_client"].clear()
+def hold_delayed(data):
+    """
+    Copy a datagram out of its pooled receive buffer for the delay queue.
+
+    Returns:
+        memoryview or bytes: A view of a delay_pool buffer, given back once the packet is
+        forwarded, or a plain copy if the datagram is larger than the pool's buffers.
+    """
+    if len(data) > delay_pool.buffer_size:
+        return bytes(data)
+    buffer = delay_pool.acquire()
+    buffer[:len(data)] = data
+    return memoryview(buffer)[:len(data)]
 
 
-ack_tracking_cache = {}  # Tracks ACK packets for potential retries
+def forward_due_packets(direction):
+    """Forward the delayed packets of a direction that are due, returning their buffers to delay_pool."""
+    # Take the due packets out under the lock so packets scheduled meanwhile are not lost
+    with proxy_config_lock:
+        pending = delayed_packets[direction]
+        current_time = time.monotonic_ns()
+        due_packets = []
+        while pending and pending[0].due <= current_time:
+            due_packets.append(heapq.heappop(pending))
+    for packet in due_packets:
+        addr, destination, seq_number = packet.source, packet.destination, packet.seq_number
+        try:
+            proxy_socket.sendto(packet.data, destination)
+            capture(addr, destination, packet.data, f"delayed {direction}")
+            publish_packet("forward", direction, addr, destination, seq_number)
+            print(f"✅ [{addr} -> {destination}] Forwarded delayed packet [SEQ {seq_number}]")
+            log_event(proxy_logger, 'Forwarded Delayed', seq_number, None, addr[0], addr[1],
+                      destination[0], destination[1], None, None)
+        except Exception as e:
+            print(f"❌ Error forwarding delayed packet: {e}")
+        finally:
+            if isinstance(packet.data, memoryview):
+                delay_pool.release(packet.data.obj)  # The delay queue owned the pooled buffer
 
 
 def process_delayed_packets():
     """Thread function to forward delayed packets once their delay time expires."""
+    register_thread("process_delayed_packets")
     while True:
-        current_time = time.time()
         for direction in ["client-to-server", "server-to-client"]:
-            remaining_packets = []
-            for packet in delayed_packets[direction]:
-                send_time, data, destination, addr = packet
-                if current_time >= send_time:
-                    try:
-                        proxy_socket.sendto(data, destination)
-                        print(f"✅ [{addr} -> {destination}] Forwarded delayed packet [SEQ {data.decode()}]")
-                        log_event(proxy_logger, 'Forwarded Delayed', None, None, addr[0], addr[1],
-                                  destination[0], destination[1], None, None)
-                    except Exception as e:
-                        print(f"❌ Error forwarding delayed packet: {e}")
-                else:
-                    remaining_packets.append(packet)
-            delayed_packets[direction] = remaining_packets
+            forward_due_packets(direction)
         time.sleep(0.01)  # Sleep briefly to prevent CPU overuse
 
 
@@ -93,131 +183,305 @@ def process_delayed_packets():
 proxy_config_lock = threading.Lock()
 
 
-def handle_drops_and_delays(seq_number, addr, message_content, is_ack, direction, proxy_socket, target_ip, target_port,
-                            data):
+def impairment_verdict(config, direction, rng=random):
     """
-    Handles drops and delays for packets in both directions.
+    Draw the fate of one packet from the drop and delay settings of its direction.
+
+    Args:
+        config (dict): Settings in the form of proxy_config.
+        direction (str): "client-to-server" or "server-to-client".
+        rng (random.Random): Source of randomness (the random module by default).
+
+    Returns:
+        tuple[str, float]: FORWARD, DROP or DELAY, and the delay in seconds (0 unless DELAY).
     """
     config_prefix = "client" if direction == "client-to-server" else "server"
+    if rng.random() < config[f"{config_prefix}-drop"]:
+        return DROP, 0.0
+    if rng.random() < config[f"{config_prefix}-delay"]:
+        return DELAY, rng.randint(*config[f"{config_prefix}-delay-time"]) / 1000  # Convert ms to seconds
+    return FORWARD, 0.0
 
-    # Acquire the lock to ensure thread-safe access to proxy_config
+
+def handle_drops_and_delays(seq_number, addr, message_content, is_ack, direction, proxy_socket, target_ip, target_port,
+                            data, rule=None):
+    """
+    Handles drops and delays for packets in both directions.
+
+    Args:
+        rule (utils.rules.Rule, optional): Per-flow rule whose settings override proxy_config.
+
+    Returns:
+        str: FORWARD if the caller should send the packet now, DROP if it was dropped, or DELAY if
+        `data` was queued in delayed_packets, held in a delay_pool buffer.
+    """
+    # Only the decision and the delay queue need the lock, which the delay thread and the control
+    # interface share: printing and logging happen outside it
     print(f"🔒 Acquiring lock for drop/delay configuration...")
     with proxy_config_lock:
-        print(f"🔑 Lock acquired for drop/delay configuration.")
-
-        # Simulate drop
-        if random.random() < proxy_config[f"{config_prefix}-drop"]:
-            print(f"❌ [{direction}] Dropped packet [SEQ {seq_number}] from {addr}")
-            log_event(proxy_logger, 'Dropped', seq_number, None, addr[0], addr[1], target_ip, target_port,
-                      message_content, None)
-            print(f"🔓 Lock released after drop check.")
-            return False
-
-        # Simulate delay
-        if random.random() < proxy_config[f"{config_prefix}-delay"]:
-            delay_time = random.randint(*proxy_config[f"{config_prefix}-delay-time"]) / 1000  # Convert ms to seconds
-            send_time = time.time() + delay_time  # Calculate the future send time
-            delayed_packets[direction].append((send_time, data, (target_ip, target_port), addr))
-            print(
-                f"⏳ [{direction}] Scheduled packet [SEQ {seq_number}] from {addr} to be forwarded after {delay_time * 1000:.2f} ms")
-            log_event(proxy_logger, 'Delayed', seq_number, None, addr[0], addr[1], target_ip, target_port,
-                      message_content, None)
-            print(f"🔓 Lock released after delay scheduling.")
-            return False
-
-    print(f"🔓 Lock released after drop/delay handling.")
+        config = proxy_config if rule is None else {**proxy_config, **rule.settings}
+        decision, delay_time = impairment_verdict(config, direction)
+    print(f"🔓 Lock released after drop/delay decision.")
+    by_rule = f" (rule {rule.index})" if rule is not None else ""
+
+    # Simulate drop
+    if decision == DROP:
+        print(f"❌ [{direction}] Dropped packet [SEQ {seq_number}] from {addr}{by_rule}")
+        log_event(proxy_logger, 'Dropped', seq_number, None, addr[0], addr[1], target_ip, target_port,
+                  message_content, None)
+        publish_packet("drop", direction, addr, (target_ip, target_port), seq_number, rule)
+        return DROP
+
+    # Simulate delay
+    if decision == DELAY:
+        # Move the datagram into an MTU-sized pooled buffer, so the 64 KiB receive buffer goes back to
+        # the receive pool right away
+        due = time.monotonic_ns() + int(delay_time * 1e9)
+        packet = DelayedPacket(due, hold_delayed(data), (target_ip, target_port), addr, seq_number)
+        print(f"⏳ [{direction}] Scheduled packet [SEQ {seq_number}] from {addr} to be forwarded after "
+              f"{delay_time * 1000:.2f} ms{by_rule}")
+        log_event(proxy_logger, 'Delayed', seq_number, None, addr[0], addr[1], target_ip, target_port,
+                  message_content, None)
+        publish_packet("delay", direction, addr, (target_ip, target_port), seq_number, rule,
+                       round(delay_time * 1000, 3))
+        with proxy_config_lock:  # Queued once logged, so the delay thread's 'Forwarded Delayed' comes after
+            heapq.heappush(delayed_packets[direction], packet)
+        return DELAY
 
     # Example conditional for is_ack
     if is_ack:
         print(f"🟢 Acknowledgment packet [SEQ {seq_number}] handled with delay or drop logic.")
 
-    return True
+    return FORWARD
+
+
+def handle_datagram(proxy_socket, data, addr, direction, server_ip, server_port):
+    """
+    Parse, deduplicate, impair, log and forward one datagram (runs in its direction's worker).
+
+    Returns:
+        str or None: The handle_drops_and_delays decision for data packets and ACKs (DELAY means
+        `data` was queued in a delay_pool buffer), or None for datagrams relayed or discarded without one.
+    """
+    head = bytes(data[:HEADER_PEEK_BYTES])  # Copy of the header only
+
+    # Handle "TERMINATE" messages
+    if head == b"TERMINATE":
+        print(f"🚨 [Client -> Server] Termination message received from {addr}. Forwarding immediately.")
+        destination = (server_ip, server_port)
+        proxy_socket.sendto(data, destination)
+        capture(addr, destination, data, "forwarded client-to-server")
+        log_event(proxy_logger, 'Terminate', None, None, addr[0], addr[1], server_ip, server_port,
+                  "TERMINATE", None)
+        return None
+
+    # Parse message type and sequence number from the ASCII header (payloads may be binary)
+    if head.startswith(b"ACK:"):
+        seq_number = int(head.split(b":")[1])
+        is_ack = True
+        message_content = None
+        packet_type = "ack"
+    elif head.startswith(BATCH_PREFIX):
+        seq_number, last_seq_number = batch_sequence_range(data)
+        is_ack = False
+        message_content = f"BATCH {seq_number}-{last_seq_number}"
+        packet_type = "batch"
+    elif head.startswith(FRAG_PREFIX):
+        seq_number, offset, total, fragment, compressed = parse_fragment(data)
+        is_ack = False
+        message_content = f"FRAG {offset}-{offset + len(fragment)}/{total}"
+        packet_type = "frag"
+        if compressed:
+            message_content += " (compressed)"
+    elif head.startswith(FEC_PREFIX):
+        seq_number = int(head.split(b":")[1])  # First sequence number of the block it protects
+        is_ack = False
+        message_content = "FEC parity"
+        packet_type = "fec"
+    elif head.startswith(b"RESEND_ACK:"):
+        seq_number = int(head.split(b":")[1])
+        print(f"🔄 Proxy received RESEND_ACK for SEQ {seq_number} from {addr}.")
+        destination = (server_ip, server_port)
+        # Relayed untouched unless a per-flow rule impairs it (it bypasses deduplication either way)
+        rule = match_flow(direction, "resend_ack", addr, destination)
+        decision = None
+        if rule is not None:
+            decision = handle_drops_and_delays(seq_number, addr, "RESEND_ACK", False, direction, proxy_socket,
+                                               server_ip, server_port, data, rule)
+            if decision == DROP:
+                capture(addr, destination, data, f"dropped {direction}")
+            if decision != FORWARD:
+                return decision
+        proxy_socket.sendto(data, destination)
+        capture(addr, destination, data, "forwarded client-to-server")
+        return decision
+    elif head.startswith(HELLO_PREFIX):
+        # Compression negotiation is relayed untouched, like the other session control messages
+        destination = client_address if direction == "server-to-client" else (server_ip, server_port)
+        print(f"🤝 Proxy relaying {head.decode(errors='replace')} from {addr}.")
+        if destination is not None:
+            proxy_socket.sendto(data, destination)
+            capture(addr, destination, data, f"forwarded {direction}")
+        return None
+    else:
+        sequence_field, _, _ = head.partition(b":")
+        is_ack = False
+        seq_number, compressed = parse_sequence(sequence_field)
+        payload = data[len(sequence_field) + 1:]
+        packet_type = "data"
+        if compressed:
+            message_content = f"<{len(payload)} compressed bytes>"
+        else:
+            message_content = str(payload, "utf-8", "replace")
+
+    # Determine the destination
+    if direction == "client-to-server":
+        destination = (server_ip, server_port)
+    else:
+        if not client_address:
+            print("⚠️ No client address to forward to. Dropping packet.")
+            log_event(proxy_logger, 'Dropped', seq_number, None, addr[0], addr[1], server_ip,
+                      server_port, message_content, None)
+            return None
+        destination = client_address
+
+    # Cleanup deduplication cache
+    cleanup_cache(direction)
+
+    # Check for duplicates or retransmissions (this also records forwarded ACKs)
+    duplicate = check_duplicate(direction, seq_number, is_ack)
+    if duplicate != "new":
+        print(f"🔄 Duplicate or retransmitted packet [SEQ {seq_number}] detected in {direction}.")
+        if duplicate == "retransmission":
+            print(f"🟢 Retransmission of acknowledged sequence {seq_number}. Forwarding.")
+        else:
+            log_event(proxy_logger, 'Duplicate', seq_number, None, addr[0], addr[1], destination[0],
+                      destination[1], None, None)
+            capture(addr, destination, data, f"dropped {direction} (duplicate)")
+            return None
+
+    # Update deduplication cache
+    dedup_cache[direction][seq_number] = time.time()
+
+    # Handle drops and delays, with the settings of the flow's rule if it has one
+    rule = match_flow(direction, packet_type, addr, destination)
+    decision = handle_drops_and_delays(seq_number, addr, message_content, is_ack, direction, proxy_socket,
+                                       destination[0], destination[1], data, rule)
+    if decision == DROP:
+        capture(addr, destination, data, f"dropped {direction}")
+    if decision != FORWARD:
+        return decision  # Packet was dropped or delayed, no need to forward
+
+    # Forward the packet
+    proxy_socket.sendto(data, destination)
+    capture(addr, destination, data, f"forwarded {direction}")
+    publish_packet("forward", direction, addr, destination, seq_number, rule)
+    print(f"✅ [{addr} -> {destination}] Forwarded packet [SEQ {seq_number}]")
+    log_event(proxy_logger, 'Forwarded', seq_number, seq_number if is_ack else None, addr[0], addr[1],
+              destination[0], destination[1], None, None)
+    return FORWARD
+
+
+def direction_worker(direction, proxy_socket, server_ip, server_port):
+    """Worker thread of one direction: handles its queued datagrams in arrival order."""
+    register_thread(f"worker {direction}")
+    packets = direction_queues[direction]
+    stats = queue_stats[direction]
+    while True:
+        data, addr, receive_time = packets.get()
+        decision = None
+        try:
+            decision = handle_datagram(proxy_socket, data, addr, direction, server_ip, server_port)
+        except Exception as e:
+            print(f"❌ Proxy server error: {e}")
+        finally:
+            buffer_pool.release(data.obj)  # Delayed packets were moved to a delay_pool buffer
+        stats["processed"] += 1
+        if decision == DROP:
+            stats["simulated_drops"] += 1
+        elif decision == DELAY:
+            stats["simulated_delays"] += 1
+        elif decision == FORWARD:
+            forward_time = time.perf_counter() - receive_time
+            stats["forwarded"] += 1
+            stats["forward_time_total"] += forward_time
+            stats["forward_time_max"] = max(stats["forward_time_max"], forward_time)
 
 
 def udp_proxy(proxy_socket, server_ip, server_port):
     """
     A proxy server that forwards UDP packets with simulated unreliability.
+
+    This is the receive thread: it only reads datagrams into pooled buffers and queues them for
+    the worker of their direction, so slow logging or a blocking send cannot stall the socket.
+    A datagram that finds its direction's queue full is dropped and counted as an overflow.
     """
-    client_address = None  # To keep track of the client address
+    global client_address
+    register_thread("udp_proxy")
 
     print(f"🚀 Proxy server started. Relaying packets between client and server.\n")
 
     while True:
         try:
-            # Receive data from client or server
-            receive_time = datetime.now()
-            data, addr = proxy_socket.recvfrom(65507)
-            message = data.decode()
-
-            # Handle "TERMINATE" messages
-            if message == "TERMINATE":
-                print(f"🚨 [Client -> Server] Termination message received from {addr}. Forwarding immediately.")
-                destination = (server_ip, server_port)
-                proxy_socket.sendto(data, destination)
-                log_event(proxy_logger, 'Terminate', None, None, addr[0], addr[1], server_ip, server_port,
-                          message, None)
-                continue
-
-            # Parse message type and sequence number
-            if message.startswith("ACK:"):
-                seq_number = int(message.split(":")[1])
-                is_ack = True
-                message_content = None
-            elif message.startswith("RESEND_ACK:"):
-                seq_number = int(message.split(":")[1])
-                print(f"🔄 Proxy received RESEND_ACK for SEQ {seq_number} from {addr}.")
-                proxy_socket.sendto(data, (server_ip, server_port))
-                continue
-            else:
-                seq_number = int(message.split(":", 1)[0])
-                is_ack = False
-                message_content = message.split(":", 1)[1] if ":" in message else ""
-
-            # Determine packet direction
-            if addr != (server_ip, server_port):
-                direction = "client-to-server"
-                destination = (server_ip, server_port)
-                client_address = addr
-            else:
-                direction = "server-to-client"
-                if not client_address:
-                    print("⚠️ No client address to forward to. Dropping packet.")
-                    log_event(proxy_logger, 'Dropped', seq_number, None, addr[0], addr[1], server_ip,
-                              server_port, message_content, None)
-                    continue
-                destination = client_address
-
-            # Cleanup deduplication cache
-            cleanup_cache(direction)
-
-            # Check for duplicates or retransmissions
-            if seq_number <= last_acknowledged_sequence[direction]:
-                print(f"🔄 Duplicate or retransmitted packet [SEQ {seq_number}] detected in {direction}.")
-                if seq_number == last_acknowledged_sequence[direction]:
-                    print(f"🟢 Retransmission of acknowledged sequence {seq_number}. Forwarding.")
-                else:
-                    log_event(proxy_logger, 'Duplicate', seq_number, None, addr[0], addr[1], destination[0],
-                              destination[1], None, None)
-                    continue
-
-            # Update deduplication cache and last acknowledged sequence
-            dedup_cache[direction][seq_number] = time.time()
-            if is_ack:
-                last_acknowledged_sequence[direction] = max(last_acknowledged_sequence[direction], seq_number)
-
-            # Handle drops and delays
-            if not handle_drops_and_delays(seq_number, addr, message_content, is_ack, direction, proxy_socket,
-                                           destination[0], destination[1], data):
-                continue  # Packet was dropped or delayed, no need to forward
-
-            # Forward the packet
-            proxy_socket.sendto(data, destination)
-            print(f"✅ [{addr} -> {destination}] Forwarded packet [SEQ {seq_number}]")
-            log_event(proxy_logger, 'Forwarded', seq_number, seq_number if is_ack else None, addr[0], addr[1],
-                      destination[0], destination[1], None, None)
-
+            # Receive data from client or server into a pooled buffer
+            data, addr = buffer_pool.recvfrom(proxy_socket)
         except Exception as e:
             print(f"❌ Proxy server error: {e}")
+            continue
+        receive_time = time.perf_counter()
+
+        # Determine packet direction
+        if addr == (server_ip, server_port):
+            direction = "server-to-client"
+        else:
+            direction = "client-to-server"
+            client_address = addr
+
+        packets, stats = direction_queues[direction], queue_stats[direction]
+        try:
+            packets.put_nowait((data, addr, receive_time))
+        except queue.Full:
+            stats["overflow"] += 1
+            buffer_pool.release(data.obj)
+            continue
+        stats["enqueued"] += 1
+        stats["high_water"] = max(stats["high_water"], packets.qsize())
+
+
+def queue_statistics(direction):
+    stats = dict(queue_stats[direction])
+    forwarded = stats.pop("forwarded")
+    total = stats.pop("forward_time_total")
+    stats["depth"] = direction_queues[direction].qsize()
+    stats["capacity"] = direction_queues[direction].maxsize
+    stats["forwarded"] = forwarded
+    stats["forward_time_mean_ms"] = round(total / forwarded * 1000, 3) if forwarded else None
+    stats["forward_time_max_ms"] = round(stats.pop("forward_time_max") * 1000, 3)
+    return stats
+
+
+def describe_drops():
+    """Simulated, queue overflow and kernel drops side by side, as a printable line."""
+    simulated = ", ".join(f"{queue_stats[direction]['simulated_drops']} {direction}" for direction in queue_stats)
+    overflow = sum(stats["overflow"] for stats in queue_stats.values())
+    return f"📉 Simulated drops: {simulated}; queue overflows: {overflow}\n{describe_kernel_drops(proxy_socket)}"
+
+
+def proxy_stats():
+    """Runtime statistics reported by the STATS control command."""
+    rules = rules_status()
+    stats = {
+        "receive_pool": buffer_pool.stats(),
+        "delay_pool": delay_pool.stats(),
+        "delayed_packets": {direction: len(packets) for direction, packets in delayed_packets.items()},
+        "rules": {"count": len(rules["rules"]), "cached_flows": rules["cached_flows"]},
+        "queues": {direction: queue_statistics(direction) for direction in direction_queues},
+        "socket": socket_statistics(proxy_socket),  # Kernel drops are real loss, unlike the simulated drops
+        "subscribers": events_status(),
+    }
+    if packet_capture is not None:
+        stats["capture"] = packet_capture.stats()
+    return stats
 
 
 def main():
@@ -231,9 +495,30 @@ def main():
     proxy_config["client-delay-time"] = args.client_delay_time
     proxy_config["server-delay-time"] = args.server_delay_time
 
-    # Set up proxy socket
-    global proxy_socket
+    # Optional packet capture, written in the background
+    global packet_capture
+    if args.pcap:
+        try:
+            packet_capture = PcapWriter(args.pcap)
+        except OSError as e:
+            print(f"❌ Cannot open capture file {args.pcap}: {e}")
+            exit(1)
+        print(f"📼 Capturing traffic to {args.pcap}")
+
+    # Optional per-flow impairment rules
+    if args.rules:
+        try:
+            table = load_rules(args.rules)
+        except (ValueError, OSError) as e:
+            print(f"❌ Invalid rule table {args.rules}: {e}")
+            exit(1)
+        print(f"🎯 Applying {len(table.rules)} per-flow rule(s) from {args.rules}")
+
+    # Set up proxy socket and its pool of receive buffers
+    global proxy_socket, buffer_pool
+    buffer_pool = BufferPool()
     proxy_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    set_buffer_sizes(proxy_socket, args.recv_buffer, args.send_buffer)
     proxy_socket.bind((args.listen_ip, args.listen_port))
     print(f"🌐 Proxy server listening on {args.listen_ip}:{args.listen_port}")
 
@@ -245,14 +530,35 @@ def main():
     # Start delayed packet handler thread
     threading.Thread(target=process_delayed_packets, daemon=True).start()
 
+    # One worker per direction behind a bounded queue, fed by the receive thread
+    for direction in direction_queues:
+        direction_queues[direction] = queue.Queue(args.queue_size)
+        threading.Thread(target=direction_worker, args=(direction, proxy_socket, args.target_ip, args.target_port),
+                         daemon=True).start()
     threading.Thread(target=udp_proxy, args=(proxy_socket, args.target_ip, args.target_port), daemon=True).start()
-    threading.Thread(target=handle_control, args=(control_socket, proxy_config), daemon=True).start()
+    threading.Thread(target=handle_control, args=(control_socket, proxy_config, proxy_stats, proxy_config_lock),
+                     daemon=True).start()
 
+    if args.schedule:
+        try:
+            start_schedule(args.schedule, proxy_config, proxy_config_lock)
+        except (ValueError, OSError) as e:
+            print(f"❌ Invalid schedule {args.schedule}: {e}")
+            exit(1)
+        print(f"📅 Applying impairment schedule from {args.schedule}")
+
+    # Shut down cleanly on SIGTERM as well, so the capture file is complete
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
     try:
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
         print("\n👋 Shutting down proxy server. Goodbye!")
+    finally:
+        print(describe_drops())
+        if packet_capture is not None:
+            packet_capture.close()
+            print(f"📼 Wrote {packet_capture.records} packets to {args.pcap}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+import socket
+import threading
+import time
+
+from utils.pacing import wait_until
+from utils.parsing import parse_replay
+from utils.trace import load_trace
+
+
+def count_responses(replay_socket, stop_event, counter):
+    """Drain ACKs sent back to the replay socket so they do not pile up, counting them."""
+    replay_socket.settimeout(0.2)
+    while not stop_event.is_set():
+        try:
+            replay_socket.recvfrom(65535)
+            counter[0] += 1
+        except socket.timeout:
+            continue
+        except OSError:
+            break
+
+
+def replay(replay_socket, destination, trace, speed=1.0, max_speed=False):
+    """
+    Send recorded datagrams in their original order.
+
+    Each datagram is sent at its recorded offset from the first one divided by `speed`, or back to
+    back with `max_speed`. Datagrams recorded out of time order are not reordered; they are sent
+    as soon as the previous one has gone.
+
+    Args:
+        replay_socket (socket.socket): UDP socket to send from.
+        destination (tuple[str, int]): Server or proxy address.
+        trace (list[tuple[int, bytes]]): (timestamp in nanoseconds, datagram) pairs.
+        speed (float): Time compression factor.
+        max_speed (bool): Ignore the recorded timing.
+
+    Returns:
+        dict: Packets and bytes sent, requested and achieved durations (seconds) and the lateness
+        of each send against its schedule (nanoseconds).
+    """
+    first_timestamp = trace[0][0]
+    lateness = []
+    sent_bytes = 0
+    deadline = start = time.perf_counter_ns()
+    for timestamp, datagram in trace:
+        if not max_speed:
+            deadline = max(deadline, start + round((timestamp - first_timestamp) / speed))
+            wait_until(deadline)
+        send_time = time.perf_counter_ns()
+        replay_socket.sendto(datagram, destination)
+        lateness.append(send_time - deadline if not max_speed else 0)
+        sent_bytes += len(datagram)
+    elapsed = (time.perf_counter_ns() - start) / 1_000_000_000
+    requested = 0.0 if max_speed else (trace[-1][0] - first_timestamp) / speed / 1_000_000_000
+    return {"packets": len(trace), "bytes": sent_bytes, "requested": requested, "elapsed": elapsed,
+            "lateness": lateness}
+
+
+def report(stats, responses):
+    packets, elapsed, requested = stats["packets"], stats["elapsed"], stats["requested"]
+    achieved_rate = packets / elapsed if elapsed > 0 else float("inf")
+    print(f"\n📊 Replayed {packets} datagrams ({stats['bytes']} bytes) in {elapsed:.3f} s")
+    if requested > 0:
+        requested_rate = packets / requested
+        print(f"🎯 Requested {requested_rate:.1f} pkt/s, achieved {achieved_rate:.1f} pkt/s "
+              f"({achieved_rate / requested_rate * 100:.1f}%)")
+    else:
+        print(f"🚀 Achieved {achieved_rate:.1f} pkt/s, {stats['bytes'] * 8 / max(elapsed, 1e-9) / 1e6:.2f} Mbit/s")
+    lateness = sorted(stats["lateness"])
+    if lateness and requested > 0:
+        print(f"⏱️ Send lateness: mean {sum(lateness) / len(lateness) / 1000:.1f} µs, "
+              f"p99 {lateness[int(len(lateness) * 0.99)] / 1000:.1f} µs, max {lateness[-1] / 1000:.1f} µs")
+    print(f"📥 {responses} response(s) received")
+
+
+def main():
+    args = parse_replay()
+    try:
+        trace = load_trace(args.trace, args.direction, args.trace_port)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot read trace {args.trace}: {e}")
+        exit(1)
+    if not trace:
+        print(f"⚠️ No datagrams to replay in {args.trace}")
+        return
+
+    replay_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    replay_socket.bind(("", 0))  # Bound up front so responses can be received while sending
+    destination = (args.target_ip, args.target_port)
+    pace = "as fast as possible" if args.max_speed else f"at {args.speed:g}x speed"
+    print(f"🔁 Replaying {len(trace)} datagrams from {args.trace} to {destination[0]}:{destination[1]} {pace}")
+
+    stop_event, responses = threading.Event(), [0]
+    receiver = threading.Thread(target=count_responses, args=(replay_socket, stop_event, responses), daemon=True)
+    try:
+        receiver.start()
+        stats = replay(replay_socket, destination, trace, args.speed, args.max_speed)
+        time.sleep(0.5)  # Let the last responses arrive
+    except KeyboardInterrupt:
+        print("\n👋 Replay interrupted.")
+        return
+    finally:
+        stop_event.set()
+    report(stats, responses[0])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,427 @@
 import socket
-from datetime import datetime
+import threading
+import time
+from array import array
+from bisect import bisect_left
 
+from utils.buffer_pool import BufferPool
+from utils.delivery import BufferedFileSink, SinkError
+from utils.fec import FEC_PREFIX, FecDecoder
+from utils.journal import Journal
 from utils.logger import server_logger, log_event
 from utils.parsing import parse_server
+from utils.profiler import register_thread, install_signal_handlers
+from utils.protocol import (BATCH_PREFIX, COMPRESSION_FLAG, DEFAULT_RECEIVE_WINDOW, FRAG_PREFIX, HEADER_PEEK_BYTES,
+                            HELLO_PREFIX, NO_COMPRESSION, advertise_window, decode_batch, decode_message,
+                            decompress_payload, negotiate_compression, parse_fragment)
+from utils.reassembly import MAX_REASSEMBLY_BYTES, REASSEMBLY_TIMEOUT, Reassembler
+from utils.socket_buffers import describe_kernel_drops, set_buffer_sizes
 
 # Cache for deduplication and acknowledgment
-dedup_cache = set()
-acknowledgment_cache = {}  # Maps sequence numbers to acknowledgment messages
 CACHE_TIMEOUT = 10  # Time in seconds to keep sequence numbers in cache
+POLL_INTERVAL = 0.05  # Seconds between checks of the sink and stop event while waiting for datagrams
 
 
-def cleanup_cache():
-    """Clean up expired entries in the acknowledgment cache."""
-    now = datetime.now()
-    expired_keys = [seq for seq, (ack, timestamp) in acknowledgment_cache.items() if
-                    (now - timestamp).total_seconds() > CACHE_TIMEOUT]
-    for key in expired_keys:
-        del acknowledgment_cache[key]
+class BufferedMessage:
+    """An out-of-order message waiting in the reorder buffer."""
+    __slots__ = ("message", "addr", "receive_time")
 
+    def __init__(self, message, addr, receive_time):
+        self.message = message
+        self.addr = addr
+        self.receive_time = receive_time  # time.monotonic_ns() at arrival
 
-def udp_server(listen_ip, listen_port):
+
+class ServerSession:
+    """
+    Sequencing state of a client session: in-order delivery, the reorder buffer and the cache
+    of sent acknowledgments. It only tracks state; sending ACKs and printing is left to the caller.
+
+    The reorder buffer only takes sequence numbers less than `receive_window` past the next
+    expected one, so it never holds more than `receive_window` messages.
+    """
+
+    def __init__(self, receive_window=DEFAULT_RECEIVE_WINDOW):
+        self.receive_window = receive_window
+        self.expected_sequence_number = 1
+        self.last_acknowledged_sequence = 0  # Tracks the highest sequence acknowledged
+        # Acknowledged sequence numbers are contiguous, so the cache of sent ACKs is only their send
+        # times (time.monotonic_ns()): ack_times[i] is for sequence ack_base + i, and entries before
+        # ack_expired have expired (they are compacted away in bulk)
+        self.ack_base = 1
+        self.ack_times = array("q")
+        self.ack_expired = 0
+        self.packet_buffer = {}  # Maps sequence numbers to the BufferedMessage of out-of-order packets
+        self.compression = NO_COMPRESSION  # Codec negotiated with the client's HELLO
+        self.fec = FecDecoder()  # Recent datagrams, to rebuild lost ones from the client's parity
+        self.fec_active = False  # Set by the client's first parity datagram; nothing is kept for FEC before it
+
+    def reset(self):
+        self.__init__(self.receive_window)
+
+    def record_datagram(self, sequence_number, datagram):
+        """
+        Keep a single-message datagram for rebuilding its block from parity. Only sessions whose
+        client has sent parity keep copies, so the others receive without a copy per datagram;
+        retransmissions cover the first block.
+
+        Returns:
+            list[tuple[int, bytes]]: Datagrams rebuilt because this one completed a pending block.
+        """
+        if not self.fec_active:
+            return []
+        return self.fec.record(sequence_number, datagram)
+
+    def add_parity(self, data):
+        """Handle a FEC datagram (see FecDecoder.add_parity), keeping datagrams for FEC from now on."""
+        self.fec_active = True
+        return self.fec.add_parity(data)
+
+    def resume(self, last_sequence):
+        """Continue a session in which everything up to `last_sequence` was delivered (from a journal)."""
+        self.last_acknowledged_sequence = last_sequence
+        self.expected_sequence_number = last_sequence + 1
+        # Its ACK may have been lost in the restart: cache it, so a retransmission gets it again
+        self.ack_base = last_sequence
+        self.ack_times = array("q", [time.monotonic_ns()])
+
+    def cleanup_cache(self):
+        """Clean up expired entries in the acknowledgment cache."""
+        cutoff = time.monotonic_ns() - CACHE_TIMEOUT * 1_000_000_000
+        self.ack_expired = bisect_left(self.ack_times, cutoff, self.ack_expired)  # Send times only grow
+        if self.ack_expired * 2 > len(self.ack_times):
+            del self.ack_times[:self.ack_expired]
+            self.ack_base += self.ack_expired
+            self.ack_expired = 0
+
+    def cached_ack(self, sequence_number):
+        """Return the acknowledgment already sent for a sequence number, or None."""
+        if self.ack_base + self.ack_expired <= sequence_number < self.ack_base + len(self.ack_times):
+            return f"ACK:{sequence_number}"
+        return None
+
+    def current_ack(self):
+        """Return the cumulative acknowledgment for everything delivered so far, or None."""
+        if self.last_acknowledged_sequence == 0:
+            return None
+        return self.cached_ack(self.last_acknowledged_sequence) or f"ACK:{self.last_acknowledged_sequence}"
+
+    def advertised_window(self, free_capacity=None):
+        """
+        Receive window to advertise: the free reorder-buffer slots, limited by the free capacity
+        of the consumer the messages are delivered to.
+
+        Returns:
+            int: Sequence numbers past the last acknowledged one the client may send.
+        """
+        window = self.receive_window - len(self.packet_buffer)
+        if free_capacity is not None:
+            window = min(window, free_capacity)
+        return max(window, 0)
+
+    def accept(self, sequence_number, message, addr, receive_time):
+        """
+        Accept a data message and deliver everything that is now in order.
+
+        Returns:
+            tuple[str, list]: The status ("duplicate", "overflow", "buffered" or "delivered") and
+            the delivered messages as (sequence number, message, address, from buffer) tuples, in
+            order.
+        """
+        if sequence_number <= self.last_acknowledged_sequence:
+            return "duplicate", []
+
+        if sequence_number >= self.expected_sequence_number + self.receive_window:
+            return "overflow", []  # Beyond the reorder buffer; the client will retransmit it
+
+        if sequence_number > self.expected_sequence_number:
+            self.packet_buffer[sequence_number] = BufferedMessage(message, addr, receive_time)
+            return "buffered", []
+
+        delivered = [(sequence_number, message, addr, False)]
+        self.acknowledge(sequence_number)
+
+        # Process buffered packets in order
+        while self.expected_sequence_number in self.packet_buffer:
+            buffered = self.packet_buffer.pop(self.expected_sequence_number)
+            delivered.append((self.expected_sequence_number, buffered.message, buffered.addr, True))
+            self.acknowledge(self.expected_sequence_number)
+        return "delivered", delivered
+
+    def acknowledge(self, sequence_number):
+        ack_message = f"ACK:{sequence_number}"
+        self.ack_times.append(time.monotonic_ns())
+        self.last_acknowledged_sequence = sequence_number
+        self.expected_sequence_number = sequence_number + 1
+        return ack_message
+
+
+def udp_server(listen_ip, listen_port, reassembly_timeout=REASSEMBLY_TIMEOUT, reassembly_memory=MAX_REASSEMBLY_BYTES,
+               sink=None, stop_event=None, receive_window=DEFAULT_RECEIVE_WINDOW, recv_buffer=None, send_buffer=None,
+               journal=None):
+    """
+    Receive messages reliably and deliver them in order.
+
+    Args:
+        sink (optional): Consumer of the delivered messages (see utils.delivery). Its deliver() is
+            called for every in-order message instead of printing it, and its free_capacity()
+            limits the advertised receive window. Closing the sink is left to the caller. The
+            server stops if the sink raises SinkError, since nothing more can be delivered.
+        stop_event (threading.Event, optional): Ends the server once set, for servers embedded in
+            another process; otherwise the server runs until Ctrl+C.
+        receive_window (int): Capacity of the reorder buffer, advertised in every ACK.
+        recv_buffer (int, optional): SO_RCVBUF to request in bytes; bursts beyond it are dropped by
+            the kernel before the server sees them.
+        send_buffer (int, optional): SO_SNDBUF to request in bytes.
+        journal (utils.journal.Journal, optional): Journal of the delivered messages. The session
+            resumes after its last delivered sequence number, and every delivered message is
+            appended before it is acknowledged. Closing the journal is left to the caller.
+    """
     # Create a UDP socket
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    set_buffer_sizes(server_socket, recv_buffer, send_buffer)
     server_socket.bind((listen_ip, listen_port))
+    if sink is not None or stop_event is not None or journal is not None:
+        server_socket.settimeout(POLL_INTERVAL)
     print(f"🚀 Server started and listening on {listen_ip}:{listen_port}")
 
-    # Sequence tracking
-    expected_sequence_number = 1
-    last_acknowledged_sequence = 0  # Tracks the highest sequence acknowledged
-    processed_sequences = set()  # Tracks processed sequence numbers
-    acknowledgment_cache = {}  # Cache for sent acknowledgments
-    packet_buffer = {}  # Buffer for out-of-order packets
+    # Allow on-demand profiling (SIGUSR1) and memory snapshots (SIGUSR2) of the running server
+    register_thread("udp_server")
+    if threading.current_thread() is threading.main_thread():  # Signal handlers can only be installed there
+        install_signal_handlers("server")
+
+    # Sequence tracking, resumed from the journal after a restart
+    session = ServerSession(receive_window)
+    if journal is not None and journal.last_sequence:
+        session.resume(journal.last_sequence)
+        print(f"📒 Resuming session {journal.session} after SEQ {journal.last_sequence}")
+    # Messages split into FRAG datagrams by the client
+    reassembler = Reassembler(reassembly_timeout, reassembly_memory)
+    # Datagrams are received into reused buffers; one is enough since each is processed before the next
+    buffer_pool = BufferPool(initial=1, max_free=1)
+    # Client told that the receive window is closed, owed a window update once it reopens
+    window_closed_address = None
+
+    def report_receive():
+        stats = buffer_pool.stats()
+        print(f"📊 Receive pool: {stats['in_use']} in use, high-water {stats['high_water']}, "
+              f"{stats['allocated']} allocated for {stats['acquired']} datagrams")
+        print(describe_kernel_drops(server_socket))
+
+    def report_delivery(delivered):
+        for seq, message, sender, from_buffer in delivered:
+            if journal is not None:
+                journal.append(seq, message, sender)
+            if sink is not None:
+                sink.deliver(seq, message, sender)
+                log_event(server_logger, "Received (Buffered)" if from_buffer else "Received", seq, None, sender[0],
+                          sender[1], listen_ip, listen_port, message, None)
+            elif from_buffer:
+                print(f"✅ [SEQ {seq}] Processed from buffer: '{message}'")
+                log_event(server_logger, "Received (Buffered)", seq, None, sender[0], sender[1], listen_ip,
+                          listen_port, message, None)
+            else:
+                print(f"✅ [SEQ {seq}] Received: '{message}' from {sender}")
+                log_event(server_logger, "Received", seq, None, sender[0], sender[1], listen_ip, listen_port,
+                          message, None)
+
+    def current_window():
+        return session.advertised_window(sink.free_capacity() if sink is not None else None)
+
+    def send_ack(ack_message, addr):
+        """Send an acknowledgment carrying the current receive window."""
+        nonlocal window_closed_address
+        window = current_window()
+        server_socket.sendto(advertise_window(ack_message, window).encode(), addr)
+        if window == 0 and window_closed_address is None:
+            print(f"🪟 Receive window closed after SEQ {session.last_acknowledged_sequence}")
+        window_closed_address = addr if window == 0 else None
+
+    def send_window_update():
+        """Tell the client the window has reopened, without waiting for its next probe."""
+        address = window_closed_address
+        ack_message = session.current_ack()
+        if ack_message:
+            send_ack(ack_message, address)
+            print(f"🪟 Window update: {ack_message} with window {current_window()}")
+
+    def handle_message(sequence_number, message, addr, receive_time):
+        """Sequence a single message and send the resulting acknowledgments."""
+        status, delivered = session.accept(sequence_number, message, addr, receive_time)
+
+        # Handle duplicate packets
+        if status == "duplicate":
+            print(f"🔄 Duplicate or retransmitted packet [SEQ {sequence_number}] from {addr}. Ignored.")
+            # Resend the acknowledgment for duplicates
+            ack_message = session.cached_ack(sequence_number)
+            if ack_message:
+                send_ack(ack_message, addr)
+                print(f"📤 Resent acknowledgment for duplicate SEQ {sequence_number}")
+            return
+
+        # Handle packets beyond the reorder buffer: dropped, with the window repeated
+        if status == "overflow":
+            print(f"⚠️ SEQ {sequence_number} is beyond the receive window. Dropped.")
+            ack_message = session.current_ack()
+            if ack_message:
+                send_ack(ack_message, addr)
+            return
+
+        # Handle out-of-order packets
+        if status == "buffered":
+            print(f"🔄 [OUT-OF-ORDER] Buffering SEQ {sequence_number}. "
+                  f"Expected: {session.expected_sequence_number}")
+            # Repeat the last in-order ACK so a windowed client can detect the gap (duplicate ACK)
+            ack_message = session.cached_ack(session.last_acknowledged_sequence)
+            if ack_message:
+                send_ack(ack_message, addr)
+            return
+
+        # Acknowledge the current packet and any buffered packets it released
+        report_delivery(delivered)
+        for seq, _, sender, from_buffer in delivered:
+            ack_message = session.cached_ack(seq)
+            send_ack(ack_message, sender)
+            if sink is None:
+                suffix = f" for buffered SEQ {seq}" if from_buffer else ""
+                print(f"📤 Sent acknowledgment: {ack_message}{suffix}")
+
+    def handle_recovered(recovered, addr, receive_time):
+        """Handle datagrams rebuilt from parity as if they had arrived."""
+        for sequence_number, datagram in recovered:
+            if sequence_number <= session.last_acknowledged_sequence:
+                continue  # A retransmission got there first
+            try:
+                sequence_number, message = decode_message(datagram)
+            except ValueError as e:
+                print(f"⚠️ Datagram rebuilt from parity is malformed: {e}")
+                continue
+            print(f"🛡️ [SEQ {sequence_number}] Recovered from parity")
+            log_event(server_logger, "Recovered", sequence_number, None, addr[0], addr[1], listen_ip, listen_port,
+                      None, None)
+            handle_message(sequence_number, message.decode(), addr, receive_time)
 
     print("\n🗑 Waiting for messages...\n")
 
-    while True:
+    while stop_event is None or not stop_event.is_set():
+        data = None
         try:
-            cleanup_cache()
+            session.cleanup_cache()
+            if journal is not None:
+                journal.maybe_commit()
+            for expired_sequence in reassembler.expire():
+                print(f"⌛ Reassembly of SEQ {expired_sequence} timed out. Discarded partial message.")
+            if window_closed_address is not None and current_window() > 0:
+                send_window_update()
 
             # Receive data from the client
-            data, addr = server_socket.recvfrom(65507)
-            receive_time = datetime.now()
+            try:
+                data, addr = buffer_pool.recvfrom(server_socket)
+            except socket.timeout:
+                continue
+            receive_time = time.monotonic_ns()
+            head = bytes(data[:HEADER_PEEK_BYTES])  # Copy of the header only
 
             if not data:
                 print(f"⚠️ Received an empty message from {addr}")
                 continue
 
-            decoded_data = data.decode()
+            # Handle compression negotiation: answer with the codec the client may use for this session
+            if head.startswith(HELLO_PREFIX):
+                session.compression = negotiate_compression(head[len(HELLO_PREFIX):].decode(errors="replace"))
+                server_socket.sendto(HELLO_PREFIX + session.compression.encode(), addr)
+                print(f"🤝 Client {addr} negotiated compression: {session.compression}")
+                continue
+
+            # Handle coalesced messages: deliver them in order and answer with one cumulative ACK
+            if head.startswith(BATCH_PREFIX):
+                try:
+                    batch = decode_batch(data)
+                except ValueError as e:
+                    print(f"⚠️ Malformed batch received from {addr}: {e}")
+                    continue
+                print(f"📦 Batch of {len(batch)} message(s) [SEQ {batch[0][0]}-{batch[-1][0]}] from {addr}")
+                for sequence_number, message in batch:
+                    status, delivered = session.accept(sequence_number, str(message, "utf-8"), addr, receive_time)
+                    if status == "buffered":
+                        print(f"🔄 [OUT-OF-ORDER] Buffering SEQ {sequence_number}. "
+                              f"Expected: {session.expected_sequence_number}")
+                    elif status == "overflow":
+                        print(f"⚠️ SEQ {sequence_number} is beyond the receive window. Dropped.")
+                    report_delivery(delivered)
+                ack_message = session.cached_ack(session.last_acknowledged_sequence)
+                if ack_message:
+                    send_ack(ack_message, addr)
+                    print(f"📤 Sent acknowledgment: {ack_message} for batch")
+                continue
+
+            # Handle fragments: reassemble in place and process the message once it is complete
+            if head.startswith(FRAG_PREFIX):
+                try:
+                    sequence_number, offset, total, fragment, compressed = parse_fragment(data)
+                    if sequence_number <= session.last_acknowledged_sequence:
+                        handle_message(sequence_number, None, addr, receive_time)  # Resends the ACK
+                        continue
+                    message = reassembler.add(sequence_number, offset, total, fragment)
+                    if message is not None and compressed:
+                        message = decompress_payload(message)
+                except ValueError as e:
+                    print(f"⚠️ Fragment rejected from {addr}: {e}")
+                    continue
+                if message is not None:
+                    inflated = f" (inflated to {len(message)} bytes)" if compressed else ""
+                    print(f"🧩 [SEQ {sequence_number}] Reassembled {total} bytes{inflated}")
+                    handle_message(sequence_number, message.decode(), addr, receive_time)
+                continue
+
+            # Handle parity: rebuild the block's datagram if it is the only one missing
+            if head.startswith(FEC_PREFIX):
+                try:
+                    recovered = session.add_parity(data)
+                except ValueError as e:
+                    print(f"⚠️ Malformed parity from {addr}: {e}")
+                    continue
+                handle_recovered(recovered, addr, receive_time)
+                continue
+
+            # Handle compressed single messages ('<seq>z:<zlib data>')
+            if head.partition(b":")[0].endswith(COMPRESSION_FLAG):
+                try:
+                    sequence_number, message = decode_message(data)
+                except ValueError as e:
+                    print(f"⚠️ Malformed compressed message from {addr}: {e}")
+                    continue
+                recovered = session.record_datagram(sequence_number, data)
+                handle_message(sequence_number, message.decode(), addr, receive_time)
+                handle_recovered(recovered, addr, receive_time)
+                continue
+
+            decoded_data = str(data, "utf-8")
 
             # Handle termination signal
             if decoded_data == "TERMINATE":
                 print(f"👋 Client {addr} has terminated the session. Resetting sequence.")
-                expected_sequence_number = 1
-                last_acknowledged_sequence = 0
-                processed_sequences.clear()
-                acknowledgment_cache.clear()
-                packet_buffer.clear()
-                log_event(server_logger, "Terminate", expected_sequence_number, None, addr[0], addr[1], listen_ip,
-                          listen_port, None, None)
+                session.reset()
+                if journal is not None:
+                    journal.reset()
+                reassembler.clear()
+                window_closed_address = None
+                report_receive()
+                log_event(server_logger, "Terminate", session.expected_sequence_number, None, addr[0], addr[1],
+                          listen_ip, listen_port, None, None)
                 continue
 
-            # Handle RESEND_ACK
+            # Handle RESEND_ACK (clients also send it to probe a closed receive window)
             if decoded_data.startswith("RESEND_ACK:"):
                 sequence_number = int(decoded_data.split(":")[1])
-                if sequence_number in acknowledgment_cache:
-                    ack_message, _ = acknowledgment_cache[sequence_number]
-                    server_socket.sendto(ack_message.encode(), addr)
-                    print(f"📤 Resent acknowledgment: {ack_message} for SEQ {sequence_number}")
-                else:
+                ack_message = session.cached_ack(sequence_number)
+                if sequence_number == session.last_acknowledged_sequence:
+                    ack_message = session.current_ack()  # Even once its cache entry has expired
+                if not ack_message:
                     print(f"⚠️ RESEND_ACK requested for SEQ {sequence_number}, but no such acknowledgment exists.")
+                else:
+                    send_ack(ack_message, addr)
+                    print(f"📤 Resent acknowledgment: {ack_message} for SEQ {sequence_number}")
                 continue
 
             # Parse the sequence number and message
@@ -79,56 +432,58 @@ def udp_server(listen_ip, listen_port):
                 print(f"⚠️ Malformed packet received from {addr}: {decoded_data}")
                 continue
 
-            # Handle duplicate packets
-            if sequence_number <= last_acknowledged_sequence:
-                print(f"🔄 Duplicate or retransmitted packet [SEQ {sequence_number}] from {addr}. Ignored.")
-                # Resend the acknowledgment for duplicates
-                if sequence_number in acknowledgment_cache:
-                    ack_message, _ = acknowledgment_cache[sequence_number]
-                    server_socket.sendto(ack_message.encode(), addr)
-                    print(f"📤 Resent acknowledgment for duplicate SEQ {sequence_number}")
-                continue
-
-            # Handle out-of-order packets
-            if sequence_number > expected_sequence_number:
-                print(f"🔄 [OUT-OF-ORDER] Buffering SEQ {sequence_number}. Expected: {expected_sequence_number}")
-                packet_buffer[sequence_number] = (message, addr, receive_time)
-                continue
-
-            # Process the current packet
-            print(f"✅ [SEQ {sequence_number}] Received: '{message}' from {addr}")
-            log_event(server_logger, "Received", sequence_number, None, addr[0], addr[1], listen_ip, listen_port,
-                      message, None)
-
-            # Send acknowledgment for the current sequence
-            ack_message = f"ACK:{sequence_number}"
-            acknowledgment_cache[sequence_number] = (ack_message, datetime.now())
-            server_socket.sendto(ack_message.encode(), addr)
-            print(f"📤 Sent acknowledgment: {ack_message}")
-
-            last_acknowledged_sequence = sequence_number
-            expected_sequence_number += 1
-
-            # Process buffered packets in order
-            while expected_sequence_number in packet_buffer:
-                buffered_message, buffered_addr, buffered_time = packet_buffer.pop(expected_sequence_number)
-                print(f"✅ [SEQ {expected_sequence_number}] Processed from buffer: '{buffered_message}'")
-                ack_message = f"ACK:{expected_sequence_number}"
-                acknowledgment_cache[expected_sequence_number] = (ack_message, datetime.now())
-                server_socket.sendto(ack_message.encode(), buffered_addr)
-                print(f"📤 Sent acknowledgment: {ack_message} for buffered SEQ {expected_sequence_number}")
-                log_event(server_logger, "Received (Buffered)", expected_sequence_number, None, buffered_addr[0],
-                          buffered_addr[1], listen_ip, listen_port, buffered_message, None)
-                last_acknowledged_sequence = expected_sequence_number
-                expected_sequence_number += 1
+            recovered = session.record_datagram(sequence_number, data)
+            handle_message(sequence_number, message, addr, receive_time)
+            handle_recovered(recovered, addr, receive_time)
 
         except KeyboardInterrupt:
+            report_receive()
             print("\n👋 Server shutting down. Goodbye!")
             break
+        except SinkError as e:
+            print(f"❌ {e}. Stopping the server, since no more messages can be delivered.")
+            break
         except Exception as e:
             print(f"❌ Error while processing message: {e}")
+        finally:
+            if data is not None:
+                buffer_pool.release(data.obj)
+
+    server_socket.close()
 
 
 if __name__ == "__main__":
     parsed_args = parse_server()
-    udp_server(parsed_args.listen_ip, parsed_args.listen_port)
+    output_sink = None
+    delivery_journal = None
+    if parsed_args.journal:
+        try:
+            started = time.perf_counter()
+            delivery_journal = Journal(parsed_args.journal, parsed_args.journal_size)
+        except (ValueError, OSError) as e:
+            print(f"❌ Cannot open journal {parsed_args.journal}: {e}")
+            exit(1)
+        stats = delivery_journal.stats()
+        print(f"📒 Journal {parsed_args.journal}: {stats['messages']} message(s) in {stats['session'] + 1} "
+              f"session(s), opened in {(time.perf_counter() - started) * 1000:.1f} ms "
+              f"({stats['recovered']} uncommitted record(s) recovered)")
+    if parsed_args.sink:
+        print(f"📝 Writing delivered messages to {parsed_args.sink}")
+        output_sink = BufferedFileSink(parsed_args.sink, parsed_args.sink_max_pending)
+    try:
+        udp_server(parsed_args.listen_ip, parsed_args.listen_port, parsed_args.reassembly_timeout,
+                   parsed_args.reassembly_memory, output_sink, receive_window=parsed_args.receive_window,
+                   recv_buffer=parsed_args.recv_buffer, send_buffer=parsed_args.send_buffer,
+                   journal=delivery_journal)
+    finally:
+        if delivery_journal is not None:
+            delivery_journal.close()
+            print(f"📒 Journal closed after {delivery_journal.commits} group commit(s)")
+        if output_sink is not None:
+            try:
+                output_sink.close()
+            except SinkError as e:
+                print(f"❌ {e}. Messages still queued for the sink were lost.")
+            stats = output_sink.stats()
+            print(f"📝 Sink: {stats['delivered']} message(s), {stats['bytes_written']} bytes "
+                  f"in {stats['writes']} write(s)")
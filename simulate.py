@@ -0,0 +1,339 @@
+import heapq
+import itertools
+import os
+import random
+import socket
+import time
+from collections import Counter, deque
+from contextlib import contextmanager, redirect_stdout
+
+from client import MAX_ATTEMPTS, send_windowed
+from proxy import DELAY, DROP, check_duplicate, impairment_verdict
+from server import ServerSession
+from utils.congestion import CONGESTION_CONTROLS, FixedWindow
+from utils.fec import FEC_PREFIX, FecEncoder
+from utils.instrumentation import percentile
+from utils.logger import client_logger
+from utils.parsing import parse_simulate
+from utils.protocol import advertise_window, parse_ack
+
+# Addresses reported by the simulated sockets; nothing is bound
+CLIENT_ADDRESS = ("10.0.0.1", 40000)
+PROXY_ADDRESS = ("10.0.0.2", 4000)
+SERVER_ADDRESS = ("10.0.0.3", 5000)
+DIRECTIONS = ("client-to-server", "server-to-client")
+
+
+class Simulation:
+    """Virtual clock and event queue shared by the simulated components."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.events = []  # Heap of (time, order, callback, args)
+        self.order = itertools.count()  # Runs events due at the same time in the order they were scheduled
+
+    def clock(self):
+        return self.now
+
+    def schedule(self, delay, callback, *args):
+        heapq.heappush(self.events, (self.now + delay, next(self.order), callback, args))
+
+    def run_until(self, deadline, done):
+        """
+        Run the events due by `deadline` until `done()` becomes true.
+
+        Returns:
+            bool: Whether `done()` became true; if not, the clock is left at the last event run.
+        """
+        while not done() and self.events and self.events[0][0] <= deadline:
+            self.now, _, callback, args = heapq.heappop(self.events)
+            callback(*args)
+        return bool(done())
+
+
+class SimulatedProxy:
+    """
+    The proxy's packet path: the duplicate filter and drop/delay verdicts of proxy.py, with
+    packets delivered by the event queue instead of a socket and the delay thread.
+    """
+
+    def __init__(self, simulation, config, rng, link_latency):
+        self.simulation = simulation
+        self.config = config
+        self.rng = rng
+        self.link_latency = link_latency
+        self.acknowledged = {direction: 0 for direction in DIRECTIONS}
+        self.stats = {direction: Counter() for direction in DIRECTIONS}
+        self.endpoints = {}  # Maps directions to the receive function at the far end
+
+    def relay(self, data, direction):
+        stats = self.stats[direction]
+        deliver = self.endpoints[direction]
+        if data == b"TERMINATE" or data.startswith(b"RESEND_ACK:"):  # Relayed untouched, like proxy.py
+            stats["Terminate" if data == b"TERMINATE" else "Probe"] += 1
+            self.simulation.schedule(self.link_latency, deliver, data)
+            return
+
+        is_ack = data.startswith(b"ACK:")
+        if is_ack:
+            seq_number = parse_ack(data)[0]
+        elif data.startswith(FEC_PREFIX):
+            seq_number = int(data.split(b":", 2)[1])
+        else:
+            seq_number = int(data.partition(b":")[0])
+        if check_duplicate(direction, seq_number, is_ack, self.acknowledged) == "duplicate":
+            stats["Duplicate"] += 1
+            return
+
+        decision, delay_time = impairment_verdict(self.config, direction, self.rng)
+        if decision == DROP:
+            stats["Dropped"] += 1
+            return
+        stats["Delayed" if decision == DELAY else "Forwarded"] += 1
+        self.simulation.schedule(self.link_latency + delay_time, deliver, data)
+
+
+class SimulatedServer:
+    """Sequencing and acknowledgments of udp_server, on top of the same ServerSession."""
+
+    def __init__(self, simulation, proxy, link_latency):
+        self.simulation = simulation
+        self.proxy = proxy
+        self.link_latency = link_latency
+        self.session = ServerSession()
+        self.stats = Counter()
+
+    def send_ack(self, ack_message):
+        if ack_message:
+            self.stats["Acknowledgments"] += 1
+            datagram = advertise_window(ack_message, self.session.advertised_window()).encode()
+            self.simulation.schedule(self.link_latency, self.proxy.relay, datagram, "server-to-client")
+
+    def receive(self, data):
+        if data == b"TERMINATE":
+            self.session.reset()
+            return
+        if data.startswith(b"RESEND_ACK:"):
+            self.send_ack(self.session.cached_ack(int(data.split(b":")[1])))
+            return
+        if data.startswith(FEC_PREFIX):
+            self.receive_recovered(self.session.add_parity(data))
+            return
+        recovered = self.session.record_datagram(int(data.partition(b":")[0]), data)
+        self.receive_message(data)
+        self.receive_recovered(recovered)
+
+    def receive_recovered(self, recovered):
+        for sequence_number, datagram in recovered:
+            if sequence_number > self.session.last_acknowledged_sequence:
+                self.stats["Recovered"] += 1
+                self.receive_message(datagram)
+
+    def receive_message(self, data):
+        sequence_number, message = data.split(b":", 1)
+        sequence_number = int(sequence_number)
+        status, delivered = self.session.accept(sequence_number, message.decode(), PROXY_ADDRESS,
+                                                self.simulation.now)
+        if status == "duplicate":
+            self.stats["Duplicate"] += 1
+            self.send_ack(self.session.cached_ack(sequence_number))
+        elif status == "overflow":
+            self.stats["Out-of-Window"] += 1
+            self.send_ack(self.session.current_ack())
+        elif status == "buffered":
+            self.stats["Out-of-Order"] += 1
+            self.send_ack(self.session.cached_ack(self.session.last_acknowledged_sequence))
+        else:
+            for seq, _, _, from_buffer in delivered:
+                self.stats["Received (Buffered)" if from_buffer else "Received"] += 1
+                self.send_ack(self.session.cached_ack(seq))
+
+
+class SimulatedSocket:
+    """
+    The client's UDP socket on the simulated network. recvfrom() runs the event queue until a
+    datagram arrives or the timeout passes on the virtual clock, so blocking client code runs
+    unchanged. It also keeps the client metrics: first sends, retransmissions and ACK latencies.
+    """
+
+    def __init__(self, simulation, proxy, link_latency):
+        self.simulation = simulation
+        self.proxy = proxy
+        self.link_latency = link_latency
+        self.timeout = None
+        self.inbox = deque()
+        self.first_sent = {}  # Maps unacknowledged sequence numbers to their first send time
+        self.stats = Counter()
+        self.latencies = []  # Milliseconds from the first send of a message to its ACK
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def getsockname(self):
+        return CLIENT_ADDRESS
+
+    def sendto(self, data, address):
+        if data.startswith(FEC_PREFIX):
+            self.stats["Parity"] += 1
+        elif data != b"TERMINATE" and not data.startswith(b"RESEND_ACK:"):
+            seq_number = int(data.partition(b":")[0])
+            if seq_number in self.first_sent:
+                self.stats["Retransmit"] += 1
+            else:
+                self.first_sent[seq_number] = self.simulation.now
+                self.stats["Sent"] += 1
+        self.simulation.schedule(self.link_latency, self.proxy.relay, data, "client-to-server")
+
+    def receive(self, data):
+        self.inbox.append(data)
+
+    def recvfrom(self, buffer_size):
+        deadline = self.simulation.now + self.timeout
+        if not self.simulation.run_until(deadline, lambda: self.inbox):
+            self.simulation.now = deadline
+            raise socket.timeout("timed out")
+        data = self.inbox.popleft()
+        if data.startswith(b"ACK:"):
+            ack = parse_ack(data)[0]
+            for seq_number in [seq for seq in self.first_sent if seq <= ack]:
+                self.latencies.append((self.simulation.now - self.first_sent.pop(seq_number)) * 1000)
+                self.stats["Acknowledged"] += 1
+        return data[:buffer_size], PROXY_ADDRESS
+
+    def abandon(self, seq_number):
+        """Forget a message the client gave up on; its sequence number may be reused."""
+        self.first_sent.pop(seq_number, None)
+
+
+def send_stop_and_wait(client_socket, messages, sequence_number, timeout):
+    """
+    The stop-and-wait loop of udp_client: each message is sent up to MAX_ATTEMPTS times, waiting
+    `timeout` for its ACK. Any other datagram ends the attempt early, and a message that fails
+    leaves the sequence number to the next message.
+
+    Returns:
+        int: The next sequence number to use.
+    """
+    client_socket.settimeout(timeout)
+    for message in messages:
+        datagram = f"{sequence_number}:{message}".encode()
+        for attempt in range(MAX_ATTEMPTS):
+            client_socket.sendto(datagram, SERVER_ADDRESS)
+            try:
+                data, _ = client_socket.recvfrom(1024)
+            except socket.timeout:
+                continue
+            if data.startswith(b"ACK:") and parse_ack(data)[0] == sequence_number:
+                sequence_number += 1
+                break
+        else:
+            client_socket.abandon(sequence_number)
+    return sequence_number
+
+
+@contextmanager
+def quiet():
+    """Silence the client's console output and log file while it runs on the virtual clock."""
+    disabled = client_logger.disabled
+    client_logger.disabled = True
+    try:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            yield
+    finally:
+        client_logger.disabled = disabled
+
+
+def simulate(config, rounds=20, auto_send=4, timeout=2.0, cc=None, max_window=64, link_latency=0.0, seed=None,
+             fec=None):
+    """
+    Run one client session through the simulated proxy and server.
+
+    Args:
+        config (dict): Impairments in the form of proxy.proxy_config.
+        rounds (int): Messages typed into the client; each is followed by `auto_send` 'hi N' messages.
+        timeout (float): Client acknowledgment timeout in seconds.
+        cc (str, optional): Congestion control for windowed sending; stop-and-wait if None.
+        link_latency (float): One-way latency of each hop in seconds.
+        seed (int, optional): Seed for the proxy's drop and delay draws.
+        fec (int or str, optional): FEC block size, or "auto"; like the client, FEC without `cc`
+            sends through a fixed window.
+
+    Returns:
+        dict: Virtual duration in seconds, the client, proxy (per direction) and server event
+        counts named like their log events, and the client's ACK latencies in milliseconds.
+    """
+    simulation = Simulation()
+    proxy = SimulatedProxy(simulation, config, random.Random(seed), link_latency)
+    server = SimulatedServer(simulation, proxy, link_latency)
+    client_socket = SimulatedSocket(simulation, proxy, link_latency)
+    proxy.endpoints = {"client-to-server": server.receive, "server-to-client": client_socket.receive}
+    congestion = CONGESTION_CONTROLS[cc](max_window=max_window) if cc is not None else None
+    fec_encoder = None
+    if fec is not None:
+        fec_encoder = FecEncoder(None if fec == "auto" else fec)
+        congestion = congestion or FixedWindow(max_window=max_window)
+
+    sequence_number = 1
+    with quiet():
+        for round_number in range(1, rounds + 1):
+            messages = [f"message {round_number}"] + [f"hi {i + 2}" for i in range(auto_send)]
+            if congestion is not None:
+                sequence_number = send_windowed(client_socket, *SERVER_ADDRESS, messages, sequence_number, timeout,
+                                                congestion, clock=simulation.clock, fec=fec_encoder)
+            else:
+                sequence_number = send_stop_and_wait(client_socket, messages, sequence_number, timeout)
+
+    client_stats = Counter(client_socket.stats)
+    client_stats["Failed"] = rounds * (1 + auto_send) - client_stats["Acknowledged"]
+    return {"duration": simulation.now, "client": client_stats, "proxy": proxy.stats, "server": server.stats,
+            "latencies": client_socket.latencies}
+
+
+def report(results, elapsed):
+    client, server, latencies = Counter(), Counter(), []
+    proxy = {direction: Counter() for direction in DIRECTIONS}
+    for result in results:
+        client.update(result["client"])
+        server.update(result["server"])
+        latencies.extend(result["latencies"])
+        for direction in DIRECTIONS:
+            proxy[direction].update(result["proxy"][direction])
+    duration = sum(result["duration"] for result in results)
+
+    speedup = f" ({duration / elapsed:,.0f}x real time)" if duration > 0 and elapsed > 0 else ""
+    print(f"🧪 Simulated {len(results)} session(s), {duration:.1f} s of virtual time, in {elapsed * 1000:.1f} ms"
+          f"{speedup}\n")
+    parity = f", {client['Parity']} parity" if client["Parity"] else ""
+    print(f"📤 Client: {client['Sent']} sent, {client['Retransmit']} retransmitted, "
+          f"{client['Acknowledged']} acknowledged, {client['Failed']} failed{parity}")
+    if latencies:
+        latencies.sort()
+        print(f"⏱️ Latency: mean {sum(latencies) / len(latencies):.1f} ms, p50 {percentile(latencies, 0.5):.1f} ms, "
+              f"p99 {percentile(latencies, 0.99):.1f} ms, max {latencies[-1]:.1f} ms")
+    for direction in DIRECTIONS:
+        counts = proxy[direction]
+        print(f"🔀 Proxy {direction}: {counts['Forwarded']} forwarded, {counts['Delayed']} delayed, "
+              f"{counts['Dropped']} dropped, {counts['Duplicate']} duplicate")
+    recovered = f", {server['Recovered']} recovered from parity" if server["Recovered"] else ""
+    print(f"📥 Server: {server['Received']} received, {server['Received (Buffered)']} from buffer, "
+          f"{server['Out-of-Order']} out of order, {server['Duplicate']} duplicate{recovered}")
+
+
+def main():
+    args = parse_simulate()
+    config = {
+        "client-drop": args.client_drop,
+        "server-drop": args.server_drop,
+        "client-delay": args.client_delay,
+        "server-delay": args.server_delay,
+        "client-delay-time": args.client_delay_time,
+        "server-delay-time": args.server_delay_time,
+    }
+    start = time.perf_counter()
+    results = [simulate(config, args.rounds, args.auto_send, args.timeout, args.cc, args.max_window,
+                        args.link_latency, seed, args.fec) for seed in range(args.seed, args.seed + args.runs)]
+    report(results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import socket
+import threading
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pytest
+
+from server import udp_server
+
+
+def port_is_free(port):
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        probe.bind(("127.0.0.1", port))
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+@pytest.fixture
+def embedded_server():
+    """Start udp_server threads on demand: each call serves the given sink on a free port and returns the port."""
+    stop_event = threading.Event()
+    threads = []
+
+    def start(sink):
+        probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+        probe.close()
+        thread = threading.Thread(target=udp_server, args=("127.0.0.1", port), kwargs={"sink": sink,
+                                                                                       "stop_event": stop_event})
+        thread.start()
+        threads.append(thread)
+        while port_is_free(port):  # Wait until the server has bound its socket
+            time.sleep(0.01)
+        return port
+
+    with redirect_stdout(StringIO()):
+        yield start
+        stop_event.set()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,234 @@
+import asyncio
+
+import pytest
+
+from utils.async_client import DeliveryError, ReliableUDPClient
+from utils.delivery import CallbackSink
+
+
+def recording_sink():
+    """A sink that appends (seq, message) to the returned list."""
+    delivered = []
+    return CallbackSink(lambda seq, message, sender: delivered.append((seq, message))), delivered
+
+
+class ScriptedServer(asyncio.DatagramProtocol):
+    """A stand-in server: records every datagram and answers with reply(text), if it returns one."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.received = []
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        text = data.decode()
+        self.received.append(text)
+        answer = self.reply(text)
+        if answer is not None:
+            self.transport.sendto(answer.encode(), addr)
+
+
+async def scripted_server(reply):
+    transport, server = await asyncio.get_running_loop().create_datagram_endpoint(
+        lambda: ScriptedServer(reply), local_addr=("127.0.0.1", 0))
+    return transport, server, transport.get_extra_info("sockname")[1]
+
+
+def test_send_and_send_many_are_delivered_in_order(embedded_server):
+    sink, delivered = recording_sink()
+    port = embedded_server(sink)
+
+    async def session():
+        async with ReliableUDPClient("127.0.0.1", port, mtu=200) as client:
+            assert await client.send(b"first") == 1
+            assert await client.send_many(["second", "third", "x" * 500]) == range(2, 5)
+            assert await client.send("fifth") == 5
+            return client.stats()
+
+    stats = asyncio.run(session())
+    assert delivered == [(1, "first"), (2, "second"), (3, "third"), (4, "x" * 500), (5, "fifth")]
+    assert stats["acknowledged"] == 5 and stats["in_flight"] == 0 and stats["retransmissions"] == 0
+
+
+def test_concurrent_sends_share_a_window(embedded_server):
+    sink, delivered = recording_sink()
+    port = embedded_server(sink)
+
+    async def session():
+        async with ReliableUDPClient("127.0.0.1", port, max_window=16) as client:
+            return await asyncio.gather(*(client.send(f"message {i}") for i in range(200)))
+
+    assert asyncio.run(session()) == list(range(1, 201))
+    assert delivered == [(seq, f"message {seq - 1}") for seq in range(1, 201)]
+
+
+def test_many_sessions_run_on_one_loop(embedded_server):
+    servers = []
+    for _ in range(3):
+        sink, delivered = recording_sink()
+        servers.append((embedded_server(sink), delivered))
+
+    async def session(port, name):
+        async with ReliableUDPClient("127.0.0.1", port) as client:
+            await client.send_many(f"{name} {i}" for i in range(50))
+            await client.send(f"{name} done")
+
+    async def sessions():
+        await asyncio.gather(*(session(port, f"session {i}") for i, (port, _) in enumerate(servers)))
+
+    asyncio.run(sessions())
+    for i, (_, delivered) in enumerate(servers):
+        assert [message for _, message in delivered] == [f"session {i} {n}" for n in range(50)] + [f"session {i} done"]
+
+
+def test_lost_datagram_is_retransmitted():
+    dropped = []
+
+    def reply(text):
+        seq = int(text.split(":")[0])
+        if seq == 2 and not dropped:
+            dropped.append(seq)
+            return None
+        return f"ACK:{seq}"
+
+    async def session():
+        transport, server, port = await scripted_server(reply)
+        async with ReliableUDPClient("127.0.0.1", port, timeout=0.05, max_window=1, batch_bytes=0) as client:
+            await client.send_many(["a", "b", "c"])
+            stats = client.stats()
+        await asyncio.sleep(0.05)  # Let the server read the TERMINATE
+        transport.close()
+        return server.received, stats
+
+    received, stats = asyncio.run(session())
+    assert received == ["1:a", "2:b", "2:b", "3:c", "TERMINATE"]
+    assert stats["retransmissions"] == 1
+
+
+def test_timeouts_of_a_lost_burst_are_one_loss_event():
+    lost = set()
+
+    def reply(text):
+        seq = int(text.split(":")[0])
+        if 9 <= seq <= 16 and seq not in lost:  # The first transmission of the second burst is lost
+            lost.add(seq)
+            return None
+        return f"ACK:{seq}"
+
+    async def session():
+        transport, server, port = await scripted_server(reply)
+        async with ReliableUDPClient("127.0.0.1", port, timeout=0.05, congestion_control="reno",
+                                     batch_bytes=0) as client:
+            await client.send_many(f"m{i}" for i in range(8))  # Slow start opens the window to 9
+            cwnd = client.congestion.cwnd
+            events, outside_window = [], []  # Congestion reactions, and units retransmitted beyond the window
+            congestion = client.congestion
+            on_timeout, on_ack, transmit = congestion.on_timeout, congestion.on_ack, client.transmit
+
+            def record_timeout():
+                events.append("timeout")
+                on_timeout()
+
+            def record_ack(acked, rtt):
+                events.append("ack")
+                on_ack(acked, rtt)
+
+            def record_transmit(unit):
+                if unit.attempts and client.in_flight.index(unit) >= congestion.window:
+                    outside_window.append(unit.first)
+                transmit(unit)
+
+            congestion.on_timeout, congestion.on_ack, client.transmit = record_timeout, record_ack, record_transmit
+            await client.send_many(f"m{i}" for i in range(8, 16))
+            return cwnd, events, outside_window, client.stats()
+
+    cwnd, events, outside_window, stats = asyncio.run(session())
+    assert cwnd == 9 and outside_window == []
+    # The eight timers of the burst expire together: one reaction, then none until a new ACK
+    assert events[0] == "timeout"
+    assert all(not (first == second == "timeout") for first, second in zip(events, events[1:]))
+    assert stats["retransmissions"] == 8 and stats["datagrams_sent"] == 24
+
+
+def test_closed_window_is_probed_with_resend_ack():
+    def reply(text):
+        if text == "1:a":
+            return "ACK:1:0"  # Delivered, but the window is now closed
+        if text.startswith("RESEND_ACK:"):
+            return "ACK:1:4"
+        if text == "2:b":
+            return "ACK:2:4"
+        return None
+
+    async def session():
+        transport, server, port = await scripted_server(reply)
+        async with ReliableUDPClient("127.0.0.1", port, timeout=0.05) as client:
+            await client.send("a")
+            await client.send("b")
+        await asyncio.sleep(0.05)
+        transport.close()
+        return server.received
+
+    assert asyncio.run(session()) == ["1:a", "RESEND_ACK:1", "2:b", "TERMINATE"]
+
+
+def test_batches_are_only_sent_once_they_fit_in_the_window():
+    def reply(text):
+        if text.startswith("BATCH:"):
+            _, first, lengths, _ = text.split(":", 3)
+            return f"ACK:{int(first) + lengths.count(',')}:4"
+        return f"ACK:{text.split(':')[0]}:4" if text != "TERMINATE" else None
+
+    async def session():
+        transport, server, port = await scripted_server(reply)
+        straddling = []  # Units sent behind others that end beyond the window: the server would drop their tail
+        async with ReliableUDPClient("127.0.0.1", port, batch_bytes=36) as client:
+            transmit = client.transmit
+
+            def record_transmit(unit):
+                if client.in_flight.index(unit) > 0 and unit.last > client.last_ack + client.peer_window:
+                    straddling.append((unit.first, unit.last))
+                transmit(unit)
+
+            await client.send("a")  # ACK:1:4
+            client.transmit = record_transmit
+            await client.send_many("bcdefg")  # SEQ 2-4, then 5-7, which ends beyond ACK:1:4's window
+        await asyncio.sleep(0.05)
+        transport.close()
+        return server.received, straddling
+
+    received, straddling = asyncio.run(session())
+    assert [text.split(":")[1] for text in received if text.startswith("BATCH:")] == ["2", "5"]
+    assert straddling == []
+
+
+def test_unanswered_session_fails_every_send():
+    async def session():
+        transport, server, port = await scripted_server(lambda text: None)
+        client = ReliableUDPClient("127.0.0.1", port, timeout=0.01, max_attempts=3)
+        await client.connect()
+        waiting = [asyncio.ensure_future(client.send(f"m{i}")) for i in range(3)]
+        results = await asyncio.gather(*waiting, return_exceptions=True)
+        with pytest.raises(DeliveryError):
+            await client.send("later")
+        await client.close()
+        transport.close()
+        return results, server.received
+
+    results, received = asyncio.run(session())
+    assert all(isinstance(result, DeliveryError) for result in results)
+    assert received.count("1:m0") == 3 and "TERMINATE" not in received
+
+
+def test_messages_must_be_utf8_text():
+    async def session():
+        transport, _, port = await scripted_server(lambda text: None)
+        async with ReliableUDPClient("127.0.0.1", port) as client:
+            with pytest.raises(ValueError):
+                await client.send(b"\xff\xfe")
+            assert client.next_sequence == 1
+        transport.close()
+
+    asyncio.run(session())
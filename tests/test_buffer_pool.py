@@ -0,0 +1,74 @@
+import socket
+
+import pytest
+
+from utils.buffer_pool import BufferPool
+
+
+@pytest.fixture
+def udp_pair():
+    """A receiving UDP socket and a sender connected to it, on loopback."""
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(1)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender.connect(receiver.getsockname())
+    yield receiver, sender
+    receiver.close()
+    sender.close()
+
+
+def test_buffers_are_reused_once_released():
+    pool = BufferPool(buffer_size=64, initial=2)
+    first = pool.acquire()
+    second = pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    for _ in range(100):
+        pool.release(pool.acquire())
+    stats = pool.stats()
+    assert stats["acquired"] == 102 and stats["misses"] == 0 and stats["allocated"] == 2
+    assert stats["in_use"] == 0 and stats["free"] == 2 and stats["high_water"] == 2
+
+
+def test_exhausted_pool_allocates_and_counts_misses():
+    pool = BufferPool(buffer_size=64, initial=1)
+    buffers = [pool.acquire() for _ in range(4)]
+    assert len({id(buffer) for buffer in buffers}) == 4
+    assert all(len(buffer) == 64 for buffer in buffers)
+    stats = pool.stats()
+    assert stats["misses"] == 3 and stats["allocated"] == 4 and stats["in_use"] == 4 and stats["high_water"] == 4
+    for buffer in buffers[:2]:
+        pool.release(buffer)
+    pool.acquire()
+    assert pool.stats()["high_water"] == 4 and pool.stats()["in_use"] == 3
+
+
+def test_free_list_is_capped_at_max_free():
+    pool = BufferPool(buffer_size=64, initial=0, max_free=2)
+    buffers = [pool.acquire() for _ in range(5)]
+    for buffer in buffers:
+        pool.release(buffer)
+    stats = pool.stats()
+    assert stats["free"] == 2 and stats["in_use"] == 0 and stats["misses"] == 5
+
+
+def test_recvfrom_receives_into_a_pooled_buffer(udp_pair):
+    receiver, sender = udp_pair
+    pool = BufferPool(buffer_size=2048, initial=1)
+    sender.send(b"12:hello")
+    data, addr = pool.recvfrom(receiver)
+    assert bytes(data) == b"12:hello" and addr == sender.getsockname()
+    assert pool.stats()["in_use"] == 1
+    pool.release(data.obj)
+    assert pool.stats()["in_use"] == 0 and pool.stats()["misses"] == 0
+
+
+def test_recvfrom_releases_the_buffer_when_the_receive_fails(udp_pair):
+    receiver, _ = udp_pair
+    pool = BufferPool(buffer_size=2048, initial=1)
+    receiver.setblocking(False)
+    with pytest.raises(BlockingIOError):
+        pool.recvfrom(receiver)
+    stats = pool.stats()
+    assert stats["in_use"] == 0 and stats["free"] == 1 and stats["acquired"] == 1
@@ -0,0 +1,57 @@
+import pytest
+
+from utils.congestion import DUPLICATE_ACK_THRESHOLD, CongestionControl, DelayBasedControl, FixedWindow, RenoControl
+
+
+@pytest.mark.parametrize("control", [RenoControl, DelayBasedControl])
+def test_timeout_collapses_window(control):
+    congestion = control(initial_window=8)
+    congestion.on_timeout()
+    assert congestion.window == 1
+    assert congestion.ssthresh == 4
+
+
+@pytest.mark.parametrize("control", [RenoControl, DelayBasedControl])
+def test_duplicate_acks_trigger_fast_retransmit_once(control):
+    congestion = control(initial_window=8)
+    signals = [congestion.on_duplicate_ack() for _ in range(DUPLICATE_ACK_THRESHOLD + 2)]
+    assert signals.count(True) == 1
+    assert congestion.window == 4
+
+
+def test_reno_slow_start_then_additive_increase():
+    congestion = RenoControl(max_window=64)
+    congestion.ssthresh = 4
+    congestion.on_ack(3, 0.01)
+    assert congestion.cwnd == 4  # Slow start: one packet per ACK
+    congestion.on_ack(4, 0.01)
+    assert congestion.window == 4  # Congestion avoidance: about one packet per window of ACKs
+    assert congestion.cwnd > 4
+
+
+def test_reno_respects_max_window():
+    congestion = RenoControl(max_window=5)
+    congestion.on_ack(50, 0.01)
+    assert congestion.window == 5
+
+
+def test_delay_based_backs_off_when_queueing():
+    congestion = DelayBasedControl(initial_window=10)
+    congestion.ssthresh = 10
+    congestion.on_ack(1, 0.010)  # Establishes the base RTT
+    window = congestion.cwnd
+    congestion.on_ack(5, 0.050)  # RTT five times the base: packets are piling up in the proxy
+    assert congestion.cwnd < window
+
+
+def test_fixed_window_ignores_loss():
+    congestion = FixedWindow(max_window=8)
+    signals = [congestion.on_duplicate_ack() for _ in range(DUPLICATE_ACK_THRESHOLD)]
+    congestion.on_timeout()
+    assert signals[-1]
+    assert congestion.window == 8
+
+
+def test_controllers_must_define_growth():
+    with pytest.raises(TypeError):
+        CongestionControl()
@@ -0,0 +1,87 @@
+import socket
+
+import pytest
+
+from utils.delivery import BufferedFileSink, CallbackSink, QueueSink, SinkError
+from utils.protocol import DEFAULT_RECEIVE_WINDOW
+
+
+def connect(port):
+    """A client socket connected to an embedded server."""
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    client.connect(("127.0.0.1", port))
+    client.settimeout(0.5)
+    return client
+
+
+def test_buffered_file_sink_writes_everything_on_close(tmp_path):
+    path = tmp_path / "delivered.txt"
+    sink = BufferedFileSink(str(path), max_pending=2)
+    for seq in range(1, 4):
+        sink.deliver(seq, f"message {seq}", ("127.0.0.1", 40000))
+    sink.close()
+    assert path.read_text() == "message 1\nmessage 2\nmessage 3\n"
+    assert sink.stats()["delivered"] == 3 and sink.stats()["pending"] == 0
+
+
+def test_buffered_file_sink_reports_a_failed_write():
+    sink = BufferedFileSink("/dev/full", batch_bytes=1)  # Every write fails with ENOSPC
+    sink.deliver(1, "lost", ("127.0.0.1", 40000))
+    sink.thread.join(1)
+    assert isinstance(sink.error, OSError)
+    with pytest.raises(SinkError):
+        sink.free_capacity()
+    with pytest.raises(SinkError):
+        sink.deliver(2, "refused", ("127.0.0.1", 40000))
+    with pytest.raises(SinkError):
+        sink.close()
+
+
+def test_queue_sink_iterates_until_closed():
+    sink = QueueSink(max_pending=2)
+    sink.deliver(1, "a", None)
+    assert sink.free_capacity() == 1
+    sink.deliver(2, "b", None)
+    assert sink.free_capacity() == 0
+    sink.close()
+    assert [message for _, message, _ in sink] == ["a", "b"]
+
+
+def test_server_delivers_in_order_to_callback(embedded_server):
+    delivered = []
+    client = connect(embedded_server(CallbackSink(lambda seq, message, sender: delivered.append((seq, message)))))
+    for datagram in (b"2:second", b"1:first"):
+        client.send(datagram)
+    window = DEFAULT_RECEIVE_WINDOW
+    # Nothing to repeat for the early SEQ 2
+    assert [client.recv(64), client.recv(64)] == [f"ACK:1:{window}".encode(), f"ACK:2:{window}".encode()]
+    assert delivered == [(1, "first"), (2, "second")]
+
+
+def test_server_closes_the_window_while_the_sink_is_full(embedded_server):
+    sink = QueueSink(max_pending=2)
+    client = connect(embedded_server(sink))
+    client.send(b"1:one")
+    assert client.recv(64) == b"ACK:1:1"
+    client.send(b"2:two")
+    assert client.recv(64) == b"ACK:2:0"
+
+    assert sink.get(timeout=1)[1] == "one"
+    assert client.recv(64) == b"ACK:2:1"  # Window update once the consumer caught up
+    client.send(b"RESEND_ACK:2")  # Zero-window probe
+    assert client.recv(64) == b"ACK:2:1"
+
+
+def test_server_stops_once_the_sink_fails(embedded_server):
+    sink = BufferedFileSink("/dev/full", batch_bytes=1)  # Every write fails with ENOSPC
+    client = connect(embedded_server(sink))
+    client.send(b"1:one")
+    # The server stops instead of leaving the client to probe a window that never reopens
+    with pytest.raises(ConnectionRefusedError):
+        for seq in range(2, 20):
+            try:
+                client.recv(64)
+            except socket.timeout:
+                pass
+            client.send(b"%d:more" % seq)
+    client.close()
@@ -0,0 +1,90 @@
+import json
+import socket
+
+import pytest
+
+from utils import events
+from utils.events import (AGGREGATE, EVENTS, encode_batches, events_status, flush_events, parse_address,
+                          publish_config, publish_packet, subscribe, unsubscribe)
+
+CLIENT, SERVER = ("127.0.0.1", 40000), ("127.0.0.1", 5000)
+
+
+@pytest.fixture
+def listener(monkeypatch):
+    monkeypatch.setattr(events, "sender_thread", object())  # The tests flush themselves
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(1)
+    yield sock
+    events.remove_subscribers(lambda subscriber: True, "test over")
+    sock.close()
+
+
+def receive(sock):
+    data, _ = sock.recvfrom(65535)
+    return [json.loads(line) for line in data.split(b"\n")]
+
+
+def test_batches_stay_within_the_limit():
+    objects = [{"seq": i, "padding": "x" * 50} for i in range(100)]
+    batches = encode_batches(objects, limit=500)
+    assert len(batches) > 1 and all(len(batch) <= 500 for batch in batches)
+    assert [json.loads(line)["seq"] for batch in batches for line in batch.split(b"\n")] == list(range(100))
+
+
+def test_sampled_packet_events(listener):
+    subscribe(listener.getsockname(), EVENTS, sample_every=2)
+    for seq in range(1, 7):
+        publish_packet("forward", "client-to-server", CLIENT, SERVER, seq)
+    publish_packet("drop", "client-to-server", CLIENT, SERVER, 7)
+    publish_packet("delay", "client-to-server", CLIENT, SERVER, 8, delay_ms=150.0)
+    flush_events()
+    received = receive(listener)
+    assert [event["seq"] for event in received] == [2, 4, 6, 8]
+    assert received[-1]["event"] == "delay" and received[-1]["delay_ms"] == 150.0
+    assert received[0]["src"] == "127.0.0.1:40000" and received[0]["dst"] == "127.0.0.1:5000"
+
+
+def test_aggregates_count_per_direction(listener):
+    subscribe(listener.getsockname(), AGGREGATE, interval=0.01)
+    for event in ("forward", "forward", "drop"):
+        publish_packet(event, "client-to-server", CLIENT, SERVER, 1)
+    publish_packet("delay", "server-to-client", SERVER, CLIENT, 1)
+    flush_events(now=events.subscribers[0].interval_start + 1)
+    aggregate, = receive(listener)
+    assert aggregate["event"] == "aggregate"
+    assert aggregate["counts"]["client-to-server"] == {"forward": 2, "drop": 1, "delay": 0}
+    assert aggregate["counts"]["server-to-client"]["delay"] == 1
+
+
+def test_config_changes_reach_every_mode(listener):
+    subscribe(listener.getsockname(), AGGREGATE, interval=60)
+    publish_config("client-drop", 0.0, 0.5, "SET")
+    flush_events()
+    change, = receive(listener)
+    assert change["event"] == "config" and change["param"] == "client-drop" and change["new"] == 0.5
+
+
+def test_subscribers_that_fall_behind_are_cut_off(listener, monkeypatch):
+    monkeypatch.setattr(events, "MAX_PENDING_EVENTS", 3)
+    subscribe(listener.getsockname(), EVENTS)
+    for seq in range(5):
+        publish_packet("forward", "client-to-server", CLIENT, SERVER, seq)
+    flush_events()
+    assert events_status() == []
+    cutoff, = receive(listener)
+    assert cutoff["event"] == "cutoff" and "fell behind" in cutoff["reason"]
+
+
+def test_unsubscribe(listener):
+    subscribe(listener.getsockname(), EVENTS)
+    assert unsubscribe(listener.getsockname())
+    assert not unsubscribe(listener.getsockname())
+    assert events_status() == []
+
+
+@pytest.mark.parametrize("text", ["127.0.0.1", "localhost:9000", "127.0.0.1:0", "127.0.0.1:70000"])
+def test_invalid_addresses(text):
+    with pytest.raises(ValueError):
+        parse_address(text)
@@ -0,0 +1,33 @@
+import pytest
+
+from utils.experiment import GRID_DEFAULTS, allocate_ports, count_log_events, expand_grid
+
+
+def test_grid_expands_to_every_combination_over_the_defaults():
+    runs = expand_grid({"client-drop": [0.0, 0.5], "client-delay-time": ["100-500"], "max-window": [1, 8, 32]})
+    assert len(runs) == 6
+    assert runs[0] == dict(GRID_DEFAULTS, **{"client-drop": 0.0, "client-delay-time": (100, 500), "max-window": 1})
+    assert {run["max-window"] for run in runs} == {1, 8, 32}
+    assert expand_grid({"cc": "reno"})[0]["cc"] == "reno"  # A single value need not be a list
+
+
+@pytest.mark.parametrize("grid", [{"client-drop": [1.5]}, {"window": [4]}, {"cc": ["cubic"]}, {"rounds": [0]},
+                                  {"timeout": ["fast"]}, {"max-window": []}])
+def test_invalid_grids_are_rejected(grid):
+    with pytest.raises(ValueError):
+        expand_grid(grid)
+
+
+def test_port_blocks_do_not_overlap():
+    ports = [port for index in range(50) for port in allocate_ports(index, 20000)]
+    assert len(set(ports)) == len(ports) and min(ports) == 20000
+    with pytest.raises(ValueError):
+        allocate_ports(20000, 20000)
+
+
+def test_log_events_are_counted_across_rotated_segments(tmp_path):
+    line = "2024-01-01 10:00:00,000, INFO, {}, 1, N/A, 127.0.0.1, 4000, 127.0.0.1, 5000, hi, None\n"
+    (tmp_path / "packet_logs_proxy.log.1").write_text(line.format("Dropped") + line.format("Forwarded"))
+    (tmp_path / "packet_logs_proxy.log").write_text(line.format("Forwarded"))
+    counts = count_log_events(str(tmp_path))
+    assert counts["proxy"] == {"Dropped": 1, "Forwarded": 2} and counts["server"] == {}
@@ -0,0 +1,68 @@
+import pytest
+
+from server import ServerSession
+from simulate import simulate
+from utils.fec import FecDecoder, FecEncoder, parse_parity
+
+DATAGRAMS = [b"1:first", b"2:second message", b"3z:\x78\x9c\x00", b"4:x"]
+LOSSY = {"client-drop": 0.2, "server-drop": 0.0, "client-delay": 0.0, "server-delay": 0.0,
+         "client-delay-time": (0, 0), "server-delay-time": (0, 0)}
+
+
+def encode_block(block_size=4):
+    encoder = FecEncoder(block_size)
+    parities = [encoder.add(seq, datagram) for seq, datagram in enumerate(DATAGRAMS, start=1)]
+    assert parities[:3] == [None, None, None]
+    return parities[3]
+
+
+@pytest.mark.parametrize("lost", [1, 2, 3, 4])
+def test_parity_rebuilds_any_single_loss(lost):
+    decoder = FecDecoder()
+    for seq, datagram in enumerate(DATAGRAMS, start=1):
+        if seq != lost:
+            assert decoder.record(seq, datagram) == []
+    assert decoder.add_parity(encode_block()) == [(lost, DATAGRAMS[lost - 1])]
+
+
+def test_block_missing_two_waits_for_a_retransmission():
+    decoder = FecDecoder()
+    decoder.record(1, DATAGRAMS[0])
+    decoder.record(4, DATAGRAMS[3])
+    assert decoder.add_parity(encode_block()) == []
+    assert decoder.record(2, DATAGRAMS[1]) == [(3, DATAGRAMS[2])]
+
+
+def test_sessions_keep_datagrams_only_once_the_client_sends_parity():
+    session = ServerSession()
+    for seq, datagram in enumerate(DATAGRAMS[:3], start=1):
+        assert session.record_datagram(seq, datagram) == []
+    assert len(session.fec.received) == 0  # A session without FEC copies nothing
+    assert session.add_parity(encode_block()) == []  # Its first block was not kept: retransmissions cover it
+    assert session.record_datagram(4, DATAGRAMS[3]) == [] and list(session.fec.received) == [4]
+
+
+def test_partial_blocks_and_gaps_are_flushed():
+    encoder = FecEncoder(8)
+    encoder.add(1, b"1:a")
+    encoder.add(3, b"3:c")  # Not consecutive: the first block is dropped
+    first, lengths, _ = parse_parity(encoder.flush())
+    assert (first, lengths) == (3, [3]) and encoder.flush() is None
+
+
+def test_adaptive_block_size_follows_losses():
+    encoder = FecEncoder()
+    size = encoder.block_size
+    encoder.observe(retransmitted=True)
+    assert encoder.block_size == size // 2
+    for _ in range(encoder.block_size):
+        encoder.observe(retransmitted=False)
+    assert encoder.block_size == size // 2 + 1
+
+
+def test_fec_saves_retransmissions_in_simulation():
+    plain = simulate(LOSSY, rounds=20, cc="fixed", max_window=8, seed=3)
+    protected = simulate(LOSSY, rounds=20, cc="fixed", max_window=8, seed=3, fec=2)
+    assert protected["server"]["Recovered"] > 0
+    assert protected["client"]["Failed"] == 0
+    assert protected["client"]["Retransmit"] < plain["client"]["Retransmit"]
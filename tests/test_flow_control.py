@@ -0,0 +1,105 @@
+import socket
+
+import pytest
+
+from client import send_windowed, wait_for_window
+from server import CACHE_TIMEOUT, ServerSession
+from utils.congestion import FixedWindow
+from utils.protocol import BATCH_PREFIX, advertise_window, batch_sequence_range, parse_ack
+
+SERVER = ("127.0.0.1", 5000)
+
+
+class ScriptedSocket:
+    """Answers recvfrom() from a script of datagrams, with None standing for a timeout."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.sent = []
+
+    def sendto(self, data, destination):
+        self.sent.append(data)
+
+    def recvfrom(self, buffer_size):
+        datagram = self.script.pop(0)
+        if datagram is None:
+            raise socket.timeout("timed out")
+        return datagram, SERVER
+
+
+def test_acks_carry_an_optional_window():
+    assert parse_ack(advertise_window("ACK:7", 12).encode()) == (7, 12)
+    assert parse_ack(b"ACK:7") == (7, None)
+    with pytest.raises(ValueError):
+        parse_ack(b"HELLO:zlib")
+
+
+def test_reorder_buffer_is_bounded_by_the_receive_window():
+    session = ServerSession(receive_window=4)
+    assert session.accept(3, "c", SERVER, None)[0] == "buffered"
+    assert session.accept(5, "e", SERVER, None)[0] == "overflow"
+    assert session.advertised_window() == 3
+    assert session.advertised_window(free_capacity=1) == 1
+    status, delivered = session.accept(1, "a", SERVER, None)
+    assert status == "delivered" and session.accept(2, "b", SERVER, None)[1][-1][0] == 3
+    assert session.advertised_window() == 4
+
+
+def test_closed_window_is_probed_until_it_reopens():
+    client_socket = ScriptedSocket([None, b"ACK:9:0", None, b"ACK:9:16"])
+    assert wait_for_window(client_socket, *SERVER, 9) == 16
+    assert client_socket.sent == [b"RESEND_ACK:9", b"RESEND_ACK:9"]
+
+
+def test_window_probes_give_up_on_a_silent_server():
+    client_socket = ScriptedSocket([None] * 5)
+    assert wait_for_window(client_socket, *SERVER, 9) is None
+    assert len(client_socket.sent) == 5
+
+
+def test_acknowledgment_cache_expires_oldest_first():
+    session = ServerSession()
+    for seq in range(1, 5):
+        session.accept(seq, "m", SERVER, None)
+    for index in range(3):
+        session.ack_times[index] -= (CACHE_TIMEOUT + 1) * 1_000_000_000  # Acknowledged long ago
+    session.cleanup_cache()
+    assert [session.cached_ack(seq) for seq in range(1, 6)] == [None, None, None, "ACK:4", None]
+    assert session.current_ack() == "ACK:4" and len(session.ack_times) == 1  # Expired entries were compacted
+
+
+class WindowedSocket:
+    """Acknowledges the oldest unacknowledged datagram on each recvfrom(), advertising `window`."""
+
+    def __init__(self, window):
+        self.window = window
+        self.acked = 0
+        self.advertised = False
+        self.pending = []  # (first, last) of the datagrams sent and not yet acknowledged
+        self.straddling = []  # Datagrams sent out of order that end beyond the advertised window
+
+    def settimeout(self, timeout):
+        pass
+
+    def getsockname(self):
+        return "127.0.0.1", 40000
+
+    def sendto(self, data, destination):
+        first, last = batch_sequence_range(data) if data.startswith(BATCH_PREFIX) else (int(data.split(b":")[0]),) * 2
+        if self.advertised and last > self.acked + self.window and first != self.acked + 1:
+            self.straddling.append((first, last))
+        self.pending.append((first, last))
+
+    def recvfrom(self, buffer_size):
+        _, self.acked = self.pending.pop(0)
+        self.advertised = True
+        return f"ACK:{self.acked}:{self.window}".encode(), SERVER
+
+
+def test_batches_are_only_sent_once_they_fit_in_the_window():
+    client_socket = WindowedSocket(window=4)
+    messages = [chr(ord("a") + i) for i in range(9)]  # Three batches of three: SEQ 1-3, 4-6 and 7-9
+    assert send_windowed(client_socket, *SERVER, messages, 1, 2.0, FixedWindow(max_window=2), batch_bytes=36) == 10
+    # After ACK:3:4, SEQ 7-9 starts within the window but ends beyond it: it waits for ACK:6
+    assert client_socket.straddling == []
+    assert client_socket.acked == 9
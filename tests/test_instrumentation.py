@@ -0,0 +1,83 @@
+import logging
+
+from client import send_windowed
+from utils.congestion import FixedWindow
+from utils.instrumentation import ClientRecorder
+
+CLIENT = ("127.0.0.1", 40000)
+SERVER = ("127.0.0.1", 5000)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(record.getMessage())
+
+
+class AckingSocket:
+    """Acknowledges everything sent so far on each recvfrom()."""
+
+    def __init__(self):
+        self.last_sequence = 0
+
+    def settimeout(self, timeout):
+        pass
+
+    def getsockname(self):
+        return CLIENT
+
+    def sendto(self, data, destination):
+        self.last_sequence = max(self.last_sequence, int(data.split(b":")[0]))
+
+    def recvfrom(self, buffer_size):
+        return b"ACK:%d:64" % self.last_sequence, SERVER
+
+
+def make_logger(name):
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = ListHandler()
+    logger.addHandler(handler)
+    return logger, handler
+
+
+def test_windowed_sends_are_logged_in_the_plot_schema():
+    logger, handler = make_logger("test_instrumentation_windowed")
+    client_socket = AckingSocket()
+    recorder = ClientRecorder(client_socket, *SERVER, logger=logger)
+    recorder.start()
+    send_windowed(client_socket, *SERVER, ["a", "bb", "ccc"], 1, 2.0, FixedWindow(max_window=2), recorder=recorder)
+    recorder.close()
+
+    events = [line.split(", ") for line in handler.lines]
+    assert [event[0] for event in events] == ["Sent", "Sent", "Acknowledged", "Acknowledged", "Sent", "Acknowledged"]
+    sent, acknowledged = events[0], events[2]
+    assert sent == ["Sent", "1", "N/A", "127.0.0.1", "40000", "127.0.0.1", "5000", "a", "None"]
+    assert acknowledged[:3] == ["Acknowledged", "1", "2"] and float(acknowledged[-1]) >= 0
+    assert recorder.summary()["acknowledged_bytes"] == 6 and logger.handlers == [handler]
+
+
+def test_summary_reports_rtt_retransmissions_and_goodput():
+    now = [0]
+    recorder = ClientRecorder(AckingSocket(), *SERVER, logger=make_logger("test_instrumentation_summary")[0],
+                              clock_ns=lambda: now[0])
+    recorder.sent(1, "hello")
+    recorder.sent(2, "world")
+    now[0] = 10_000_000
+    recorder.acknowledged(1, 1, 10_000_000, 10_000_000, size=5)
+    recorder.retransmitted(2, "world")
+    now[0] = 40_000_000
+    recorder.acknowledged(2, 2, 40_000_000, None, size=5)
+    now[0] = 500_000_000  # Idle time does not count against goodput
+    recorder.sent(3, "!")
+    recorder.failed(3, "!")
+
+    summary = recorder.summary()
+    assert summary["rtt_samples"] == 1 and summary["rtt_p50_ms"] == 10.0
+    assert summary["retransmission_ratio"] == 1 / 3 and summary["Failed"] == 1
+    assert summary["goodput_bps"] == 10 / 0.04
+    assert "RTT: p50 10.00 ms" in recorder.report()
@@ -0,0 +1,96 @@
+import pytest
+
+from server import ServerSession
+from utils.journal import HEADER_BYTES, RECORD, Journal, read_journal
+
+SENDER = ("127.0.0.1", 40000)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fill(journal, first, last):
+    for seq in range(first, last + 1):
+        journal.append(seq, f"message {seq}", SENDER)
+
+
+def test_reopening_resumes_after_a_crash(tmp_path):
+    path = tmp_path / "journal"
+    journal = Journal(path, size=65536, commit_messages=100)
+    fill(journal, 1, 250)  # The last 50 are not committed; the journal is never closed
+    reopened = Journal(path, size=65536)
+    assert (reopened.last_sequence, reopened.messages, reopened.recovered) == (250, 250, 50)
+    reopened.close()
+
+
+def test_group_commit(tmp_path):
+    clock = FakeClock()
+    journal = Journal(tmp_path / "journal", size=65536, commit_messages=100, commit_interval=0.05, clock=clock)
+    fill(journal, 1, 250)
+    assert journal.commits == 3  # On opening, then after 100 and 200 messages
+    assert not journal.maybe_commit()
+    clock.now = 0.05
+    assert journal.maybe_commit() and journal.commits == 4
+    journal.close()
+
+
+def test_messages_are_read_back_by_session(tmp_path):
+    path = tmp_path / "journal"
+    journal = Journal(path, size=65536)
+    fill(journal, 1, 3)
+    journal.reset()
+    journal.append(1, "héllo", ("10.0.0.2", 5))
+    assert (journal.session, journal.last_sequence) == (1, 1)
+    journal.close()
+    assert list(read_journal(path)) == [(0, 1, SENDER, "message 1"), (0, 2, SENDER, "message 2"),
+                                        (0, 3, SENDER, "message 3"), (1, 1, ("10.0.0.2", 5), "héllo")]
+
+
+def test_recovery_stops_at_a_torn_record(tmp_path):
+    path = tmp_path / "journal"
+    journal = Journal(path, size=65536)
+    fill(journal, 1, 10)
+    journal.map[journal.end - 1] ^= 0xFF  # Damage the last record, which was never committed
+    reopened = Journal(path, size=65536)
+    assert reopened.last_sequence == 9
+    # Records left past the end by the earlier run are not replayed after newer, shorter ones
+    reopened.append(10, "x", SENDER)
+    again = Journal(path, size=65536)
+    assert (again.last_sequence, again.messages) == (10, 10)
+
+
+def test_journal_grows_when_full(tmp_path):
+    journal = Journal(tmp_path / "journal", size=HEADER_BYTES * 2)
+    fill(journal, 1, 1000)
+    assert len(journal.map) > HEADER_BYTES * 2 and journal.last_sequence == 1000
+    journal.close()
+    assert len(list(read_journal(tmp_path / "journal"))) == 1000
+
+
+def test_recovery_only_scans_the_uncommitted_tail(tmp_path):
+    path = tmp_path / "journal"
+    journal = Journal(path, size=1 << 20, commit_messages=64)
+    fill(journal, 1, 10000)
+    reopened = Journal(path, size=1 << 20)
+    assert reopened.last_sequence == 10000 and reopened.recovered < 64
+
+
+def test_files_that_are_not_journals_are_refused(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes(b"not a journal" * RECORD.size)
+    with pytest.raises(ValueError):
+        Journal(path, size=65536)
+
+
+def test_session_resumes_after_the_journaled_sequence():
+    session = ServerSession()
+    session.resume(41)
+    assert session.cached_ack(41) == "ACK:41"  # For a retransmission whose ACK was lost in the restart
+    assert session.accept(41, "again", SENDER, 0)[0] == "duplicate"
+    status, delivered = session.accept(42, "next", SENDER, 0)
+    assert status == "delivered" and session.cached_ack(42) == "ACK:42"
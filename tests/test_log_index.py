@@ -0,0 +1,52 @@
+import os
+
+from utils.log_index import ingest, open_index, packet_journey, slowest_packets
+
+CLIENT, PROXY, SERVER = "127.0.0.1, 40000", "127.0.0.1, 4000", "127.0.0.1, 5000"
+
+
+def line(time, event, seq, source, destination, ack="N/A", message="None", latency="None"):
+    return f"2024-01-01 10:00:{time}, INFO, {event}, {seq}, {ack}, {source}, {destination}, {message}, {latency}\n"
+
+
+def append(log_dir, component, *lines, suffix=""):
+    with open(os.path.join(log_dir, f"packet_logs_{component}.log{suffix}"), "a") as log_file:
+        log_file.writelines(lines)
+
+
+def test_journey_across_components_and_sessions(tmp_path):
+    append(tmp_path, "proxy",
+           line("00,000", "Delayed", 1, CLIENT, SERVER, message="hello, there"),
+           line("00,150", "Forwarded Delayed", 1, CLIENT, SERVER),
+           line("00,160", "Forwarded", 1, SERVER, CLIENT, ack=1),
+           line("01,000", "Terminate", "N/A", CLIENT, SERVER, message="TERMINATE"),
+           line("02,000", "Dropped", 1, CLIENT, SERVER, message="again"))
+    append(tmp_path, "server",
+           line("00,155", "Received", 1, PROXY, SERVER, message="hello, there"),
+           line("01,001", "Terminate", 2, PROXY, SERVER))
+    connection = open_index(str(tmp_path / "index.db"))
+    assert ingest(connection, str(tmp_path)) == 5
+
+    session, events = packet_journey(connection, 1, session=0)
+    assert [(time_ms % 100000, component, event) for time_ms, component, event, *_ in events] == [
+        (0, "proxy", "Delayed"), (150, "proxy", "Forwarded Delayed"), (155, "server", "Received"),
+        (160, "proxy", "Forwarded")]
+    assert events[0][6] == "hello, there"
+    assert packet_journey(connection, 1)[0] == 1  # The latest session by default
+    assert slowest_packets(connection, limit=1)[0][:3] == (0, 1, 160)
+
+
+def test_incremental_ingest_follows_rotation(tmp_path):
+    connection = open_index(str(tmp_path / "index.db"))
+    append(tmp_path, "server", line("00,000", "Received", 1, PROXY, SERVER), "2024-01-01 10:00:00,5")
+    assert ingest(connection, str(tmp_path)) == 1
+    assert ingest(connection, str(tmp_path)) == 0  # Nothing new; the partial line waits
+
+    # Finish the partial line, then rotate the file the way RotatingFileHandler does
+    append(tmp_path, "server", "00, INFO, Received, 2, N/A, 127.0.0.1, 4000, 127.0.0.1, 5000, hi, None\n")
+    base = tmp_path / "packet_logs_server.log"
+    os.rename(base, str(base) + ".1")
+    append(tmp_path, "server", line("01,000", "Received", 3, PROXY, SERVER))
+
+    assert ingest(connection, str(tmp_path)) == 2
+    assert [packet_journey(connection, seq)[1][0][2] for seq in (1, 2, 3)] == ["Received"] * 3
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from utils.pacing import BYTES, PACKETS, Pacer, parse_rate
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("200", (200.0, PACKETS)),
+    ("2.5pps", (2.5, PACKETS)),
+    ("64KB/s", (64000.0, BYTES)),
+    ("1MB/s", (1000000.0, BYTES)),
+    ("500b/s", (500.0, BYTES)),
+])
+def test_rates_in_packets_or_bytes(value, expected):
+    assert parse_rate(value) == expected
+
+
+@pytest.mark.parametrize("value", ["0", "-5pps", "fast", "10KB"])
+def test_invalid_rates(value):
+    with pytest.raises(ValueError):
+        parse_rate(value)
+
+
+def send_times(pacer, sizes):
+    times = []
+    for size in sizes:
+        pacer.pace(size)
+        times.append(time.perf_counter())
+    return times
+
+
+def test_packets_are_spaced_at_the_rate():
+    pacer = Pacer(500, PACKETS)  # 2 ms apart
+    times = send_times(pacer, [100] * 11)
+    assert times[-1] - times[0] >= 0.0195  # Ten 2 ms intervals, less the time to read the clock
+    stats = pacer.stats()
+    assert stats["paced"] == 10 and stats["achieved"] == pytest.approx(500, rel=0.1)
+
+
+def test_byte_rate_spaces_by_size():
+    pacer = Pacer(100_000, BYTES)
+    times = send_times(pacer, [1000, 1000, 100])  # 10 ms after each 1000-byte datagram
+    assert times[2] - times[0] >= 0.0195
+
+
+def test_idle_time_does_not_become_a_burst():
+    pacer = Pacer(200, PACKETS)  # 5 ms apart
+    pacer.pace(10)
+    time.sleep(0.03)
+    times = send_times(pacer, [10, 10])
+    assert times[1] - times[0] >= 0.004
+
+
+def test_wait_time_counts_down_to_the_next_slot():
+    pacer = Pacer(10, PACKETS)  # 100 ms apart
+    assert pacer.wait_time() <= 0  # Nothing sent yet: free to send
+    pacer.pace(10)
+    assert 0.05 < pacer.wait_time() <= 0.1
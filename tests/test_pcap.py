@@ -0,0 +1,28 @@
+import struct
+
+from utils.pcap import PcapWriter, ipv4_checksum, read_capture, udp_packet
+
+
+def test_capture_round_trip(tmp_path):
+    path = tmp_path / "proxy.pcapng"
+    writer = PcapWriter(str(path))
+    client, server = ("127.0.0.1", 40000), ("10.0.0.2", 5000)
+    writer.record(client, server, memoryview(b"1:hello"), "forwarded client-to-server", timestamp_ns=1_000_000_123)
+    writer.record(server, client, b"ACK:1", "dropped server-to-client", timestamp_ns=1_000_000_456)
+    writer.record(client, server, b"2:\xff\x00binary", "delayed client-to-server")
+    writer.close()
+
+    packets = list(read_capture(str(path)))
+    assert writer.stats()["records"] == 3
+    assert [packet[4] for packet in packets] == ["forwarded client-to-server", "dropped server-to-client",
+                                                 "delayed client-to-server"]
+    assert packets[0][:4] == (1_000_000_123, client, server, b"1:hello")
+    assert packets[1][:4] == (1_000_000_456, server, client, b"ACK:1")
+    assert packets[2][3] == b"2:\xff\x00binary"
+
+
+def test_synthetic_headers_are_valid():
+    packet = udp_packet(("192.168.1.10", 1234), ("192.168.1.20", 80), b"abc")
+    assert len(packet) == 20 + 8 + 3
+    assert ipv4_checksum(packet[:20]) == 0  # A correct header sums to 0xFFFF
+    assert struct.unpack("!HHH", packet[20:26]) == (1234, 80, 11)
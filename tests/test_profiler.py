@@ -0,0 +1,77 @@
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+from utils import profiler
+from utils.controller import handle_memsnap_command, handle_profile_command
+
+
+@pytest.fixture
+def busy_thread():
+    """A registered thread spinning in busy_loop() until the test ends."""
+    stop = threading.Event()
+    registered = threading.Event()
+
+    def busy_loop():
+        profiler.register_thread("busy-worker")
+        registered.set()
+        while not stop.is_set():
+            sum(range(100))
+
+    thread = threading.Thread(target=busy_loop)
+    thread.start()
+    registered.wait()
+    yield thread
+    stop.set()
+    thread.join()
+    with profiler.registry_lock:
+        profiler.registered_threads.pop(thread.ident, None)
+    if profiler.is_profiling():
+        profiler.stop_profiling("/dev/null")
+
+
+def test_start_then_stop_writes_collapsed_stacks(busy_thread, tmp_path):
+    path = tmp_path / "proxy.folded"
+    assert handle_profile_command(["START", "1"]).startswith("✅ Profiling started")
+    time.sleep(0.1)
+    response = handle_profile_command(["STOP", str(path)])
+    assert response.startswith("✅ Profiling stopped") and str(path) in response
+    assert not profiler.is_profiling()
+
+    lines = path.read_text().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+    assert any(line.startswith("busy-worker;") and "busy_loop (test_profiler.py:" in line for line in lines)
+
+
+def test_stop_without_start_is_an_error():
+    assert handle_profile_command(["STOP", "unused.folded"]) == "❌ Profiling is not running."
+
+
+def test_failed_stop_keeps_the_samples_for_a_retry(busy_thread, tmp_path):
+    handle_profile_command(["START", "1"])
+    time.sleep(0.05)
+    assert handle_profile_command(["STOP", str(tmp_path / "missing" / "proxy.folded")]).startswith("❌")
+    assert profiler.is_profiling()
+    path = tmp_path / "proxy.folded"
+    assert handle_profile_command(["STOP", str(path)]).startswith("✅ Profiling stopped")
+    assert "busy-worker;" in path.read_text()
+
+
+def test_memsnap_starts_tracing_then_writes_a_snapshot(tmp_path):
+    path = tmp_path / "proxy.tracemalloc"
+    was_tracing = tracemalloc.is_tracing()
+    tracemalloc.stop()
+    try:
+        assert handle_memsnap_command([str(path)]) == "✅ tracemalloc started. Send MEMSNAP again to capture a snapshot."
+        assert not path.exists()
+        response = handle_memsnap_command([str(path)])
+        assert response.startswith(f"✅ Memory snapshot written to {path}")
+        assert tracemalloc.Snapshot.load(str(path)) is not None
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
@@ -0,0 +1,124 @@
+import queue
+import zlib
+
+import pytest
+
+from client import read_burst
+from utils.protocol import (NO_COMPRESSION, MessageCoalescer, batch_sequence_range, compress_payload, decode_batch,
+                            decode_message, decompress_payload, encode_batch, encode_fragments, encode_message,
+                            negotiate_compression, parse_fragment)
+
+
+def test_batch_round_trip():
+    messages = [b"hi 2", b"", b"with:colons", "héllo".encode()]
+    data = encode_batch(7, messages)
+    assert decode_batch(data) == list(enumerate(messages, 7))
+    assert batch_sequence_range(data) == (7, 10)
+
+
+@pytest.mark.parametrize("data", [
+    b"BATCH:1:4,4:hi 2",  # Lengths longer than the payload
+    b"BATCH:1:2:hi 2",  # Lengths shorter than the payload
+    b"BATCH:x:4:hi 2",  # Non-numeric sequence number
+    b"BATCH:1",  # Truncated header
+])
+def test_malformed_batch_is_rejected(data):
+    with pytest.raises(ValueError):
+        decode_batch(data)
+
+
+def test_coalescer_respects_byte_budget():
+    coalescer = MessageCoalescer(max_bytes=64)
+    datagrams = []
+    for seq in range(1, 21):
+        datagrams.extend(coalescer.add(seq, b"hi %d" % seq))
+    datagrams.append(coalescer.flush())
+
+    assert all(len(datagram) <= 64 for _, _, datagram in datagrams)
+    assert len(datagrams) > 1
+    # Every sequence number is carried exactly once, in order
+    sequences = [seq for first, last, _ in datagrams for seq in range(first, last + 1)]
+    assert sequences == list(range(1, 21))
+
+
+def test_coalescer_sends_single_message_unframed():
+    coalescer = MessageCoalescer()
+    assert coalescer.add(3, b"hello") == []
+    assert coalescer.flush() == (3, 3, b"3:hello")
+    assert coalescer.flush() is None
+
+
+def test_coalescer_linger_deadline():
+    coalescer = MessageCoalescer(linger=0.5)
+    assert not coalescer.due()
+    coalescer.add(1, b"hi")
+    assert not coalescer.due(coalescer.deadline - 0.1)
+    assert coalescer.due(coalescer.deadline)
+
+
+def test_lingering_burst_collects_the_lines_entered_after_a_message():
+    lines = queue.Queue()
+    for line in ["two", "three"]:
+        lines.put(line)
+    assert read_burst(lines, "one", 7, 1400, 0.05) == (["one", "two", "three"], False)
+
+    lines.put("x" * 100)  # Fills the first datagram: sent without waiting out the linger time
+    lines.put("later")
+    assert read_burst(lines, "one", 1, 64, 10) == (["one", "x" * 100], False)
+    assert lines.get_nowait() == "later"
+
+    lines.put("exit")
+    assert read_burst(lines, "last", 1, 1400, 10) == (["last"], True)
+
+
+def test_fragments_fit_in_datagram_and_round_trip():
+    payload = bytes(range(256)) * 40
+    fragments = encode_fragments(12, payload, max_datagram=500)
+    assert all(len(fragment) <= 500 for fragment in fragments)
+
+    rebuilt = bytearray(len(payload))
+    for fragment in fragments:
+        sequence_number, offset, total, view, compressed = parse_fragment(fragment)
+        assert (sequence_number, total, compressed) == (12, len(payload), False)
+        rebuilt[offset:offset + len(view)] = view
+    assert rebuilt == payload
+
+
+def test_compression_threshold_and_flag():
+    text = b"the quick brown fox " * 50
+    assert compress_payload(text[:100], threshold=256) == (text[:100], False)
+    payload, compressed = compress_payload(text, threshold=256)
+    assert compressed and len(payload) < len(text)
+    # Incompressible data is sent as it is
+    noise = bytes(range(256))
+    assert compress_payload(noise, threshold=16) == (noise, False)
+
+    datagram = encode_message(4, payload, compressed)
+    assert datagram.startswith(b"4z:")
+    assert decode_message(datagram) == (4, text)
+    assert decode_message(b"5:plain") == (5, b"plain")
+
+
+def test_compressed_batch_and_fragments():
+    text = b"abc" * 400
+    payload, _ = compress_payload(text)
+    batch = encode_batch(3, [b"hi", payload], [False, True])
+    assert batch_sequence_range(batch) == (3, 4)
+    assert [(seq, bytes(message)) for seq, message in decode_batch(batch)] == [(3, b"hi"), (4, text)]
+
+    fragments = encode_fragments(9, payload, max_datagram=30, compressed=True)
+    assert all(fragment.startswith(b"FRAG:9z:") for fragment in fragments)
+    assert parse_fragment(fragments[0])[4] is True
+
+
+def test_decompression_is_bounded():
+    bomb = zlib.compress(b"\0" * 100000)
+    with pytest.raises(ValueError):
+        decompress_payload(bomb, limit=1000)
+    with pytest.raises(ValueError):
+        decompress_payload(b"not zlib")
+
+
+def test_negotiation_picks_a_supported_codec():
+    assert negotiate_compression("lz4,zlib") == "zlib"
+    assert negotiate_compression("lz4") == NO_COMPRESSION
@@ -0,0 +1,90 @@
+import proxy
+from utils.buffer_pool import BufferPool
+
+SERVER = ("127.0.0.1", 5000)
+CLIENT = ("127.0.0.1", 40000)
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    def sendto(self, data, destination):
+        self.sent.append((bytes(data), destination))
+
+
+def test_workers_forward_and_filter_per_direction(monkeypatch):
+    monkeypatch.setattr(proxy, "client_address", CLIENT)
+    for direction in ("client-to-server", "server-to-client"):
+        monkeypatch.setitem(proxy.last_acknowledged_sequence, direction, 0)
+    sock = RecordingSocket()
+
+    assert proxy.handle_datagram(sock, memoryview(b"1:hello"), CLIENT, "client-to-server", *SERVER) == proxy.FORWARD
+    assert proxy.handle_datagram(sock, memoryview(b"ACK:2"), SERVER, "server-to-client", *SERVER) == proxy.FORWARD
+    assert proxy.handle_datagram(sock, memoryview(b"ACK:1"), SERVER, "server-to-client", *SERVER) is None  # Stale
+    assert proxy.handle_datagram(sock, memoryview(b"TERMINATE"), CLIENT, "client-to-server", *SERVER) is None
+    assert sock.sent == [(b"1:hello", SERVER), (b"ACK:2", CLIENT), (b"TERMINATE", SERVER)]
+
+
+def test_queue_statistics_report_forwarding_times(monkeypatch):
+    stats = dict(proxy.queue_stats["client-to-server"], forwarded=4, forward_time_total=0.002, forward_time_max=0.001,
+                 overflow=3)
+    monkeypatch.setitem(proxy.queue_stats, "client-to-server", stats)
+    report = proxy.queue_statistics("client-to-server")
+    assert report["forward_time_mean_ms"] == 0.5 and report["forward_time_max_ms"] == 1.0
+    assert report["overflow"] == 3 and report["capacity"] == proxy.DEFAULT_QUEUE_SIZE
+
+
+def test_delayed_packets_hold_pooled_buffers_in_due_order(monkeypatch):
+    pool = BufferPool(buffer_size=16, initial=1)
+    monkeypatch.setattr(proxy, "delay_pool", pool)
+    monkeypatch.setitem(proxy.delayed_packets, "client-to-server", [])
+    monkeypatch.setitem(proxy.proxy_config, "client-delay", 1.0)
+    for seq, delay in ((1, 300), (2, 100), (3, 200)):
+        monkeypatch.setitem(proxy.proxy_config, "client-delay-time", (delay, delay))
+        buffer = bytearray(b"%d:hello" % seq)
+        assert proxy.handle_drops_and_delays(seq, CLIENT, "hello", False, "client-to-server", None, *SERVER,
+                                             memoryview(buffer)) == proxy.DELAY
+        buffer[:] = b"reused"  # The receive buffer goes back to the receive pool once the packet is queued
+    pending = proxy.delayed_packets["client-to-server"]
+    assert pending[0].seq_number == 2 and bytes(pending[0].data) == b"2:hello"
+    assert sorted(packet.seq_number for packet in pending) == [1, 2, 3]
+    assert all(len(packet.data.obj) == 16 for packet in pending)  # Held in the delay pool's buffers
+    assert pool.stats()["in_use"] == 3
+
+
+def test_delayed_packets_return_their_buffers_once_forwarded(monkeypatch):
+    pool = BufferPool(buffer_size=16, initial=2)
+    sock = RecordingSocket()
+    monkeypatch.setattr(proxy, "delay_pool", pool)
+    monkeypatch.setattr(proxy, "proxy_socket", sock, raising=False)  # Set by main()
+    monkeypatch.setitem(proxy.delayed_packets, "client-to-server", [])
+    monkeypatch.setitem(proxy.proxy_config, "client-delay", 1.0)
+    monkeypatch.setitem(proxy.proxy_config, "client-delay-time", (0, 0))
+    oversized = b"2:" + b"x" * 32  # Larger than the pool's buffers: copied instead
+    for seq, datagram in ((1, b"1:hello"), (2, oversized)):
+        proxy.handle_drops_and_delays(seq, CLIENT, None, False, "client-to-server", None, *SERVER,
+                                      memoryview(bytearray(datagram)))
+    assert isinstance(proxy.delayed_packets["client-to-server"][1].data, bytes)
+    assert pool.stats()["in_use"] == 1
+
+    proxy.forward_due_packets("client-to-server")
+    assert sorted(sock.sent) == [(b"1:hello", SERVER), (oversized, SERVER)]
+    assert proxy.delayed_packets["client-to-server"] == []
+    assert pool.stats()["in_use"] == 0 and pool.stats()["free"] == 2 and pool.stats()["misses"] == 0
+
+
+def test_drops_and_delays_are_logged_outside_the_config_lock(monkeypatch):
+    logged = []
+    monkeypatch.setattr(proxy, "log_event", lambda logger, event, *fields: logged.append(
+        (event, proxy.proxy_config_lock.locked())))
+    monkeypatch.setattr(proxy, "delay_pool", BufferPool(buffer_size=16, initial=1))
+    monkeypatch.setitem(proxy.delayed_packets, "client-to-server", [])
+    monkeypatch.setitem(proxy.proxy_config, "client-delay-time", (100, 100))
+    for seq, drop, delay in ((1, 1.0, 0.0), (2, 0.0, 1.0)):
+        monkeypatch.setitem(proxy.proxy_config, "client-drop", drop)
+        monkeypatch.setitem(proxy.proxy_config, "client-delay", delay)
+        proxy.handle_drops_and_delays(seq, CLIENT, None, False, "client-to-server", None, *SERVER,
+                                      memoryview(bytearray(b"%d:hi" % seq)))
+    assert logged == [("Dropped", False), ("Delayed", False)]
+    assert [packet.seq_number for packet in proxy.delayed_packets["client-to-server"]] == [2]
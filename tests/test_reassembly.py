@@ -0,0 +1,51 @@
+import pytest
+
+from utils.protocol import encode_fragments, parse_fragment
+from utils.reassembly import Reassembler
+
+
+def fragments_of(sequence_number, payload, size=100):
+    # Drop the compression flag, leaving the arguments of Reassembler.add()
+    return [parse_fragment(fragment)[:4] for fragment in encode_fragments(sequence_number, payload, size)]
+
+
+def test_reassembles_out_of_order_and_duplicate_fragments():
+    payload = b"".join(b"%04d" % i for i in range(200))
+    fragments = fragments_of(1, payload)
+    reassembler = Reassembler()
+
+    results = [reassembler.add(*fragment) for fragment in reversed(fragments[1:])]
+    results.append(reassembler.add(*fragments[-1]))  # Retransmitted fragment is ignored
+    assert results == [None] * len(fragments)
+
+    message = reassembler.add(*fragments[0])
+    assert message == payload
+    assert reassembler.buffered_bytes == 0
+    assert not reassembler.partial
+
+
+def test_message_size_limit():
+    reassembler = Reassembler(max_message=1000)
+    sequence_number, offset, _, fragment = fragments_of(1, b"x" * 500)[0]
+    with pytest.raises(ValueError):
+        reassembler.add(sequence_number, offset, 5000, fragment)
+
+
+def test_memory_limit_and_expiry():
+    reassembler = Reassembler(timeout=1.0, max_bytes=1500)
+    first = fragments_of(1, b"a" * 1000)
+    second = fragments_of(2, b"b" * 1000)
+
+    assert reassembler.add(*first[0], now=0.0) is None
+    with pytest.raises(ValueError):
+        reassembler.add(*second[0], now=0.5)  # Would exceed the budget while message 1 is alive
+
+    assert reassembler.add(*second[0], now=2.0) is None  # Message 1 expired and was discarded
+    assert list(reassembler.partial) == [2]
+    assert reassembler.buffered_bytes == 1000
+
+
+def test_fragment_outside_message_is_rejected():
+    reassembler = Reassembler()
+    with pytest.raises(ValueError):
+        reassembler.add(1, 90, 100, memoryview(b"x" * 20))
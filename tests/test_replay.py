@@ -0,0 +1,48 @@
+import time
+
+from replay import replay
+from utils.pcap import PcapWriter
+from utils.trace import load_trace
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    def sendto(self, datagram, destination):
+        self.sent.append((time.perf_counter_ns(), datagram))
+
+
+def test_load_trace_from_capture_filters_direction(tmp_path):
+    path = tmp_path / "run.pcapng"
+    writer = PcapWriter(str(path))
+    client, server = ("127.0.0.1", 40000), ("127.0.0.1", 5000)
+    writer.record(client, server, b"1:a", "forwarded client-to-server", timestamp_ns=10)
+    writer.record(server, client, b"ACK:1", "forwarded server-to-client", timestamp_ns=20)
+    writer.record(client, server, b"2:b", "dropped client-to-server", timestamp_ns=30)
+    writer.close()
+
+    assert load_trace(str(path)) == [(10, b"1:a"), (30, b"2:b")]
+    assert load_trace(str(path), direction="server-to-client") == [(20, b"ACK:1")]
+
+
+def test_load_trace_from_server_log(tmp_path):
+    path = tmp_path / "packet_logs_server.log"
+    path.write_text(
+        "2024-01-01 10:00:00,000, INFO, Received, 1, N/A, 127.0.0.1, 4000, 127.0.0.1, 5000, hello, world, None\n"
+        "2024-01-01 10:00:00,250, INFO, Received (Buffered), 2, N/A, 127.0.0.1, 4000, 127.0.0.1, 5000, hi 2, None\n"
+        "2024-01-01 10:00:01,000, INFO, Terminate, 1, N/A, 127.0.0.1, 4000, 127.0.0.1, 5000, None, None\n")
+    trace = load_trace(str(path))
+    assert [datagram for _, datagram in trace] == [b"1:hello, world", b"2:hi 2", b"TERMINATE"]
+    assert trace[1][0] - trace[0][0] == 250_000_000
+
+
+def test_replay_keeps_order_and_timing():
+    trace = [(0, b"1:a"), (20_000_000, b"2:b"), (10_000_000, b"3:c"), (60_000_000, b"4:d")]
+    sock = RecordingSocket()
+    stats = replay(sock, ("127.0.0.1", 5000), trace, speed=2.0)
+
+    assert [datagram for _, datagram in sock.sent] == [b"1:a", b"2:b", b"3:c", b"4:d"]
+    offsets = [(sent - sock.sent[0][0]) / 1e6 for sent, _ in sock.sent]
+    assert 9.5 <= offsets[1] and 29.5 <= offsets[3] < 45  # Recorded gaps halved
+    assert stats["packets"] == 4 and abs(stats["requested"] - 0.03) < 1e-9
@@ -0,0 +1,107 @@
+import json
+import random
+
+import pytest
+
+import proxy
+from utils import controller, rules
+from utils.controller import handle_rules_command
+from utils.rules import PACKET_TYPES, RuleTable
+
+CLIENT = ("127.0.0.1", 40000)
+SERVER = ("127.0.0.1", 5000)
+SPECS = [
+    {"match": {"type": "ack"}, "set": {"server-drop": 1.0}},
+    {"match": {"src-port": "40000-40099", "type": ["data", "batch"]}, "set": {"client-delay": 1.0}},
+    {"match": {"direction": "client-to-server"}, "set": {"client-drop": 0.5}},
+]
+
+
+@pytest.fixture
+def active_rules(monkeypatch):
+    monkeypatch.setattr(rules, "active_table", RuleTable([]))
+    return rules
+
+
+def test_first_matching_rule_wins():
+    table = RuleTable(SPECS)
+    assert table.lookup("server-to-client", "ack", SERVER, CLIENT).index == 0
+    assert table.lookup("client-to-server", "data", CLIENT, SERVER).index == 1
+    assert table.lookup("client-to-server", "data", ("127.0.0.1", 40100), SERVER).index == 2  # Outside the range
+    assert table.lookup("server-to-client", "data", SERVER, CLIENT) is None
+    assert len(table.flows) == 4
+
+
+def test_compiled_lookup_agrees_with_a_linear_scan():
+    rng = random.Random(7)
+    specs = []
+    for _ in range(40):
+        low = rng.randrange(40000, 40200)
+        match = {"src-port": f"{low}-{low + rng.randrange(50)}", "type": rng.choice(PACKET_TYPES)}
+        if rng.random() < 0.5:
+            match["dst-ip"] = rng.choice(["127.0.0.1", "10.0.0.2"])
+        specs.append({"match": match, "set": {"client-drop": 0.1}})
+    table = RuleTable(specs)
+    for _ in range(500):
+        packet = ("client-to-server", rng.choice(PACKET_TYPES), ("127.0.0.1", rng.randrange(39990, 40260)),
+                  (rng.choice(["127.0.0.1", "10.0.0.2"]), 5000))
+        expected = next((rule for rule in table.rules if rule.matches(*packet)), None)
+        assert table.classify(*packet) is expected
+
+
+@pytest.mark.parametrize("spec", [
+    {"match": {"type": "ack"}},
+    {"match": {"type": "nack"}, "set": {"server-drop": 0.1}},
+    {"match": {"src-port": "5000-4000"}, "set": {"server-drop": 0.1}},
+    {"match": {"src-ip": "300.0.0.1"}, "set": {"server-drop": 0.1}},
+    {"match": {"protocol": "tcp"}, "set": {"server-drop": 0.1}},
+    {"set": {"client-drop": 2}},
+])
+def test_invalid_edits_leave_the_table_unchanged(active_rules, spec):
+    active_rules.install_rules(SPECS)
+    response = handle_rules_command(f" ADD {json.dumps(spec)}")
+    assert response.startswith("❌ Rule table unchanged")
+    assert len(active_rules.active_table.rules) == len(SPECS)
+
+
+@pytest.mark.parametrize("index", [-1, len(SPECS)])
+def test_deleting_a_missing_rule_leaves_the_table_unchanged(active_rules, index):
+    active_rules.install_rules(SPECS)
+    assert handle_rules_command(f" DELETE {index}").startswith("❌ Rule table unchanged")
+    assert active_rules.rule_specs() == SPECS
+
+
+def test_edits_replace_the_table(active_rules, tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": SPECS}))
+    assert handle_rules_command(f" LOAD {path}") == f"✅ Loaded 3 rule(s) from {path}"
+    table = active_rules.active_table
+    handle_rules_command(" DELETE 0")
+    assert active_rules.active_table is not table and len(table.rules) == 3  # Readers keep a whole table
+    assert json.loads(handle_rules_command(" SHOW"))["rules"][0]["index"] == 0
+    assert handle_rules_command(" CLEAR") == "✅ Cleared 2 rule(s)"
+
+
+def test_edits_are_published_as_config_events(active_rules, monkeypatch):
+    published = []
+    monkeypatch.setattr(controller, "publish_config", lambda *change: published.append(change))
+    handle_rules_command(f" ADD {json.dumps(SPECS[0])}")
+    handle_rules_command(f" ADD {json.dumps({'match': {'bogus': 1}})}")  # Rejected: nothing published
+    handle_rules_command(" CLEAR")
+    assert published == [("rules", [], [SPECS[0]], "RULES"), ("rules", [SPECS[0]], [], "RULES")]
+
+
+class SilentSocket:
+    def sendto(self, data, destination):
+        pass
+
+
+def test_rules_impair_only_matching_flows(active_rules, monkeypatch):
+    monkeypatch.setattr(proxy, "client_address", CLIENT)
+    for direction in ("client-to-server", "server-to-client"):
+        monkeypatch.setitem(proxy.last_acknowledged_sequence, direction, 0)
+        monkeypatch.setitem(proxy.dedup_cache, direction, {})
+    active_rules.install_rules(SPECS[:1])  # Drop every ACK
+    sock = SilentSocket()
+    assert proxy.handle_datagram(sock, memoryview(b"ACK:1"), SERVER, "server-to-client", *SERVER) == proxy.DROP
+    assert proxy.handle_datagram(sock, memoryview(b"1:hi"), CLIENT, "client-to-server", *SERVER) == proxy.FORWARD
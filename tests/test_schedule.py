@@ -0,0 +1,59 @@
+import json
+import threading
+
+import pytest
+
+from utils.schedule import ImpairmentSchedule, ScheduleRunner
+
+INITIAL = {
+    "client-drop": 0.0,
+    "server-drop": 0.0,
+    "client-delay": 0.0,
+    "server-delay": 0.0,
+    "client-delay-time": (100, 100),
+    "server-delay-time": (100, 100),
+}
+
+
+def test_set_and_ramp_steps():
+    schedule = ImpairmentSchedule([
+        {"at": 0, "set": {"client-delay-time": "100-200"}},
+        {"at": 10, "ramp": {"client-drop": 0.4, "client-delay-time": [300, 400]}, "duration": 20},
+    ])
+    assert schedule.values_at(5, INITIAL) == {"client-delay-time": (100, 200)}
+    assert schedule.values_at(20, INITIAL) == {"client-drop": 0.2, "client-delay-time": (200, 300)}
+    assert schedule.values_at(45, INITIAL) == {"client-drop": 0.4, "client-delay-time": (300, 400)}
+    assert schedule.next_wakeup(5) == 5
+    assert schedule.next_wakeup(45) is None
+
+
+def test_loop_wraps_around():
+    schedule = ImpairmentSchedule([{"at": 0, "set": {"server-drop": 0.1}}, {"at": 5, "set": {"server-drop": 0.5}}],
+                                  loop=True)
+    assert schedule.values_at(7, INITIAL) == {"server-drop": 0.1}
+    assert schedule.next_wakeup(7) is not None
+
+
+@pytest.mark.parametrize("steps", [
+    [],
+    [{"at": 0, "set": {"client-drop": 1.5}}],
+    [{"at": 0, "set": {"bogus": 0.1}}],
+    [{"at": 0, "ramp": {"client-drop": 0.1}}],  # A ramp without a duration
+    [{"at": 0, "set": {"client-delay-time": "500-100"}}],
+])
+def test_invalid_profiles_are_rejected(steps):
+    with pytest.raises(ValueError):
+        ImpairmentSchedule(steps)
+
+
+def test_runner_applies_profile_from_file(tmp_path):
+    path = tmp_path / "profile.json"
+    path.write_text(json.dumps({"steps": [{"at": 0, "set": {"client-drop": 0.3, "server-delay": 0.2}}]}))
+    config = dict(INITIAL)
+    runner = ScheduleRunner(ImpairmentSchedule.load(path), config, threading.Lock())
+    runner.start()
+    runner.thread.join(timeout=2)
+
+    assert not runner.thread.is_alive()
+    assert config["client-drop"] == 0.3 and config["server-delay"] == 0.2
+    assert runner.updates == 1
@@ -0,0 +1,36 @@
+import pytest
+
+from simulate import simulate
+
+NO_IMPAIRMENT = {"client-drop": 0.0, "server-drop": 0.0, "client-delay": 0.0, "server-delay": 0.0,
+                 "client-delay-time": (0, 0), "server-delay-time": (0, 0)}
+
+
+def test_clean_link_takes_one_round_trip_per_message():
+    result = simulate(NO_IMPAIRMENT, rounds=5, auto_send=4, link_latency=0.001)
+    assert result["client"]["Acknowledged"] == 25 and result["client"]["Retransmit"] == 0
+    assert result["duration"] == pytest.approx(25 * 0.004)  # Four hops per message and ACK
+    assert result["server"]["Received"] == 25
+
+
+def test_total_loss_fails_every_message_after_all_attempts():
+    result = simulate(dict(NO_IMPAIRMENT, **{"client-drop": 1.0}), rounds=2, auto_send=1, timeout=2.0)
+    assert result["client"]["Failed"] == 4 and result["client"]["Retransmit"] == 16
+    assert result["duration"] == pytest.approx(4 * 5 * 2.0)  # Virtual time only
+    assert result["proxy"]["client-to-server"]["Dropped"] == 20
+
+
+def test_runs_are_reproducible_and_latencies_follow_the_delays():
+    config = dict(NO_IMPAIRMENT, **{"client-delay": 1.0, "client-delay-time": (100, 500), "server-drop": 0.3})
+    first = simulate(config, seed=7)
+    assert first == simulate(config, seed=7)
+    assert first["client"]["Failed"] == 0
+    assert min(first["latencies"]) >= 100
+
+
+@pytest.mark.parametrize("cc", ["reno", "fixed"])
+def test_windowed_client_runs_on_the_virtual_clock(cc):
+    config = dict(NO_IMPAIRMENT, **{"client-drop": 0.2, "server-delay": 0.5, "server-delay-time": (200, 600)})
+    result = simulate(config, rounds=10, cc=cc, max_window=8, seed=1)
+    assert result["client"]["Acknowledged"] + result["client"]["Failed"] == 50
+    assert result["client"]["Retransmit"] > 0 and result["duration"] > 0.2
@@ -0,0 +1,38 @@
+import socket
+import time
+
+import pytest
+
+from utils.socket_buffers import kernel_drops, set_buffer_sizes, socket_statistics
+
+
+@pytest.fixture
+def receiver():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    yield sock
+    sock.close()
+
+
+def test_requested_sizes_are_granted(receiver):
+    default = socket_statistics(receiver)["send_buffer"]
+    sizes = set_buffer_sizes(receiver, receive_bytes=32768)
+    assert sizes["receive"] >= 32768  # Linux doubles the request
+    assert sizes["send"] == default
+
+
+def test_overflowing_the_receive_buffer_is_counted(receiver):
+    if kernel_drops(receiver) is None:
+        pytest.skip("The kernel does not expose per-socket drops here")
+    set_buffer_sizes(receiver, receive_bytes=4096)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for _ in range(100):
+        sender.sendto(b"x" * 500, receiver.getsockname())
+    sender.close()
+    time.sleep(0.05)
+    assert kernel_drops(receiver) > 0
+
+
+def test_closed_sockets_have_no_drops(receiver):
+    receiver.close()
+    assert kernel_drops(receiver) is None
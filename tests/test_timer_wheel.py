@@ -0,0 +1,65 @@
+import random
+
+from utils.timer_wheel import TimerWheel
+
+
+def test_timers_expire_in_deadline_order_and_never_early():
+    wheel = TimerWheel(tick=0.01, slots=8)
+    for key, deadline in enumerate([0.5, 0.05, 0.2, 0.051]):
+        wheel.schedule(key, deadline)
+
+    assert wheel.next_deadline() >= 0.05
+    assert wheel.expire(0.049) == []
+    assert wheel.expire(0.06) == [1, 3]
+    assert wheel.expire(0.3) == [2]
+    # Beyond one revolution of the wheel
+    assert wheel.expire(0.6) == [0]
+    assert len(wheel) == 0 and wheel.next_deadline() is None
+
+
+def test_cancel_and_rearm():
+    wheel = TimerWheel(tick=0.01, slots=64)
+    wheel.schedule("a", 0.1)
+    wheel.schedule("b", 0.2)
+    assert wheel.cancel("a")
+    assert not wheel.cancel("a")
+    assert 0.2 <= wheel.next_deadline() <= 0.21
+    wheel.schedule("b", 0.05)  # Re-arming moves the timer
+    assert 0.05 <= wheel.next_deadline() <= 0.06
+    assert wheel.expire(1.0) == ["b"]
+
+
+def test_matches_naive_deadlines():
+    rng = random.Random(7)
+    wheel = TimerWheel(tick=0.01, slots=32)
+    deadlines = {}
+    now = 0.0
+    for key in range(2000):
+        now += 0.003
+        deadline = now + rng.uniform(0.0, 1.0)
+        wheel.schedule(key, deadline)
+        deadlines[key] = deadline
+        if rng.random() < 0.3:
+            victim = rng.choice(list(deadlines))
+            wheel.cancel(victim)
+            del deadlines[victim]
+
+        expired = wheel.expire(now)
+        assert all(deadlines.pop(key) <= now for key in expired)
+        # Nothing is more than one tick overdue
+        assert all(deadline > now - 0.01 for deadline in deadlines.values())
+        if deadlines:
+            assert wheel.next_deadline() <= min(deadlines.values()) + 0.01
+
+
+def test_next_deadline_follows_cancels_of_the_earliest_timer():
+    wheel = TimerWheel(tick=0.01, slots=64)
+    # Armed beyond one revolution, and expire() is never called, as between the client's ACKs
+    for key in range(1000):
+        wheel.schedule(key, 100 + key * 0.02)
+    for key in range(999):
+        assert 100 + key * 0.02 <= wheel.next_deadline() <= 100 + key * 0.02 + 0.01
+        wheel.cancel(key)  # An in-order ACK releases the earliest timer
+        wheel.schedule(1000 + key, 200 + key * 0.02)
+    assert 119.98 <= wheel.next_deadline() <= 119.99
+    assert len(wheel.heap) <= 2 * len(wheel) + 65  # Stale entries do not pile up
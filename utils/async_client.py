@@ -0,0 +1,339 @@
+"""
+An asyncio client for the reliable UDP protocol, for programs that send from an event loop.
+
+    async with ReliableUDPClient("127.0.0.1", 5000) as client:
+        await client.send(b"hello")
+        await client.send_many([b"first", b"second", b"third"])
+
+The protocol is the one client.py speaks: messages get consecutive sequence numbers, and the
+server's cumulative ACKs release them. A datagram left unacknowledged for `timeout` seconds is
+retransmitted, three duplicate ACKs retransmit the oldest one at once, and new datagrams must
+fit in the receive window the server advertises. A closed window is probed with
+RESEND_ACK. When a datagram or a window probe goes unanswered MAX_ATTEMPTS times, the session
+fails: every waiting send raises DeliveryError, and so does every later one.
+
+Any number of tasks may wait in send() at once. Up to the congestion window of datagrams are
+unacknowledged, and the rest queue in order. send_many() coalesces its messages into BATCH
+datagrams and waits only for the last one, since the ACKs are cumulative. Each session has its
+own datagram endpoint, so one event loop can run many sessions. The server keeps a single
+session, though, so each session needs a server of its own. Leaving the `async with` block waits
+for the queued messages, then sends TERMINATE.
+
+Nothing is printed or logged, so the module can be imported into any program.
+"""
+import asyncio
+import collections
+
+from utils.congestion import CONGESTION_CONTROLS, FixedWindow
+from utils.protocol import DEFAULT_BATCH_BYTES, DEFAULT_MTU_BYTES, build_datagrams, parse_ack
+
+MAX_ATTEMPTS = 5  # Transmissions per datagram, or window probes, before the session fails
+DEFAULT_TIMEOUT = 0.5  # Seconds before an unacknowledged datagram is retransmitted
+DEFAULT_MAX_WINDOW = 64  # Datagrams in flight
+
+
+class DeliveryError(ConnectionError):
+    """The server stopped answering, or the session was closed, before a message was acknowledged."""
+
+
+class Unit:
+    """
+    A unit from build_datagrams: the datagrams that carry messages `first` to `last`, and the
+    future resolved once they are acknowledged (if anyone waits for them).
+    """
+
+    __slots__ = ("first", "last", "payloads", "future", "attempts", "sent_at", "timer")
+
+    def __init__(self, first, last, payloads, future=None):
+        self.first = first
+        self.last = last
+        self.payloads = payloads
+        self.future = future
+        self.attempts = 0
+        self.sent_at = None
+        self.timer = None  # Retransmission timer while in flight
+
+
+class SessionProtocol(asyncio.DatagramProtocol):
+    """Passes the datagrams of a session's endpoint to its client."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def datagram_received(self, data, addr):
+        self.client.receive(data)
+
+    def error_received(self, exc):
+        pass  # ICMP errors, such as a server that is not up yet: the retransmissions cover them
+
+    def connection_lost(self, exc):
+        self.client.fail(DeliveryError("The session's endpoint was closed"))
+
+
+class ReliableUDPClient:
+    """
+    A session with a server, sending from the running event loop.
+
+    Args:
+        server_ip (str): The server (or proxy) address.
+        server_port (int): Its port.
+        timeout (float): Seconds before an unacknowledged datagram is retransmitted, and between
+            window probes.
+        congestion_control (str, optional): One of utils.congestion.CONGESTION_CONTROLS; by default
+            the window is fixed at `max_window`.
+        max_window (int): Most datagrams in flight.
+        batch_bytes (int): Size limit of the BATCH datagrams send_many() builds; 0 sends one
+            message per datagram.
+        mtu (int): Largest datagram; longer messages are fragmented.
+        max_attempts (int): Transmissions of a datagram, or window probes, before the session fails.
+    """
+
+    def __init__(self, server_ip, server_port, timeout=DEFAULT_TIMEOUT, congestion_control=None,
+                 max_window=DEFAULT_MAX_WINDOW, batch_bytes=DEFAULT_BATCH_BYTES, mtu=DEFAULT_MTU_BYTES,
+                 max_attempts=MAX_ATTEMPTS):
+        self.server = (server_ip, server_port)
+        self.timeout = timeout
+        if congestion_control is not None:
+            self.congestion = CONGESTION_CONTROLS[congestion_control](max_window=max_window)
+        else:
+            self.congestion = FixedWindow(max_window=max_window)
+        self.batch_bytes = batch_bytes
+        self.mtu = mtu
+        self.max_attempts = max_attempts
+        self.loop = None
+        self.transport = None
+        self.next_sequence = 1
+        self.last_ack = 0
+        self.peer_window = None  # Receive window advertised by the server; unknown until its first ACK
+        self.in_flight = collections.deque()  # Units sent and not yet acknowledged, in sequence order
+        self.queued = collections.deque()  # Units waiting for the window
+        self.probe = None  # Window probe timer while the receive window is closed
+        self.probes = 0
+        self.timed_out = False  # A retransmission timeout was seen since the last new ACK
+        self.error = None  # Why the session failed, once it has
+        self.datagrams_sent = 0
+        self.retransmissions = 0
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.close(drain=exc_type is None)
+
+    async def connect(self):
+        """Open the session's datagram endpoint on the running loop."""
+        if self.transport is not None:
+            raise RuntimeError("The session is already connected")
+        self.loop = asyncio.get_running_loop()
+        self.transport, _ = await self.loop.create_datagram_endpoint(lambda: SessionProtocol(self),
+                                                                     remote_addr=self.server)
+
+    async def close(self, drain=True):
+        """
+        End the session: wait for the queued messages (unless `drain` is False), send TERMINATE
+        and close the endpoint. Sends still waiting then raise DeliveryError.
+        """
+        if self.transport is None:
+            return
+        try:
+            if drain and self.error is None:
+                await self.flush()
+        finally:
+            if self.error is None:
+                self.transport.sendto(b"TERMINATE")
+            self.fail(DeliveryError("The session was closed"))
+            self.transport.close()
+            self.transport = None
+
+    async def send(self, message):
+        """
+        Send a message and wait until the server acknowledges it.
+
+        Args:
+            message (bytes or str): The message; bytes must be UTF-8 text, which is what the server delivers.
+
+        Returns:
+            int: The message's sequence number.
+
+        Raises:
+            DeliveryError: If the session failed or was closed before the message was acknowledged.
+            ValueError: If the message is not UTF-8 text.
+        """
+        sequence_number = self.next_sequence
+        (first, last, payloads), = self.build([message], 0)
+        unit = Unit(first, last, payloads, self.loop.create_future())
+        self.queued.append(unit)
+        self.pump()
+        await unit.future
+        return sequence_number
+
+    async def send_many(self, messages):
+        """
+        Send messages, coalesced into BATCH datagrams of up to `batch_bytes`, and wait until the
+        server acknowledges all of them.
+
+        Returns:
+            range: The messages' sequence numbers.
+
+        Raises:
+            DeliveryError: If the session failed or was closed before the messages were acknowledged.
+            ValueError: If a message is not UTF-8 text.
+        """
+        first_sequence = self.next_sequence
+        units = [Unit(first, last, payloads) for first, last, payloads in self.build(messages, self.batch_bytes)]
+        if not units:
+            return range(first_sequence, first_sequence)
+        units[-1].future = self.loop.create_future()  # The ACKs are cumulative: the last one covers all
+        self.queued.extend(units)
+        self.pump()
+        await units[-1].future
+        return range(first_sequence, units[-1].last + 1)
+
+    async def flush(self):
+        """Wait until every message sent so far is acknowledged."""
+        pending = self.queued or self.in_flight
+        if self.error is not None:
+            raise self.error
+        if not pending:
+            return
+        unit = pending[-1]
+        if unit.future is None or unit.future.cancelled():
+            unit.future = self.loop.create_future()
+        await asyncio.shield(unit.future)
+
+    def build(self, messages, batch_bytes):
+        """Number the messages and turn them into units; raises if the session cannot send."""
+        if self.error is not None:
+            raise self.error
+        if self.transport is None:
+            raise RuntimeError("The session is not connected")
+        messages = list(messages)
+        for message in messages:
+            if not isinstance(message, str):
+                bytes(message).decode()  # The server decodes the datagrams as UTF-8
+        units = build_datagrams(messages, self.next_sequence, batch_bytes, self.mtu)
+        self.next_sequence += len(messages)
+        return units
+
+    def pump(self):
+        """Send queued units while both the congestion window and the receive window allow."""
+        window = self.congestion.window
+        while self.queued and len(self.in_flight) < window and self.within_window(self.queued[0]):
+            unit = self.queued.popleft()
+            self.in_flight.append(unit)
+            self.transmit(unit)
+        if self.queued and not self.in_flight and self.probe is None:
+            # Nothing in flight and nothing sendable: the receive window is closed
+            self.probe = self.loop.call_later(self.timeout, self.probe_window)
+
+    def within_window(self, unit):
+        """
+        Whether a unit fits in the receive window. A batch must end within it, or the server drops its
+        tail if it arrives out of order; with nothing in flight it arrives in order, so starting within
+        it is enough.
+        """
+        if self.peer_window is None:
+            return True
+        return (unit.last if self.in_flight else unit.first) <= self.last_ack + self.peer_window
+
+    def transmit(self, unit):
+        if unit.timer is not None:
+            unit.timer.cancel()
+        for payload in unit.payloads:
+            self.transport.sendto(payload)
+        self.datagrams_sent += len(unit.payloads)
+        unit.attempts += 1
+        if unit.attempts > 1:
+            self.retransmissions += 1
+        unit.sent_at = self.loop.time()
+        unit.timer = self.loop.call_at(unit.sent_at + self.timeout, self.expire, unit)
+
+    def expire(self, unit):
+        """
+        Retransmission timer: resend the unit, or fail the session after max_attempts. The timers
+        of a burst expire together, but they are one loss: the congestion controller reacts to the
+        first, and no other until a new ACK arrives. Units left outside the shrunken window keep
+        waiting, as in client.send_windowed.
+        """
+        unit.timer = None
+        if unit.attempts >= self.max_attempts:
+            self.fail(DeliveryError(f"No acknowledgment for SEQ {unit.first} after {self.max_attempts} attempts"))
+            return
+        if not self.timed_out:
+            self.timed_out = True
+            self.congestion.on_timeout()
+        if self.in_flight.index(unit) >= self.congestion.window:
+            unit.timer = self.loop.call_later(self.timeout, self.expire, unit)  # Resent once the window reopens
+            return
+        self.transmit(unit)
+
+    def probe_window(self):
+        """Probe timer: ask for the current ACK, whose window tells whether the window reopened."""
+        self.probe = None
+        if self.in_flight or not self.queued or self.error is not None:
+            return
+        if self.probes >= self.max_attempts:
+            self.fail(DeliveryError(f"No answer to {self.max_attempts} window probes"))
+            return
+        self.probes += 1
+        self.transport.sendto(f"RESEND_ACK:{self.last_ack}".encode())
+        self.probe = self.loop.call_later(self.timeout, self.probe_window)
+
+    def receive(self, data):
+        """Handle an ACK: release the units it covers, or count it as a duplicate."""
+        try:
+            ack, window = parse_ack(data)
+        except ValueError:
+            return
+        self.probes = 0  # The server is alive
+        # An ACK that only opens the window is a window update, not a duplicate ACK
+        window_update = window is not None and self.peer_window is not None and window > self.peer_window
+        if window is not None:
+            self.peer_window = window
+
+        if ack > self.last_ack:
+            acked, rtt = 0, None
+            while self.in_flight and self.in_flight[0].last <= ack:
+                unit = self.in_flight.popleft()
+                unit.timer.cancel()
+                # Karn's rule: only units sent once give an unambiguous RTT sample
+                rtt = self.loop.time() - unit.sent_at if unit.attempts == 1 else None
+                if unit.future is not None and not unit.future.done():
+                    unit.future.set_result(None)
+                acked += 1
+            self.last_ack = ack
+            self.timed_out = False
+            if acked:
+                self.congestion.on_ack(acked, rtt)
+        elif ack == self.last_ack and self.in_flight and not window_update:
+            if self.congestion.on_duplicate_ack():
+                self.transmit(self.in_flight[0])  # Fast retransmit
+        self.pump()
+
+    def fail(self, error):
+        """End the session with `error`: every waiting send raises it, and so does every later one."""
+        if self.error is not None:
+            return
+        self.error = error
+        if self.probe is not None:
+            self.probe.cancel()
+            self.probe = None
+        for unit in (*self.in_flight, *self.queued):
+            if unit.timer is not None:
+                unit.timer.cancel()
+            if unit.future is not None and not unit.future.done():
+                unit.future.set_exception(error)
+        self.in_flight.clear()
+        self.queued.clear()
+
+    def stats(self):
+        return {
+            "acknowledged": self.last_ack,
+            "in_flight": sum(unit.last - unit.first + 1 for unit in self.in_flight),
+            "queued": sum(unit.last - unit.first + 1 for unit in self.queued),
+            "datagrams_sent": self.datagrams_sent,
+            "retransmissions": self.retransmissions,
+            "window": self.congestion.window,
+            "peer_window": self.peer_window,
+        }
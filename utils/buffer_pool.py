@@ -0,0 +1,74 @@
+import threading
+
+MAX_DATAGRAM_BYTES = 65507  # Largest UDP payload over IPv4
+
+
+class BufferPool:
+    """
+    Pool of preallocated receive buffers for socket.recvfrom_into().
+
+    recvfrom() allocates a new bytes object for every datagram. Receiving into a pooled
+    bytearray instead means that, once the pool has grown to the number of buffers in use
+    at steady state, no more receive buffers are allocated. Buffers are handed out with
+    acquire() and must be given back with release() once the datagram has been sent or
+    processed. The pool is shared between threads (the proxy receives in one thread and
+    releases the buffers in its direction workers; its delay pool of MTU-sized buffers is
+    released by the thread that forwards delayed packets).
+    """
+
+    def __init__(self, buffer_size=MAX_DATAGRAM_BYTES, initial=16, max_free=256):
+        self.buffer_size = buffer_size
+        self.max_free = max_free
+        self.free = [bytearray(buffer_size) for _ in range(initial)]
+        self.lock = threading.Lock()
+        self.allocated = initial  # Buffers ever created
+        self.in_use = 0
+        self.high_water = 0  # Most buffers in use at the same time
+        self.acquired = 0  # Total acquire() calls
+        self.misses = 0  # acquire() calls that had to allocate a new buffer
+
+    def acquire(self):
+        with self.lock:
+            self.acquired += 1
+            self.in_use += 1
+            self.high_water = max(self.high_water, self.in_use)
+            if self.free:
+                return self.free.pop()
+            self.misses += 1
+            self.allocated += 1
+        return bytearray(self.buffer_size)
+
+    def release(self, buffer):
+        with self.lock:
+            self.in_use -= 1
+            if len(self.free) < self.max_free:
+                self.free.append(buffer)
+
+    def recvfrom(self, sock):
+        """
+        Receive one datagram into a pooled buffer.
+
+        Returns:
+            tuple[memoryview, tuple]: A view of the received bytes and the sender address. Give the
+            buffer back with release(view.obj) when done with the datagram.
+        """
+        buffer = self.acquire()
+        try:
+            nbytes, addr = sock.recvfrom_into(buffer)
+        except BaseException:
+            self.release(buffer)
+            raise
+        return memoryview(buffer)[:nbytes], addr
+
+    def stats(self):
+        """Return pool statistics as a dictionary."""
+        with self.lock:
+            return {
+                "buffer_size": self.buffer_size,
+                "allocated": self.allocated,
+                "free": len(self.free),
+                "in_use": self.in_use,
+                "high_water": self.high_water,
+                "acquired": self.acquired,
+                "misses": self.misses,
+            }
@@ -0,0 +1,142 @@
+from abc import ABC, abstractmethod
+
+DUPLICATE_ACK_THRESHOLD = 3  # Duplicate ACKs that signal a loss (fast retransmit)
+MIN_SSTHRESH = 2.0
+
+
+class CongestionControl(ABC):
+    """
+    Base congestion controller. Tracks a congestion window (in packets) for the windowed client.
+
+    Subclasses decide how the window grows on ACKs; loss reactions are shared: a timeout
+    collapses the window to one packet, three duplicate ACKs halve it (fast recovery).
+    """
+
+    name = "base"
+
+    def __init__(self, initial_window=1.0, max_window=64):
+        self.cwnd = float(initial_window)
+        self.ssthresh = float(max_window)
+        self.max_window = max_window
+        self.duplicate_acks = 0
+
+    @property
+    def window(self):
+        """Number of packets the sender may currently have in flight."""
+        return max(1, min(int(self.cwnd), self.max_window))
+
+    @property
+    def in_slow_start(self):
+        return self.cwnd < self.ssthresh
+
+    def on_ack(self, acked, rtt):
+        """
+        React to a cumulative ACK.
+
+        Args:
+            acked (int): Number of newly acknowledged packets.
+            rtt (float or None): RTT sample in seconds, or None if the ACK was for a retransmission.
+        """
+        self.duplicate_acks = 0
+        self.grow(acked, rtt)
+
+    @abstractmethod
+    def grow(self, acked, rtt):
+        """Open (or close) the window for `acked` newly acknowledged packets; see on_ack()."""
+
+    def on_duplicate_ack(self):
+        """
+        Count a duplicate ACK.
+
+        Returns:
+            bool: True if the threshold was just reached and the first unacknowledged packet
+            should be retransmitted.
+        """
+        self.duplicate_acks += 1
+        if self.duplicate_acks != DUPLICATE_ACK_THRESHOLD:
+            return False
+        self.ssthresh = max(self.cwnd / 2, MIN_SSTHRESH)
+        self.cwnd = self.ssthresh
+        return True
+
+    def on_timeout(self):
+        """React to a retransmission timeout."""
+        self.duplicate_acks = 0
+        self.ssthresh = max(self.cwnd / 2, MIN_SSTHRESH)
+        self.cwnd = 1.0
+
+
+class FixedWindow(CongestionControl):
+    """
+    Constant window of max_window packets (plain sliding window). With a window of one it
+    behaves like the stop-and-wait client, which makes it a baseline for the adaptive algorithms.
+    """
+
+    name = "fixed"
+
+    def __init__(self, initial_window=1.0, max_window=64):
+        super().__init__(max_window, max_window)
+
+    def grow(self, acked, rtt):
+        pass
+
+    def on_duplicate_ack(self):
+        self.duplicate_acks += 1
+        return self.duplicate_acks == DUPLICATE_ACK_THRESHOLD
+
+    def on_timeout(self):
+        self.duplicate_acks = 0
+
+
+class RenoControl(CongestionControl):
+    """Slow start followed by additive increase (one packet per RTT)."""
+
+    name = "reno"
+
+    def grow(self, acked, rtt):
+        for _ in range(acked):
+            if self.in_slow_start:
+                self.cwnd += 1
+            else:
+                self.cwnd += 1 / self.cwnd
+        self.cwnd = min(self.cwnd, self.max_window)
+
+
+class DelayBasedControl(CongestionControl):
+    """
+    Vegas-style controller that keeps a small number of packets queued in the path.
+
+    It compares the expected rate (cwnd / base RTT) with the actual rate (cwnd / RTT) and
+    backs off when queueing delay builds up, instead of waiting for the proxy to drop packets.
+    """
+
+    name = "delay"
+    alpha = 1.0  # Grow while fewer than alpha packets are queued
+    beta = 3.0  # Shrink once more than beta packets are queued
+
+    def __init__(self, initial_window=1.0, max_window=64):
+        super().__init__(initial_window, max_window)
+        self.base_rtt = None
+
+    def grow(self, acked, rtt):
+        if rtt is None:
+            return
+        self.base_rtt = rtt if self.base_rtt is None else min(self.base_rtt, rtt)
+        queued = self.cwnd * (rtt - self.base_rtt) / rtt
+        for _ in range(acked):
+            if self.in_slow_start and queued < self.alpha:
+                self.cwnd += 1
+            elif queued < self.alpha:
+                self.cwnd += 1 / self.cwnd
+            elif queued > self.beta:
+                self.cwnd = max(1.0, self.cwnd - 1 / self.cwnd)
+                self.ssthresh = min(self.ssthresh, self.cwnd)
+        self.cwnd = min(self.cwnd, self.max_window)
+
+
+# Available algorithms, selected on the client with --cc
+CONGESTION_CONTROLS = {
+    FixedWindow.name: FixedWindow,
+    RenoControl.name: RenoControl,
+    DelayBasedControl.name: DelayBasedControl,
+}
@@ -1,18 +1,171 @@
 import json
 import threading
 
+from utils.events import AGGREGATE, EVENTS, parse_address, publish_config, subscribe, unsubscribe
 from utils.logger import control_logger, log_control_event
+from utils.profiler import DEFAULT_SAMPLE_INTERVAL_MS, start_profiling, stop_profiling, take_memory_snapshot
+from utils.rules import add_rule, clear_rules, delete_rule, load_rules, rule_specs, rules_status
+from utils.schedule import schedule_status, start_schedule, stop_schedule
 from utils.validation import validate_delay_time, validate_chance
 
 # Initialize a threading lock
 control_lock = threading.Lock()
 
 
-def handle_control(control_socket, proxy_config):
+def handle_profile_command(arguments):
+    """
+    Handle 'PROFILE START [interval_ms]' and 'PROFILE STOP <file>'.
+    Returns the response text for the control client.
+    """
+    try:
+        if arguments and arguments[0] == "START" and len(arguments) <= 2:
+            interval_ms = float(arguments[1]) if len(arguments) == 2 else DEFAULT_SAMPLE_INTERVAL_MS
+            start_profiling(interval_ms)
+            return f"✅ Profiling started (sampling every {interval_ms} ms)"
+        if len(arguments) == 2 and arguments[0] == "STOP":
+            samples = stop_profiling(arguments[1])
+            return f"✅ Profiling stopped after {samples} samples, written to {arguments[1]}"
+    except (RuntimeError, ValueError, OSError) as e:
+        msg = f"❌ {e}"
+        control_logger.error(msg)
+        return msg
+    return "❌ Usage: PROFILE START [interval_ms] | PROFILE STOP <file>"
+
+
+def handle_memsnap_command(arguments):
+    """
+    Handle 'MEMSNAP <file>'.
+    Returns the response text for the control client.
+    """
+    if len(arguments) != 1:
+        return "❌ Usage: MEMSNAP <file>"
+    try:
+        top_stats = take_memory_snapshot(arguments[0])
+    except OSError as e:
+        msg = f"❌ {e}"
+        control_logger.error(msg)
+        return msg
+    if top_stats is None:
+        return "✅ tracemalloc started. Send MEMSNAP again to capture a snapshot."
+    return "\n".join([f"✅ Memory snapshot written to {arguments[0]}"] + top_stats)
+
+
+def handle_schedule_command(arguments, proxy_config, config_lock):
+    """
+    Handle 'SCHEDULE LOAD <file>', 'SCHEDULE STOP' and 'SCHEDULE STATUS'.
+    Returns the response text for the control client.
+    """
+    if len(arguments) == 2 and arguments[0] == "LOAD":
+        try:
+            runner = start_schedule(arguments[1], proxy_config, config_lock)
+        except (ValueError, OSError) as e:
+            msg = f"❌ Invalid schedule {arguments[1]}: {e}"
+            control_logger.error(msg)
+            return msg
+        looping = ", looping" if runner.schedule.loop else ""
+        return f"✅ Schedule {arguments[1]} started ({runner.schedule.duration:g} s{looping})"
+    if arguments == ["STOP"]:
+        return "✅ Schedule stopped" if stop_schedule() else "⚠️ No schedule running"
+    if arguments == ["STATUS"]:
+        return json.dumps(schedule_status(), indent=2)
+    return "❌ Usage: SCHEDULE LOAD <file> | SCHEDULE STOP | SCHEDULE STATUS"
+
+
+def handle_rules_command(arguments):
+    """
+    Handle 'RULES LOAD <file>', 'RULES ADD <json rule>', 'RULES DELETE <index>', 'RULES CLEAR' and
+    'RULES SHOW'. Every edit replaces the whole rule table at once, and is published to event
+    subscribers as a change of the "rules" parameter.
+    Returns the response text for the control client.
+    """
+    usage = "❌ Usage: RULES LOAD <file> | RULES ADD <json rule> | RULES DELETE <index> | RULES CLEAR | RULES SHOW"
+    action, _, argument = arguments.strip().partition(" ")
+    old_specs = rule_specs()
+    try:
+        if action == "LOAD" and argument:
+            table = load_rules(argument.strip())
+            publish_config("rules", old_specs, rule_specs(), "RULES")
+            return f"✅ Loaded {len(table.rules)} rule(s) from {argument.strip()}"
+        if action == "ADD" and argument:
+            table = add_rule(json.loads(argument))
+            publish_config("rules", old_specs, rule_specs(), "RULES")
+            return f"✅ Added rule {len(table.rules) - 1}"
+        if action == "DELETE" and argument:
+            table = delete_rule(int(argument))
+            publish_config("rules", old_specs, rule_specs(), "RULES")
+            return f"✅ Deleted rule {argument.strip()} ({len(table.rules)} left)"
+    except (ValueError, TypeError, IndexError, OSError) as e:  # json.JSONDecodeError is a ValueError
+        msg = f"❌ Rule table unchanged: {e}"
+        control_logger.error(msg)
+        return msg
+    if action == "CLEAR" and not argument:
+        removed = clear_rules()
+        publish_config("rules", old_specs, [], "RULES")
+        return f"✅ Cleared {removed} rule(s)"
+    if action == "SHOW" and not argument:
+        return json.dumps(rules_status(), indent=2)
+    return usage
+
+
+def handle_subscribe_command(arguments, addr):
+    """
+    Handle 'SUBSCRIBE EVENTS [sample_every] [ip:port]' and 'SUBSCRIBE AGGREGATE [interval_ms] [ip:port]'.
+    Events go to the address of the command unless one is given.
+    Returns the response text for the control client.
+    """
+    usage = "❌ Usage: SUBSCRIBE EVENTS [sample_every] [ip:port] | SUBSCRIBE AGGREGATE [interval_ms] [ip:port]"
+    if not 1 <= len(arguments) <= 3 or arguments[0] not in ("EVENTS", "AGGREGATE"):
+        return usage
+    mode = EVENTS if arguments[0] == "EVENTS" else AGGREGATE
+    address, number = addr, None
+    try:
+        for argument in arguments[1:]:
+            if ":" in argument:
+                address = parse_address(argument)
+            else:
+                number = float(argument)
+        if mode == EVENTS:
+            subscriber = subscribe(address, EVENTS, sample_every=int(number) if number is not None else 1)
+            detail = f"1 in {subscriber.sample_every} packet events"
+        else:
+            subscriber = subscribe(address, AGGREGATE, interval=number / 1000 if number is not None else 1.0)
+            detail = f"aggregates every {subscriber.interval * 1000:g} ms"
+    except (ValueError, OSError) as e:
+        msg = f"❌ {e}"
+        control_logger.error(msg)
+        return msg
+    return f"✅ Streaming {detail} to {address[0]}:{address[1]}"
+
+
+def handle_unsubscribe_command(arguments, addr):
+    """
+    Handle 'UNSUBSCRIBE [ip:port]' (the address of the command by default).
+    Returns the response text for the control client.
+    """
+    if len(arguments) > 1:
+        return "❌ Usage: UNSUBSCRIBE [ip:port]"
+    try:
+        address = parse_address(arguments[0]) if arguments else addr
+    except ValueError as e:
+        return f"❌ {e}"
+    if unsubscribe(address):
+        return f"✅ Stopped streaming to {address[0]}:{address[1]}"
+    return f"⚠️ {address[0]}:{address[1]} is not subscribed"
+
+
+def handle_control(control_socket, proxy_config, stats_provider=None, config_lock=None):
     """
     Control interface for dynamic parameter updates.
     Logs all updates using the control_logger.
+
+    Args:
+        control_socket (socket.socket): Bound UDP socket for control commands.
+        proxy_config (dict): Shared proxy configuration updated by SET.
+        stats_provider (callable, optional): Returns a dict of runtime statistics for STATS.
+        config_lock (threading.Lock, optional): Lock the data path holds while reading proxy_config.
+            Defaults to the controller's own lock.
     """
+    config_lock = config_lock or control_lock
     print(f"🔧 Control interface active. Use the control port to dynamically update parameters.\n")
     while True:
         try:
@@ -27,7 +180,7 @@ def handle_control(control_socket, proxy_config):
                 responses = []
 
                 print(f"🔒 Acquiring lock for configuration update...")
-                with control_lock:  # Lock during updates
+                with config_lock:  # Lock during updates
                     print(f"🔑 Lock acquired.")
                     for change in changes:
                         if "=" not in change:
@@ -44,6 +197,7 @@ def handle_control(control_socket, proxy_config):
                                 proxy_config[param] = new_value
                                 responses.append(f"✅ Updated {param} from {old_value} to {new_value}")
                                 log_control_event(control_logger, param, old_value, new_value)
+                                publish_config(param, old_value, new_value, "SET")
                             except ValueError as e:
                                 msg = f"❌ {e}"
                                 responses.append(msg)
@@ -55,6 +209,7 @@ def handle_control(control_socket, proxy_config):
                                 proxy_config[param] = new_value
                                 responses.append(f"✅ Updated {param} from {old_value} to {new_value}")
                                 log_control_event(control_logger, param, old_value, new_value)
+                                publish_config(param, old_value, new_value, "SET")
                             except ValueError as e:
                                 msg = f"❌ {e}"
                                 responses.append(msg)
@@ -77,6 +232,49 @@ def handle_control(control_socket, proxy_config):
                 control_logger.info(f"Sent current configuration to {addr}")
                 control_socket.sendto(response.encode(), addr)
 
+            elif command.startswith("STATS"):
+                stats = stats_provider() if stats_provider is not None else {}
+                response = json.dumps(stats, indent=2)
+                print(f"📤 Sent runtime statistics: {response}")
+                control_logger.info(f"Sent runtime statistics to {addr}")
+                control_socket.sendto(response.encode(), addr)
+
+            elif command.startswith("PROFILE"):
+                response = handle_profile_command(command.split()[1:])
+                print(f"🔬 {response}")
+                control_logger.info(f"Profile command from {addr}: {response}")
+                control_socket.sendto(response.encode(), addr)
+
+            elif command.startswith("SCHEDULE"):
+                response = handle_schedule_command(command.split()[1:], proxy_config, config_lock)
+                print(f"📅 {response}")
+                control_logger.info(f"Schedule command from {addr}: {response}")
+                control_socket.sendto(response.encode(), addr)
+
+            elif command.startswith("RULES"):
+                response = handle_rules_command(command[len("RULES"):])
+                print(f"🎯 {response}")
+                control_logger.info(f"Rules command from {addr}: {response}")
+                control_socket.sendto(response.encode(), addr)
+
+            elif command.startswith("SUBSCRIBE"):
+                response = handle_subscribe_command(command.split()[1:], addr)
+                print(f"📡 {response}")
+                control_logger.info(f"Subscribe command from {addr}: {response}")
+                control_socket.sendto(response.encode(), addr)
+
+            elif command.startswith("UNSUBSCRIBE"):
+                response = handle_unsubscribe_command(command.split()[1:], addr)
+                print(f"📡 {response}")
+                control_logger.info(f"Unsubscribe command from {addr}: {response}")
+                control_socket.sendto(response.encode(), addr)
+
+            elif command.startswith("MEMSNAP"):
+                response = handle_memsnap_command(command.split()[1:])
+                print(f"🔬 {response}")
+                control_logger.info(f"Memory snapshot command from {addr}: {response}")
+                control_socket.sendto(response.encode(), addr)
+
             else:
                 response = "❌ Unknown command"
                 print(f"⚠️ {response}")
@@ -0,0 +1,185 @@
+"""
+Consumers of the server's in-order message stream.
+
+udp_server hands every message it delivers in order to a sink with
+
+    sink.deliver(sequence_number, message, sender)
+
+and limits the receive window it advertises in its ACKs to sink.free_capacity(), the messages
+the sink can still queue. When the consumer falls behind, the window closes and the client
+stops sending until the server's window update (or the client's probe) reports free capacity
+again. Messages already accepted are never dropped: a sink's queue is only bounded by the
+client's window, and `max_pending` is the backlog at which it starts pushing back. A sink that
+can no longer deliver raises SinkError from deliver() and free_capacity(), which stops the server.
+"""
+import threading
+import time
+from collections import deque
+
+DEFAULT_MAX_PENDING = 10000  # Queued messages at which a sink closes the receive window
+FLUSH_INTERVAL = 0.5  # Seconds before a partial batch is written anyway
+WRITE_BATCH_BYTES = 1024 * 1024
+
+
+class SinkError(Exception):
+    """A sink can no longer deliver messages; the OSError that stopped it is the cause."""
+
+
+class CallbackSink:
+    """Calls `callback(sequence_number, message, sender)` in the server thread. Never limits the window."""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.delivered = 0
+
+    def deliver(self, sequence_number, message, sender):
+        self.delivered += 1
+        self.callback(sequence_number, message, sender)
+
+    def free_capacity(self):
+        return None  # Unlimited: the callback has consumed each message when it returns
+
+    def close(self):
+        pass
+
+
+class QueueSink:
+    """
+    Hands messages to another thread, which iterates over the sink:
+
+        sink = QueueSink()
+        threading.Thread(target=udp_server, args=(ip, port), kwargs={"sink": sink}, daemon=True).start()
+        for sequence_number, message, sender in sink:
+            ...
+
+    Iteration ends once the sink is closed and drained. The receive window closes once
+    `max_pending` messages wait to be taken.
+    """
+
+    def __init__(self, max_pending=DEFAULT_MAX_PENDING):
+        self.max_pending = max_pending
+        self.messages = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.delivered = 0
+
+    def deliver(self, sequence_number, message, sender):
+        with self.condition:
+            self.messages.append((sequence_number, message, sender))
+            self.delivered += 1
+            self.condition.notify()
+
+    def free_capacity(self):
+        return max(self.max_pending - len(self.messages), 0)
+
+    def get(self, timeout=None):
+        """
+        Take the next message, waiting up to `timeout` seconds (forever if None).
+
+        Returns:
+            tuple or None: (sequence number, message, sender), or None on timeout or once the
+            sink is closed and empty.
+        """
+        with self.condition:
+            if not self.messages and not self.closed:
+                self.condition.wait(timeout)
+            return self.messages.popleft() if self.messages else None
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            if item is None:
+                if self.closed:
+                    return
+                continue
+            yield item
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class BufferedFileSink:
+    """
+    Writes messages, one per line, to a file or a named pipe in large batches.
+
+    deliver() only queues the message; a background thread encodes the queued messages and
+    writes them once WRITE_BATCH_BYTES have accumulated or FLUSH_INTERVAL has passed. A slow
+    disk or a reader that does not keep up with the pipe lets the queue grow to `max_pending`,
+    which closes the receive window. If a write fails (a full disk, or a pipe whose reader went
+    away), the writer stops and deliver(), free_capacity() and close() raise SinkError.
+    """
+
+    def __init__(self, path, max_pending=DEFAULT_MAX_PENDING, batch_bytes=WRITE_BATCH_BYTES):
+        self.path = path
+        self.max_pending = max_pending
+        self.batch_bytes = batch_bytes
+        self.file = open(path, "wb", buffering=0)  # Writes are already batched; opening a FIFO waits for its reader
+        self.pending = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.delivered = 0
+        self.bytes_written = 0
+        self.writes = 0
+        self.error = None  # OSError that stopped the writer thread
+        self.thread = threading.Thread(target=self.run, name="delivery-writer", daemon=True)
+        self.thread.start()
+
+    def deliver(self, sequence_number, message, sender):
+        self.check()
+        with self.condition:
+            self.pending.append(message)
+            self.delivered += 1
+            if len(self.pending) == 1:
+                self.condition.notify()
+
+    def free_capacity(self):
+        self.check()  # A failed writer never drains the queue: fail the session rather than keep the window closed
+        return max(self.max_pending - len(self.pending), 0)
+
+    def check(self):
+        """Raise SinkError if the writer thread has failed."""
+        if self.error is not None:
+            raise SinkError(f"Writing to {self.path} failed: {self.error}") from self.error
+
+    def run(self):
+        batch = bytearray()
+        last_write = time.monotonic()
+        while True:
+            with self.condition:
+                if not self.pending and not self.closed:
+                    self.condition.wait(FLUSH_INTERVAL)
+                messages, self.pending = self.pending, deque()
+                closed = self.closed
+            for message in messages:
+                batch += message.encode("utf-8", "replace") if isinstance(message, str) else message
+                batch += b"\n"
+            now = time.monotonic()
+            if batch and (len(batch) >= self.batch_bytes or now - last_write >= FLUSH_INTERVAL or closed):
+                try:
+                    self.file.write(batch)
+                except OSError as e:
+                    self.error = e
+                    return
+                self.bytes_written += len(batch)
+                self.writes += 1
+                batch.clear()
+                last_write = now
+            if closed and not self.pending:
+                break
+
+    def close(self):
+        """Write everything still queued and close the file. Raises SinkError if a write failed."""
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+        self.file.close()
+        self.check()
+
+    def stats(self):
+        return {"delivered": self.delivered, "pending": len(self.pending), "bytes_written": self.bytes_written,
+                "writes": self.writes}
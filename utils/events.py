@@ -0,0 +1,275 @@
+"""
+Live event streams for external observers of the proxy.
+
+A subscriber registers an address with the SUBSCRIBE control command and receives the proxy's
+events there as JSON objects, one per line, several to a datagram of at most DEFAULT_MTU_BYTES:
+
+    {"time": 1760000000.123456, "event": "drop", "direction": "client-to-server", "seq": 12,
+     "src": "127.0.0.1:40000", "dst": "127.0.0.1:5000", "rule": null}
+
+Packet events are "forward", "drop" and "delay" (which also has "delay_ms"). A subscriber either
+gets them sampled, one of every `sample_every`, or gets an "aggregate" object per interval that
+counts them per direction. Every subscriber gets the "config" events of parameter changes, from
+SET or a schedule, and of rule table edits (the "rules" parameter, from RULES).
+
+Publishing only queues the event. A sender thread batches the queued events into datagrams every
+FLUSH_INTERVAL seconds, from a non-blocking socket connected to the subscriber. A subscriber
+that lets MAX_PENDING_EVENTS pile up, fills the socket's send buffer, or whose address refuses
+the datagrams is cut off, with a final "cutoff" event. Subscriptions replace the subscriber
+tuple as a whole, like rule edits, so with nobody subscribed publishing costs one check.
+"""
+import ipaddress
+import json
+import socket
+import threading
+import time
+
+from utils.logger import control_logger
+from utils.protocol import DEFAULT_MTU_BYTES
+
+PACKET_EVENTS = ("forward", "drop", "delay")
+EVENTS, AGGREGATE = "events", "aggregate"
+DIRECTIONS = ("client-to-server", "server-to-client")
+FLUSH_INTERVAL = 0.1  # Seconds between batches
+MAX_PENDING_EVENTS = 10000  # Events queued for a subscriber before it is cut off
+DEFAULT_AGGREGATE_INTERVAL = 1.0  # Seconds
+
+
+def format_address(address):
+    return f"{address[0]}:{address[1]}"
+
+
+def parse_address(text):
+    """Parse an 'ip:port' subscriber address. Raises ValueError if it is invalid."""
+    host, _, port = text.rpartition(":")
+    port = int(port)
+    if not 0 < port <= 65535:
+        raise ValueError(f"Port must be within 1-65535. Got: {port}")
+    return str(ipaddress.IPv4Address(host)), port
+
+
+def encode_batches(objects, limit=DEFAULT_MTU_BYTES):
+    """Pack objects as JSON lines into datagrams of at most `limit` bytes (one object may exceed it alone)."""
+    batches, batch = [], b""
+    for obj in objects:
+        line = json.dumps(obj, separators=(",", ":")).encode()
+        if batch and len(batch) + 1 + len(line) > limit:
+            batches.append(batch)
+            batch = b""
+        batch = batch + b"\n" + line if batch else line
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class Subscriber:
+    """
+    One registered address and the events waiting to be sent to it.
+
+    Args:
+        address (tuple[str, int]): Where the events are sent.
+        mode (str): EVENTS for sampled packet events, AGGREGATE for per-interval counts.
+        sample_every (int): In EVENTS mode, send one of every this many packet events.
+        interval (float): In AGGREGATE mode, seconds covered by each aggregate.
+    """
+
+    def __init__(self, address, mode=EVENTS, sample_every=1, interval=DEFAULT_AGGREGATE_INTERVAL):
+        self.address = address
+        self.mode = mode
+        self.sample_every = sample_every
+        self.interval = interval
+        self.lock = threading.Lock()  # Both proxy workers and the controller publish
+        self.pending = []
+        self.overflowed = False  # MAX_PENDING_EVENTS were waiting, so events were lost
+        self.seen = 0
+        self.counts = {direction: dict.fromkeys(PACKET_EVENTS, 0) for direction in DIRECTIONS}
+        self.interval_start = time.monotonic()
+        self.sent_events = 0
+        self.sent_datagrams = 0
+        self.cutoff = None  # Why the subscriber was cut off, once it is
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.socket.connect(address)  # So a closed port is reported back as ConnectionRefusedError
+
+    def offer(self, record):
+        """Queue a packet event (time, event, direction, source, destination, seq, rule, delay_ms)."""
+        with self.lock:
+            if self.mode == AGGREGATE:
+                self.counts[record[2]][record[1]] += 1
+                return
+            self.seen += 1
+            if self.seen % self.sample_every == 0:
+                self.queue(record)
+
+    def offer_config(self, obj):
+        with self.lock:
+            self.queue(obj)
+
+    def queue(self, item):
+        if len(self.pending) >= MAX_PENDING_EVENTS:
+            self.overflowed = True
+        else:
+            self.pending.append(item)
+
+    def take(self, now):
+        """
+        The events due for sending, as JSON-ready objects (the aggregate too once its interval is
+        over), and whether the subscriber overflowed since the last call.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, []
+            aggregate = None
+            if self.mode == AGGREGATE and now - self.interval_start >= self.interval:
+                aggregate = {"time": time.time(), "event": "aggregate",
+                             "interval": round(now - self.interval_start, 3), "counts": self.counts}
+                self.counts = {direction: dict.fromkeys(PACKET_EVENTS, 0) for direction in DIRECTIONS}
+                self.interval_start = now
+        objects = [item if isinstance(item, dict) else packet_object(item) for item in pending]
+        if aggregate is not None:
+            objects.append(aggregate)
+        return objects, self.overflowed
+
+    def send(self, objects):
+        """Send the objects in batches. Raises OSError (BlockingIOError once the send buffer is full)."""
+        for datagram in encode_batches(objects):
+            self.socket.send(datagram)
+            self.sent_datagrams += 1
+        self.sent_events += len(objects)
+
+    def close(self, reason):
+        self.cutoff = reason
+        try:
+            self.socket.send(json.dumps({"time": time.time(), "event": "cutoff", "reason": reason}).encode())
+        except OSError:
+            pass
+        self.socket.close()
+
+    def status(self):
+        return {
+            "address": format_address(self.address),
+            "mode": self.mode,
+            "sample_every": self.sample_every if self.mode == EVENTS else None,
+            "interval": self.interval if self.mode == AGGREGATE else None,
+            "sent_events": self.sent_events,
+            "sent_datagrams": self.sent_datagrams,
+        }
+
+
+def packet_object(record):
+    event_time, event, direction, source, destination, seq_number, rule, delay_ms = record
+    obj = {"time": event_time, "event": event, "direction": direction, "seq": seq_number,
+           "src": format_address(source), "dst": format_address(destination), "rule": rule}
+    if delay_ms is not None:
+        obj["delay_ms"] = delay_ms
+    return obj
+
+
+# The subscribers; replaced as a whole, so publishers read it without a lock
+subscribers = ()
+# Serializes subscription changes and starts the sender thread once
+subscribers_lock = threading.Lock()
+sender_thread = None
+
+
+def subscribe(address, mode=EVENTS, sample_every=1, interval=DEFAULT_AGGREGATE_INTERVAL):
+    """
+    Start streaming events to `address`, replacing its previous subscription if it had one.
+
+    Returns:
+        Subscriber: The new subscription.
+
+    Raises:
+        ValueError: If the mode, sample rate or interval is invalid.
+        OSError: If no socket can be connected to the address.
+    """
+    global subscribers, sender_thread
+    if mode not in (EVENTS, AGGREGATE):
+        raise ValueError(f"Mode must be {EVENTS} or {AGGREGATE}. Got: {mode}")
+    if sample_every < 1 or not interval > 0:
+        raise ValueError("The sample rate must be at least 1 and the interval positive")
+    subscriber = Subscriber(address, mode, sample_every, interval)
+    with subscribers_lock:
+        replaced = [existing for existing in subscribers if existing.address == address]
+        subscribers = tuple(existing for existing in subscribers if existing.address != address) + (subscriber,)
+        if sender_thread is None:
+            sender_thread = threading.Thread(target=send_events, name="event-sender", daemon=True)
+            sender_thread.start()
+    for existing in replaced:
+        existing.close("resubscribed")
+    return subscriber
+
+
+def remove_subscribers(condition, reason):
+    """Remove and close the subscribers for which `condition` holds. Returns how many there were."""
+    global subscribers
+    with subscribers_lock:
+        removed = [existing for existing in subscribers if condition(existing)]
+        subscribers = tuple(existing for existing in subscribers if not condition(existing))
+    for subscriber in removed:
+        subscriber.close(reason)
+    return len(removed)
+
+
+def unsubscribe(address):
+    """Stop streaming to `address`. Returns False if it was not subscribed."""
+    return remove_subscribers(lambda subscriber: subscriber.address == address, "unsubscribed") > 0
+
+
+def publish_packet(event, direction, source, destination, seq_number, rule=None, delay_ms=None):
+    """
+    Publish a packet event (one of PACKET_EVENTS) to the subscribers.
+
+    Args:
+        rule (utils.rules.Rule, optional): The per-flow rule that applied to the packet.
+        delay_ms (float, optional): For "delay" events, how long the packet is held.
+    """
+    if not subscribers:
+        return
+    record = (time.time(), event, direction, source, destination, seq_number,
+              rule.index if rule is not None else None, delay_ms)
+    for subscriber in subscribers:
+        subscriber.offer(record)
+
+
+def publish_config(param, old_value, new_value, origin):
+    """Publish a parameter change, made by `origin` ("SET", "SCHEDULE" or "RULES"), to every subscriber."""
+    if not subscribers:
+        return
+    obj = {"time": time.time(), "event": "config", "param": param, "old": old_value, "new": new_value,
+           "origin": origin}
+    for subscriber in subscribers:
+        subscriber.offer_config(obj)
+
+
+def flush_events(now=None):
+    """Send every subscriber its due events, cutting off those that fell behind or went away."""
+    now = time.monotonic() if now is None else now
+    for subscriber in subscribers:
+        if subscriber.cutoff is not None:
+            continue  # Replaced or unsubscribed since the loop started
+        objects, behind = subscriber.take(now)
+        reason = f"fell behind ({MAX_PENDING_EVENTS} events waiting)" if behind else None
+        if reason is None:
+            try:
+                subscriber.send(objects)
+            except BlockingIOError:
+                reason = "fell behind (send buffer full)"
+            except OSError as e:
+                reason = f"unreachable ({e})"
+        if reason is not None and subscriber.cutoff is None:
+            message = f"✂️ Cut off event subscriber {format_address(subscriber.address)}: {reason}"
+            print(message)
+            control_logger.warning(message)
+            remove_subscribers(lambda existing: existing is subscriber, reason)
+
+
+def send_events():
+    """Sender thread: flush the subscribers' events every FLUSH_INTERVAL seconds."""
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        flush_events()
+
+
+def events_status():
+    """The subscribers and what they have been sent, as a list of dictionaries."""
+    return [subscriber.status() for subscriber in subscribers]
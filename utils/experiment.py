@@ -0,0 +1,121 @@
+"""
+Parameter grids for the experiment runner.
+
+A grid is a JSON object mapping parameters to the list of values to try; every combination
+becomes one run, and parameters left out keep their defaults:
+
+    {
+      "client-drop": [0.0, 0.1, 0.3],
+      "client-delay": [0.5],
+      "client-delay-time": ["100-500"],
+      "max-window": [1, 8, 32],
+      "cc": ["fixed"],
+      "payload-bytes": [16, 4000]
+    }
+"""
+import itertools
+import json
+import os
+
+from utils.congestion import CONGESTION_CONTROLS
+from utils.log_index import COMPONENTS, log_segments, parse_line
+from utils.schedule import CHANCE_PARAMS, DELAY_TIME_PARAMS, parse_value
+
+# Defaults of every run parameter; proxy parameters use the proxy's own names
+GRID_DEFAULTS = {
+    "client-drop": 0.0,
+    "server-drop": 0.0,
+    "client-delay": 0.0,
+    "server-delay": 0.0,
+    "client-delay-time": (0, 0),
+    "server-delay-time": (0, 0),
+    "cc": None,  # Stop-and-wait
+    "max-window": 64,
+    "timeout": 2000,  # Client acknowledgment timeout in milliseconds
+    "rounds": 5,  # Messages typed into the client
+    "auto-send": 4,
+    "payload-bytes": 16,  # Length of each typed message
+}
+COUNT_PARAMS = {"max-window": 1, "timeout": 1, "rounds": 1, "auto-send": 0, "payload-bytes": 1}  # Minimum values
+PORTS_PER_RUN = 3  # Server, proxy and proxy control
+
+
+def parse_grid_value(param, value):
+    """
+    Validate one grid value.
+
+    Raises:
+        ValueError: If the parameter is unknown or the value is invalid.
+    """
+    if param in CHANCE_PARAMS or param in DELAY_TIME_PARAMS:
+        return parse_value(param, value)
+    if param == "cc":
+        if value is not None and value not in CONGESTION_CONTROLS:
+            raise ValueError(f"cc must be one of {sorted(CONGESTION_CONTROLS)} or null. Got: {value}")
+        return value
+    if param in COUNT_PARAMS:
+        if not isinstance(value, int) or isinstance(value, bool) or value < COUNT_PARAMS[param]:
+            raise ValueError(f"{param} must be an integer of at least {COUNT_PARAMS[param]}. Got: {value}")
+        return int(value)
+    raise ValueError(f"Invalid parameter: {param}")
+
+
+def expand_grid(grid):
+    """
+    Validate a grid and list its combinations.
+
+    Returns:
+        list[dict]: One complete parameter set (GRID_DEFAULTS overridden) per combination.
+    """
+    axes = []
+    for param, values in grid.items():
+        if not isinstance(values, list):
+            values = [values]
+        if not values:
+            raise ValueError(f"{param} has no values")
+        axes.append([(param, parse_grid_value(param, value)) for value in values])
+    return [dict(GRID_DEFAULTS, **dict(combination)) for combination in itertools.product(*axes)]
+
+
+def load_grid(path):
+    """Load and expand a grid file (see the module docstring)."""
+    with open(path) as grid_file:
+        grid = json.load(grid_file)
+    if not isinstance(grid, dict):
+        raise ValueError("A grid must be a JSON object of parameter: [values]")
+    return expand_grid(grid)
+
+
+def allocate_ports(index, base_port):
+    """
+    Ports of run `index`: consecutive blocks from `base_port`, so concurrent runs never share one.
+
+    Returns:
+        tuple[int, int, int]: Server, proxy and proxy control ports.
+    """
+    first = base_port + index * PORTS_PER_RUN
+    if first + PORTS_PER_RUN - 1 > 65535:
+        raise ValueError(f"Run {index} needs ports beyond 65535; lower the base port or the number of runs")
+    return first, first + 1, first + 2
+
+
+def count_log_events(run_dir):
+    """
+    Count the events in a run's structured logs (including rotated segments).
+
+    Returns:
+        dict[str, dict[str, int]]: Event counts per component.
+    """
+    counts = {}
+    for component in COMPONENTS:
+        events = counts[component] = {}
+        for path in log_segments(run_dir, component):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8", errors="replace") as log_file:
+                for line in log_file:
+                    parsed = parse_line(line)
+                    if parsed is not None:
+                        events[parsed[1]] = events.get(parsed[1], 0) + 1
+    return counts
+
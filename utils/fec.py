@@ -0,0 +1,192 @@
+"""
+Forward error correction: XOR parity over blocks of data datagrams.
+
+The windowed client follows every block of up to K consecutive single-message datagrams
+('<seq>:<message>' or '<seq>z:<data>') with one parity datagram
+
+    FEC:<first_seq>:<len1>,<len2>,...:<parity>
+
+where the parity is the XOR of the block's datagrams, each zero-padded to the longest. The
+server keeps the datagrams it received recently; once all but one datagram of a block are in,
+XOR-ing them into the parity rebuilds the missing one, which is handled as if it had arrived,
+without waiting out a retransmission timeout. A block that lost two or more datagrams falls
+back to retransmission (its parity is kept in case a retransmission brings the block back to
+one missing datagram).
+
+The overhead is one parity datagram per K data datagrams. K is either fixed or adapted to the
+losses the client observes: it is halved whenever a datagram still needs a retransmission, and
+grows by one after each block's worth of datagrams gets through without one.
+"""
+from collections import OrderedDict
+
+from utils.protocol import split_header
+
+FEC_PREFIX = b"FEC:"
+MIN_BLOCK_SIZE = 1  # One data datagram per parity datagram: every datagram is sent twice
+MAX_BLOCK_SIZE = 32
+INITIAL_BLOCK_SIZE = 8  # Starting point of the adaptive block size
+FEC_HISTORY = 1024  # Received datagrams the server keeps to rebuild a missing one
+MAX_PENDING_BLOCKS = 64  # Parity of blocks still missing two or more datagrams
+
+
+def xor_datagrams(datagrams, length):
+    """XOR datagrams together, each zero-padded to `length` bytes."""
+    parity = 0
+    for datagram in datagrams:
+        parity ^= int.from_bytes(datagram, "little")
+    return parity.to_bytes(length, "little")
+
+
+def encode_parity(first_sequence, datagrams):
+    """
+    Build the parity datagram of a block.
+
+    Args:
+        first_sequence (int): Sequence number of the block's first datagram.
+        datagrams (list[bytes]): The block's datagrams, in sequence order.
+
+    Returns:
+        bytes: The framed FEC datagram.
+    """
+    lengths = ",".join(str(len(datagram)) for datagram in datagrams)
+    parity = xor_datagrams(datagrams, max(map(len, datagrams)))
+    return b"%s%d:%s:%s" % (FEC_PREFIX, first_sequence, lengths.encode(), parity)
+
+
+def parse_parity(data):
+    """
+    Unpack a FEC datagram.
+
+    Returns:
+        tuple[int, list[int], bytes]: The first sequence number, the length of each datagram of
+        the block and the parity.
+
+    Raises:
+        ValueError: If the header is malformed or the parity is shorter than the longest datagram.
+    """
+    (_, first_sequence, lengths), parity = split_header(data, 3)
+    lengths = [int(length) for length in lengths.split(b",")]
+    if min(lengths) < 0 or max(lengths) != len(parity):
+        raise ValueError("FEC lengths do not match the parity")
+    return int(first_sequence), lengths, bytes(parity)
+
+
+class FecEncoder:
+    """
+    Client side: collects sent datagrams into blocks and produces their parity datagrams.
+
+    Args:
+        block_size (int, optional): Data datagrams per parity datagram; adapted to the observed
+            losses if None.
+    """
+
+    def __init__(self, block_size=None):
+        self.adaptive = block_size is None
+        self.block_size = INITIAL_BLOCK_SIZE if block_size is None else block_size
+        self.block = []  # (sequence number, datagram) of the current block
+        self.clean = 0  # Datagrams acknowledged without a retransmission since the block size last changed
+        self.parity_sent = 0
+        self.last_block = None  # (first, last) sequence numbers of the block whose parity was sent last
+
+    def add(self, sequence_number, datagram):
+        """
+        Add a datagram sent for the first time.
+
+        Returns:
+            bytes or None: The parity datagram to send, if the block is now complete.
+        """
+        if self.block and sequence_number != self.block[-1][0] + 1:
+            self.discard()
+        self.block.append((sequence_number, bytes(datagram)))
+        if len(self.block) >= self.block_size:
+            return self.flush()
+        return None
+
+    def flush(self):
+        """
+        Close the current block early, e.g. after the last datagram of a burst.
+
+        Returns:
+            bytes or None: The parity datagram of the partial block, or None if it is empty.
+        """
+        if not self.block:
+            return None
+        parity = encode_parity(self.block[0][0], [datagram for _, datagram in self.block])
+        self.last_block = (self.block[0][0], self.block[-1][0])
+        self.block = []
+        self.parity_sent += 1
+        return parity
+
+    def discard(self):
+        """Drop the current block without parity (its datagrams were abandoned)."""
+        self.block = []
+
+    def observe(self, retransmitted):
+        """Adapt the block size to whether an acknowledged datagram needed a retransmission."""
+        if not self.adaptive:
+            return
+        if retransmitted:
+            self.block_size = max(MIN_BLOCK_SIZE, self.block_size // 2)
+            self.clean = 0
+            return
+        self.clean += 1
+        if self.clean >= self.block_size:
+            self.block_size = min(MAX_BLOCK_SIZE, self.block_size + 1)
+            self.clean = 0
+
+
+class FecDecoder:
+    """Server side: remembers received datagrams and rebuilds single losses from parity."""
+
+    def __init__(self, history=FEC_HISTORY):
+        self.history = history
+        self.received = OrderedDict()  # Maps sequence numbers to received datagrams, oldest first
+        self.pending = OrderedDict()  # Maps first sequence numbers to (lengths, parity) of incomplete blocks
+        self.recovered = 0
+
+    def record(self, sequence_number, datagram):
+        """
+        Remember a received single-message datagram.
+
+        Returns:
+            list[tuple[int, bytes]]: Datagrams rebuilt because this one completed a pending block.
+        """
+        self.received[sequence_number] = bytes(datagram)
+        self.received.move_to_end(sequence_number)
+        if len(self.received) > self.history:
+            self.received.popitem(last=False)
+        for first_sequence, (lengths, parity) in list(self.pending.items()):
+            if first_sequence <= sequence_number < first_sequence + len(lengths):
+                return self.recover(first_sequence, lengths, parity)
+        return []
+
+    def add_parity(self, data):
+        """
+        Handle a FEC datagram.
+
+        Returns:
+            list[tuple[int, bytes]]: The rebuilt (sequence number, datagram), if exactly one
+            datagram of the block was missing.
+
+        Raises:
+            ValueError: If the datagram is malformed.
+        """
+        return self.recover(*parse_parity(data))
+
+    def recover(self, first_sequence, lengths, parity):
+        sequences = range(first_sequence, first_sequence + len(lengths))
+        missing = [sequence for sequence in sequences if sequence not in self.received]
+        if len(missing) != 1:
+            self.pending.pop(first_sequence, None)
+            if missing:  # Wait for a retransmission to leave only one datagram missing
+                self.pending[first_sequence] = (lengths, parity)
+                if len(self.pending) > MAX_PENDING_BLOCKS:
+                    self.pending.popitem(last=False)
+            return []
+        self.pending.pop(first_sequence, None)
+        lost = missing[0]
+        others = (self.received[sequence] for sequence in sequences if sequence != lost)
+        datagram = xor_datagrams([parity, *others], len(parity))[:lengths[lost - first_sequence]]
+        self.received[lost] = datagram
+        self.recovered += 1
+        return [(lost, datagram)]
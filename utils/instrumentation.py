@@ -0,0 +1,143 @@
+"""
+Client instrumentation: per-packet events in the client log and a summary of the session.
+
+Every transmission, retransmission, acknowledgment and failure is logged with log_event in the
+schema the client plots expect ('Sent', 'Retransmit', 'Acknowledged' and 'Failed', with the
+latency of acknowledged packets in milliseconds). While recording, the client logger writes
+from a background thread, so logging never blocks sending.
+
+Times come from time.perf_counter_ns(). A packet's latency runs from its first transmission to
+its acknowledgment; only packets acknowledged after a single transmission give RTT samples
+(Karn's rule), since the ACK of a retransmitted packet may answer either copy. Goodput counts
+the acknowledged message bytes over the time the client had packets in flight, so the pauses
+between typed messages do not count.
+"""
+import time
+from array import array
+
+from utils.logger import client_logger, log_event, start_background_logging, stop_background_logging
+
+RTT_PERCENTILES = (0.5, 0.9, 0.99)
+
+
+def percentile(ordered, fraction):
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class ClientRecorder:
+    """
+    Records the client's packet events and summarizes them.
+
+    Args:
+        client_socket (socket.socket): The client's socket (its address is the events' source).
+        server_ip (str): Destination IP address of the packets.
+        server_port (int): Destination port of the packets.
+        logger (logging.Logger): Logger the events are written to.
+        clock_ns (callable): Returns the current time in nanoseconds.
+    """
+
+    def __init__(self, client_socket, server_ip, server_port, logger=client_logger, clock_ns=time.perf_counter_ns):
+        self.client_socket = client_socket
+        self.destination = (server_ip, server_port)
+        self.logger = logger
+        self.clock_ns = clock_ns
+        self.source = None  # Known once the socket has sent its first datagram
+        self.counts = {"Sent": 0, "Retransmit": 0, "Acknowledged": 0, "Failed": 0}
+        self.rtts = array("q")  # Nanoseconds, packets acknowledged after a single transmission
+        self.acknowledged_bytes = 0
+        self.outstanding = 0  # Packets sent and neither acknowledged nor failed
+        self.busy_since = None  # When `outstanding` last became non-zero
+        self.busy_ns = 0  # Time with packets outstanding, excluding the current stretch
+        self.listener = None
+
+    def start(self):
+        """Move the logger's writes to a background thread for the rest of the session."""
+        self.listener = start_background_logging(self.logger)
+
+    def close(self):
+        """Write the events still queued."""
+        if self.listener is not None:
+            stop_background_logging(self.logger, self.listener)
+            self.listener = None
+
+    def record(self, event, sequence, acknowledgment, message, latency_ns=None):
+        if self.source is None:
+            self.source = self.client_socket.getsockname()
+        self.counts[event] += 1
+        latency = round(latency_ns / 1e6, 3) if latency_ns is not None else None
+        log_event(self.logger, event, sequence, acknowledgment, *self.source, *self.destination, message, latency)
+
+    def sent(self, sequence, message):
+        """A packet was transmitted for the first time."""
+        if self.outstanding == 0:
+            self.busy_since = self.clock_ns()
+        self.outstanding += 1
+        self.record("Sent", sequence, None, message)
+
+    def retransmitted(self, sequence, message):
+        self.record("Retransmit", sequence, None, message)
+
+    def acknowledged(self, sequence, acknowledgment, latency_ns, rtt_ns=None, size=0):
+        """
+        A packet was acknowledged.
+
+        Args:
+            latency_ns (int): Time from its first transmission to the acknowledgment.
+            rtt_ns (int, optional): The RTT sample, if it was transmitted only once.
+            size (int): Message bytes it delivered.
+        """
+        if rtt_ns is not None:
+            self.rtts.append(rtt_ns)
+        self.acknowledged_bytes += size
+        self.record("Acknowledged", sequence, acknowledgment, None, latency_ns)
+        self.settle()
+
+    def failed(self, sequence, message):
+        """A packet was given up on after its last transmission."""
+        self.record("Failed", sequence, None, message)
+        self.settle()
+
+    def settle(self):
+        self.outstanding -= 1
+        if self.outstanding == 0:
+            self.busy_ns += self.clock_ns() - self.busy_since
+
+    def summary(self):
+        """
+        Summarize the session.
+
+        Returns:
+            dict: Event counts, RTT percentiles and maximum in ms (None without samples), the
+            retransmission ratio (retransmissions per first transmission) and the goodput in
+            bytes per second (None before anything was acknowledged).
+        """
+        busy_ns = self.busy_ns + (self.clock_ns() - self.busy_since if self.outstanding else 0)
+        rtts = sorted(self.rtts)
+        sent, acknowledged_bytes = self.counts["Sent"], self.acknowledged_bytes
+        summary = dict(self.counts)
+        for fraction in RTT_PERCENTILES:
+            summary[f"rtt_p{fraction * 100:g}_ms"] = percentile(rtts, fraction) / 1e6 if rtts else None
+        summary["rtt_max_ms"] = rtts[-1] / 1e6 if rtts else None
+        summary["rtt_samples"] = len(rtts)
+        summary["retransmission_ratio"] = self.counts["Retransmit"] / sent if sent else 0.0
+        summary["goodput_bps"] = acknowledged_bytes / (busy_ns / 1e9) if busy_ns and acknowledged_bytes else None
+        summary["acknowledged_bytes"] = acknowledged_bytes
+        summary["busy_seconds"] = busy_ns / 1e9
+        return summary
+
+    def report(self):
+        """The summary as printable lines."""
+        summary = self.summary()
+        ratio = summary["retransmission_ratio"] * 100
+        lines = [f"📊 Session summary: {summary['Sent']} packet(s) sent, {summary['Acknowledged']} acknowledged, "
+                 f"{summary['Failed']} failed",
+                 f"   Retransmissions: {summary['Retransmit']} ({ratio:.1f}% of packets)"]
+        if summary["rtt_samples"]:
+            percentiles = "  ".join(f"p{fraction * 100:g} {summary[f'rtt_p{fraction * 100:g}_ms']:.2f} ms"
+                                    for fraction in RTT_PERCENTILES)
+            lines.append(f"   RTT: {percentiles}  max {summary['rtt_max_ms']:.2f} ms "
+                         f"({summary['rtt_samples']} samples)")
+        if summary["goodput_bps"] is not None:
+            lines.append(f"   Goodput: {summary['goodput_bps'] / 1000:.2f} KB/s ({summary['acknowledged_bytes']} bytes "
+                         f"in {summary['busy_seconds']:.3f} s with packets in flight)")
+        return "\n".join(lines)
@@ -0,0 +1,249 @@
+"""
+Durable journal of the messages the server delivers, so a restarted server resumes its session.
+
+The journal is a preallocated file mapped into memory. Every message delivered in order is
+appended as a record: its sequence number, sender and text. A TERMINATE appends a reset record
+that starts a new session. Appending only copies into the mapping, so a crash of the server
+process loses nothing: the pages belong to the kernel's page cache. To survive a crash of the
+machine, the records have to reach the disk. They are flushed with msync() in groups, once
+GROUP_COMMIT_MESSAGES are waiting or the oldest has waited GROUP_COMMIT_INTERVAL seconds,
+rather than once per message.
+
+The first page holds two header slots, written alternately by each commit and each carrying a
+commit counter and a CRC, so a torn header write leaves the previous slot valid. A header records
+where the committed records end, the session, the last sequence number delivered in it, and the
+generation: a number raised every time the journal is opened. Records carry the generation that
+wrote them and a CRC. Recovery reads the newest valid header and scans only the records written
+since its commit, stopping at the first record with a bad CRC or an older generation (left over
+from before an earlier crash). That scan covers at most one group, so opening a journal takes
+about the same time however many messages it holds. When the file fills up, its size is doubled.
+"""
+import mmap
+import os
+import socket
+import struct
+import time
+import zlib
+
+DEFAULT_JOURNAL_BYTES = 64 * 1024 * 1024  # Preallocated size of a new journal
+GROUP_COMMIT_MESSAGES = 256  # Records appended before a commit is forced
+GROUP_COMMIT_INTERVAL = 0.05  # Seconds the oldest uncommitted record may wait
+
+MAGIC = b"UDPJRNL1"
+HEADER_BYTES = 4096  # The first page: two header slots, then the records
+# magic, commit counter, generation of the records past the end, end, session, last sequence, messages
+HEADER = struct.Struct("<8sQQQQqQ")
+HEADER_SLOTS = (0, 64)
+CRC = struct.Struct("<I")
+RECORD = struct.Struct("<IIIB")  # body length, CRC of generation + kind + body, generation, kind
+MESSAGE = struct.Struct("<qH4s")  # sequence number, sender port, sender IPv4 address; the text follows
+MESSAGE_RECORD, RESET_RECORD = 1, 2
+
+
+def record_crc(generation, kind, body):
+    return zlib.crc32(body, zlib.crc32(struct.pack("<IB", generation, kind)))
+
+
+def scan_records(buffer, offset, limit, generation=None):
+    """
+    Yield (offset after the record, kind, body) for the valid records from `offset` on.
+
+    Args:
+        generation (int, optional): Only accept records of this generation.
+    """
+    while offset + RECORD.size <= limit:
+        length, crc, record_generation, kind = RECORD.unpack_from(buffer, offset)
+        end = offset + RECORD.size + length
+        if kind not in (MESSAGE_RECORD, RESET_RECORD) or end > limit:
+            return
+        if generation is not None and record_generation != generation:
+            return
+        body = bytes(buffer[offset + RECORD.size:end])
+        if record_crc(record_generation, kind, body) != crc:
+            return
+        yield end, kind, body
+        offset = end
+
+
+def decode_message_record(body):
+    """Returns (sequence number, (sender ip, sender port), message) of a message record."""
+    sequence_number, port, address = MESSAGE.unpack_from(body)
+    return sequence_number, (socket.inet_ntoa(address), port), body[MESSAGE.size:].decode()
+
+
+def read_header(buffer):
+    """The newest valid header as a tuple of HEADER's fields, or None if neither slot is valid."""
+    newest = None
+    for slot in HEADER_SLOTS:
+        fields = HEADER.unpack_from(buffer, slot)
+        (crc,) = CRC.unpack_from(buffer, slot + HEADER.size)
+        if fields[0] == MAGIC and zlib.crc32(buffer[slot:slot + HEADER.size]) == crc:
+            if newest is None or fields[1] > newest[1]:
+                newest = fields
+    return newest
+
+
+class Journal:
+    """
+    A memory-mapped journal of delivered messages with group commit.
+
+    Args:
+        path (str): The journal file; created and preallocated if it does not exist.
+        size (int): Bytes to preallocate for a new (or smaller) journal.
+        commit_messages (int): Records appended before a commit is forced.
+        commit_interval (float): Seconds the oldest uncommitted record may wait for a commit.
+        clock (callable): Returns the current time in seconds.
+
+    Raises:
+        ValueError: If the file exists but is not a journal.
+        OSError: If the file cannot be created or mapped.
+    """
+
+    def __init__(self, path, size=DEFAULT_JOURNAL_BYTES, commit_messages=GROUP_COMMIT_MESSAGES,
+                 commit_interval=GROUP_COMMIT_INTERVAL, clock=time.monotonic):
+        self.path = path
+        self.commit_messages = commit_messages
+        self.commit_interval = commit_interval
+        self.clock = clock
+        self.file = open(path, "a+b")
+        self.file.seek(0, os.SEEK_END)
+        existing = self.file.tell()
+        self.preallocate(max(size, existing, HEADER_BYTES * 2))
+        self.map = mmap.mmap(self.file.fileno(), 0)
+
+        header = read_header(self.map) if existing else None
+        if existing and header is None and any(self.map[:HEADER_BYTES]):
+            self.close_map()
+            raise ValueError(f"{path} is not a journal (or both of its headers are damaged)")
+        _, self.commit_count, generation, self.end, self.session, self.last_sequence, self.messages = (
+            header or (MAGIC, 0, 0, HEADER_BYTES, 0, 0, 0))
+
+        # Replay the records appended after the last commit: at most one group
+        self.recovered = 0
+        for self.end, kind, body in scan_records(self.map, self.end, len(self.map), generation):
+            self.apply(kind, body)
+            self.recovered += 1
+
+        # A new generation, committed below, tells this run's records from any left over past the end
+        self.generation = generation + 1
+        self.pending = 0  # Records appended since the last commit
+        self.pending_since = None
+        self.synced = self.end  # Records before this offset have been flushed
+        self.commits = 0
+        self.commit()
+
+    def preallocate(self, size):
+        """Grow the file to `size` bytes, reserving the blocks where the system allows it."""
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(self.file.fileno(), 0, size)  # A write to a mapped hole could fail with SIGBUS
+        else:
+            self.file.truncate(size)
+
+    def apply(self, kind, body):
+        if kind == RESET_RECORD:
+            self.session += 1
+            self.last_sequence = 0
+        else:
+            self.last_sequence = MESSAGE.unpack_from(body)[0]
+            self.messages += 1
+
+    def append_record(self, kind, body):
+        size = RECORD.size + len(body)
+        if self.end + size > len(self.map):
+            self.grow(self.end + size)
+        RECORD.pack_into(self.map, self.end, len(body), record_crc(self.generation, kind, body), self.generation, kind)
+        self.map[self.end + RECORD.size:self.end + size] = body
+        self.end += size
+        self.apply(kind, body)
+        self.pending += 1
+        if self.pending_since is None:
+            self.pending_since = self.clock()
+        if self.pending >= self.commit_messages:
+            self.commit()
+
+    def append(self, sequence_number, message, sender):
+        """Journal a delivered message; commits once a group is complete."""
+        body = MESSAGE.pack(sequence_number, sender[1], socket.inet_aton(sender[0])) + message.encode()
+        self.append_record(MESSAGE_RECORD, body)
+
+    def reset(self):
+        """Start a new session (the client terminated), committed at once."""
+        self.append_record(RESET_RECORD, b"")
+        self.commit()
+
+    def maybe_commit(self):
+        """Commit if the oldest uncommitted record has waited long enough. Returns True if it did."""
+        if self.pending_since is not None and self.clock() - self.pending_since >= self.commit_interval:
+            self.commit()
+            return True
+        return False
+
+    def commit(self):
+        """Flush the records appended since the last commit, then the header that covers them."""
+        start = self.synced - self.synced % mmap.PAGESIZE  # flush() needs a page-aligned offset
+        if self.end > start:
+            self.map.flush(start, self.end - start)
+        self.commit_count += 1
+        slot = HEADER_SLOTS[self.commit_count % len(HEADER_SLOTS)]
+        HEADER.pack_into(self.map, slot, MAGIC, self.commit_count, self.generation, self.end, self.session,
+                         self.last_sequence, self.messages)
+        CRC.pack_into(self.map, slot + HEADER.size, zlib.crc32(self.map[slot:slot + HEADER.size]))
+        self.map.flush(0, HEADER_BYTES)
+        self.synced = self.end
+        self.pending = 0
+        self.pending_since = None
+        self.commits += 1
+
+    def grow(self, needed):
+        """Double the file until `needed` bytes fit, after committing what is in the mapping."""
+        self.commit()
+        size = len(self.map)
+        while size < needed:
+            size *= 2
+        self.map.close()
+        self.preallocate(size)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+
+    def close_map(self):
+        self.map.close()
+        self.file.close()
+
+    def close(self):
+        """Commit and close the journal."""
+        self.commit()
+        self.close_map()
+
+    def stats(self):
+        return {
+            "session": self.session,
+            "last_sequence": self.last_sequence,
+            "messages": self.messages,
+            "bytes": self.end - HEADER_BYTES,
+            "capacity": len(self.map) - HEADER_BYTES,
+            "commits": self.commits,
+            "recovered": self.recovered,
+        }
+
+
+def read_journal(path):
+    """
+    Read every message of a journal, for consumers that process them after the server.
+
+    Yields:
+        tuple: (session, sequence number, (sender ip, sender port), message), in delivery order.
+    """
+    with open(path, "rb") as journal_file, mmap.mmap(journal_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        header = read_header(buffer)
+        if header is None:
+            raise ValueError(f"{path} is not a journal")
+        _, _, generation, end, _, _, _ = header
+        session = 0
+        records = scan_records(buffer, HEADER_BYTES, end)  # Committed: every generation
+        tail = scan_records(buffer, end, len(buffer), generation)  # Appended since the commit
+        for records in (records, tail):
+            for _, kind, body in records:
+                if kind == RESET_RECORD:
+                    session += 1
+                else:
+                    sequence_number, sender, message = decode_message_record(body)
+                    yield session, sequence_number, sender, message
@@ -0,0 +1,187 @@
+"""
+SQLite index of the client, proxy and server packet logs.
+
+Every log line with a sequence number becomes one row keyed by (session, sequence number), so the
+journey of a packet through all three components is a single indexed lookup. A session ends with
+the component's Terminate event, and sessions are numbered per component from the oldest log
+line, which lines them up across components when the three logs cover the same runs.
+
+Ingestion is incremental: for each log segment (the live file and its rotated .1/.2 backups) the
+index remembers the inode and how far it has been read. A rotated file keeps its inode, so after
+rotation reading resumes where it stopped, and only new lines are parsed.
+"""
+import os
+import sqlite3
+from datetime import datetime
+from functools import lru_cache
+
+COMPONENTS = ("client", "proxy", "server")
+LOG_FILE_PATTERN = "packet_logs_{component}.log"
+BACKUP_COUNT = 2  # Matches the RotatingFileHandler in utils.logger
+LOG_SECOND_FORMAT = "%Y-%m-%d %H:%M:%S"  # asctime without its ",mmm" milliseconds
+INSERT_BATCH = 50000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    session INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    time_ms INTEGER NOT NULL,
+    component INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    ack INTEGER,
+    source TEXT,
+    destination TEXT,
+    message TEXT,
+    latency REAL
+);
+CREATE INDEX IF NOT EXISTS events_by_packet ON events (seq, session, time_ms);
+CREATE TABLE IF NOT EXISTS segments (
+    component INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    PRIMARY KEY (component, inode)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    component INTEGER PRIMARY KEY,
+    session INTEGER NOT NULL
+);
+"""
+
+
+def open_index(path):
+    """Open (and create if needed) an index database."""
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    connection.execute("PRAGMA journal_mode=WAL")
+    return connection
+
+
+@lru_cache(maxsize=4096)
+def epoch_seconds(text):
+    return int(datetime.strptime(text, LOG_SECOND_FORMAT).timestamp())
+
+
+def parse_time_ms(text):
+    """Convert an asctime ('2024-01-01 10:00:00,123') to epoch milliseconds; strptime runs once per second."""
+    return epoch_seconds(text[:19]) * 1000 + int(text[20:23])
+
+
+def optional_int(text):
+    return None if text == "N/A" else int(text)
+
+
+def parse_line(line):
+    """
+    Split a log line into its fields.
+
+    Returns:
+        tuple: (time in ms, event, sequence, acknowledgment, source, destination, message,
+        latency), or None for lines that are not packet events.
+    """
+    # time, level, event, seq, ack, src ip, src port, dest ip, dest port, "message, latency"
+    fields = line.rstrip("\n").split(", ", 9)
+    if len(fields) < 10 or fields[1] != "INFO":
+        return None
+    message, _, latency = fields[9].rpartition(", ")
+    try:
+        return (parse_time_ms(fields[0]), fields[2], optional_int(fields[3]), optional_int(fields[4]),
+                f"{fields[5]}:{fields[6]}", f"{fields[7]}:{fields[8]}", None if message == "None" else message,
+                None if latency == "None" else float(latency))
+    except ValueError:
+        return None
+
+
+def log_segments(log_dir, component):
+    """Paths of a component's log segments, oldest first."""
+    base = os.path.join(log_dir, LOG_FILE_PATTERN.format(component=component))
+    return [f"{base}.{number}" for number in range(BACKUP_COUNT, 0, -1)] + [base]
+
+
+def ingest(connection, log_dir="."):
+    """
+    Add the log lines written since the previous ingest.
+
+    Returns:
+        int: Number of events added.
+    """
+    added = 0
+    with connection:
+        for component_id, component in enumerate(COMPONENTS):
+            row = connection.execute("SELECT session FROM sessions WHERE component = ?", (component_id,)).fetchone()
+            session = row[0] if row else 0
+            offsets = dict(connection.execute("SELECT inode, offset FROM segments WHERE component = ?",
+                                              (component_id,)))
+            for path in log_segments(log_dir, component):
+                try:
+                    status = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                offset = offsets.get(status.st_ino, 0)
+                if offset > status.st_size:
+                    offset = 0  # The inode was reused by a new file
+                if offset == status.st_size:
+                    continue
+                rows = []
+                with open(path, "rb") as log_file:
+                    log_file.seek(offset)
+                    for raw_line in log_file:
+                        if not raw_line.endswith(b"\n"):
+                            break  # A line still being written; picked up by the next ingest
+                        offset += len(raw_line)
+                        parsed = parse_line(raw_line.decode("utf-8", errors="replace"))
+                        if parsed is None:
+                            continue
+                        time_ms, event, seq, ack, source, destination, message, latency = parsed
+                        if event == "Terminate":
+                            session += 1
+                            continue
+                        if seq is None:
+                            continue  # Not about a packet (e.g. congestion window samples)
+                        rows.append((session, seq, time_ms, component_id, event, ack, source, destination, message,
+                                     latency))
+                        if len(rows) >= INSERT_BATCH:
+                            connection.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                            added += len(rows)
+                            rows = []
+                connection.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                added += len(rows)
+                connection.execute("INSERT OR REPLACE INTO segments VALUES (?, ?, ?)",
+                                   (component_id, status.st_ino, offset))
+            connection.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?)", (component_id, session))
+    return added
+
+
+def packet_journey(connection, seq, session=None):
+    """
+    All events of one packet across the three components, in time order.
+
+    Args:
+        seq (int): Sequence number (for ACKs, the sequence they acknowledge).
+        session (int, optional): Session to look in; defaults to the latest session with that packet.
+
+    Returns:
+        tuple[int, list[tuple]]: The session and its (time in ms, component, event, acknowledgment,
+        source, destination, message, latency) rows. The session is None if the packet is unknown.
+    """
+    if session is None:
+        row = connection.execute("SELECT MAX(session) FROM events WHERE seq = ?", (seq,)).fetchone()
+        session = row[0]
+        if session is None:
+            return None, []
+    rows = connection.execute(
+        "SELECT time_ms, component, event, ack, source, destination, message, latency FROM events "
+        "WHERE session = ? AND seq = ? ORDER BY time_ms, rowid", (session, seq)).fetchall()
+    return session, [(time_ms, COMPONENTS[component], *rest) for time_ms, component, *rest in rows]
+
+
+def slowest_packets(connection, limit=10, session=None):
+    """
+    Packets with the longest span between their first and last logged event.
+
+    Returns:
+        list[tuple[int, int, int, int]]: (session, sequence, span in ms, event count) rows.
+    """
+    where, parameters = ("WHERE session = ?", (session, limit)) if session is not None else ("", (limit,))
+    return connection.execute(
+        f"SELECT session, seq, MAX(time_ms) - MIN(time_ms) AS span, COUNT(*) FROM events {where} "
+        f"GROUP BY session, seq ORDER BY span DESC LIMIT ?", parameters).fetchall()
@@ -1,5 +1,6 @@
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 
 def create_logger(logger_name, log_file_name):
@@ -50,6 +51,38 @@ def log_event(logger, event, sequence, acknowledgment, src_ip, src_port, dest_ip
     logger.info(log_message)
 
 
+def start_background_logging(logger):
+    """
+    Move a logger's file writes to a background thread, so logging an event only queues it.
+
+    Records keep the time they were logged at; the listener formats and writes them later.
+
+    Args:
+        logger (logging.Logger): Logger whose handlers are moved behind a queue.
+
+    Returns:
+        logging.handlers.QueueListener: Pass it to stop_background_logging to flush the queue.
+    """
+    handlers = list(logger.handlers)
+    log_queue = queue.SimpleQueue()
+    for handler in handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers)
+    listener.start()
+    return listener
+
+
+def stop_background_logging(logger, listener):
+    """Write the queued records and give the logger its handlers back."""
+    listener.stop()
+    for handler in list(logger.handlers):
+        if isinstance(handler, QueueHandler):
+            logger.removeHandler(handler)
+    for handler in listener.handlers:
+        logger.addHandler(handler)
+
+
 def log_control_event(logger, param, old_value, new_value):
     """
     Log a control configuration change.
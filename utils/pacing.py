@@ -0,0 +1,136 @@
+"""
+Precise send pacing.
+
+time.sleep() alone oversleeps by up to a scheduler tick, so waiting for a send time sleeps until
+SPIN_THRESHOLD_NS before it and busy-waits the rest on time.perf_counter_ns().
+
+A Pacer spaces datagrams at a fixed rate of packets or bytes per second. Each send gets a slot
+one interval after the previous slot. A send that happens less than an interval after its slot
+(the wait overslept a little) keeps the schedule, so the rate is not lost to wake-up latency,
+and the next slot is still in the future. A send more than an interval late (the sender was
+idle, or waiting for ACKs) starts the schedule over from the current time, so idle time never
+turns into a burst.
+"""
+import time
+from array import array
+
+SPIN_THRESHOLD_NS = 1_000_000  # Busy-wait for the last millisecond; sleep() alone is too coarse
+PACKETS, BYTES = "packets", "bytes"
+BYTE_UNITS = {"B/s": 1, "KB/s": 1000, "MB/s": 1000 * 1000}
+
+
+def wait_until(deadline_ns):
+    """Block until time.perf_counter_ns() reaches `deadline_ns`."""
+    remaining = deadline_ns - time.perf_counter_ns()
+    if remaining > SPIN_THRESHOLD_NS:
+        time.sleep((remaining - SPIN_THRESHOLD_NS) / 1_000_000_000)
+    while time.perf_counter_ns() < deadline_ns:
+        pass
+
+
+def parse_rate(value):
+    """
+    Parse a send rate: '<number>' or '<number>pps' in packets per second, or '<number>B/s',
+    '<number>KB/s' or '<number>MB/s' in bytes per second.
+
+    Returns:
+        tuple[float, str]: The rate and its unit (PACKETS or BYTES).
+
+    Raises:
+        ValueError: If the rate is malformed or not positive.
+    """
+    text = value.strip()
+    unit, scale = PACKETS, 1
+    for suffix, multiplier in sorted(BYTE_UNITS.items(), key=lambda item: -len(item[0])):
+        if text.upper().endswith(suffix.upper()):
+            text, unit, scale = text[:-len(suffix)], BYTES, multiplier
+            break
+    else:
+        if text.lower().endswith("pps"):
+            text = text[:-3]
+    rate = float(text) * scale
+    if not rate > 0:
+        raise ValueError(f"Rate must be positive. Got: {value}")
+    return rate, unit
+
+
+class Pacer:
+    """
+    Spaces sends at `rate` packets or bytes per second.
+
+    Args:
+        rate (float): Packets or bytes per second.
+        unit (str): PACKETS or BYTES.
+    """
+
+    def __init__(self, rate, unit=PACKETS):
+        self.rate = rate
+        self.unit = unit
+        self.next_slot = 0  # time.perf_counter_ns() of the next send slot
+        self.last_send = None
+        self.last_units = 0
+        self.last_interval = 0  # Nanoseconds between the last slot and the next one
+        self.packets = 0
+        self.bytes = 0
+        # Before each send on schedule: the packets or bytes of the previous send, and the time
+        # since it, which together give the achieved rate
+        self.paced_units = 0
+        self.paced_ns = 0
+        self.jitter = array("q")  # Nanoseconds between the slot of each send on schedule and the send
+
+    def wait_time(self):
+        """Seconds pace() would sleep before its final spin; <= 0 once the next slot is close."""
+        return (self.next_slot - SPIN_THRESHOLD_NS - time.perf_counter_ns()) / 1e9
+
+    def pace(self, size):
+        """Wait for the send slot of a `size`-byte datagram; call right before sending it."""
+        units = 1 if self.unit == PACKETS else size
+        slot = self.next_slot
+        if slot > time.perf_counter_ns():
+            wait_until(slot)
+        now = time.perf_counter_ns()
+        if now - slot < self.last_interval:
+            self.jitter.append(now - slot)
+            self.paced_units += self.last_units
+            self.paced_ns += now - self.last_send
+        else:
+            slot = now  # Idle or far behind: start over from now rather than catch up in a burst
+        self.last_interval = round(units * 1_000_000_000 / self.rate)
+        self.next_slot = slot + self.last_interval
+        self.last_send = now
+        self.last_units = units
+        self.packets += 1
+        self.bytes += size
+
+    def stats(self):
+        """
+        Pacing statistics.
+
+        Returns:
+            dict: The target and achieved rate (units per second over the sends on schedule, None
+            if there were none), sends and bytes, and the jitter of the sends on schedule in
+            microseconds (mean, p99 and max, None if there were none).
+        """
+        jitter = sorted(self.jitter)
+        return {
+            "rate": self.rate,
+            "unit": self.unit,
+            "achieved": self.paced_units / (self.paced_ns / 1e9) if self.paced_ns else None,
+            "packets": self.packets,
+            "bytes": self.bytes,
+            "paced": len(jitter),
+            "jitter_mean_us": sum(jitter) / len(jitter) / 1000 if jitter else None,
+            "jitter_p99_us": jitter[min(int(len(jitter) * 0.99), len(jitter) - 1)] / 1000 if jitter else None,
+            "jitter_max_us": jitter[-1] / 1000 if jitter else None,
+        }
+
+    def report(self):
+        """The statistics as a printable line."""
+        stats = self.stats()
+        unit = "pkt/s" if self.unit == PACKETS else "B/s"
+        line = f"🚦 Pacing at {stats['rate']:g} {unit}: {stats['packets']} datagram(s), {stats['bytes']} bytes"
+        if stats["achieved"] is None:
+            return line + " (never limited by the rate)"
+        return (line + f"; achieved {stats['achieved']:.1f} {unit} over {stats['paced']} paced send(s), jitter mean "
+                f"{stats['jitter_mean_us']:.1f} µs, p99 {stats['jitter_p99_us']:.1f} µs, "
+                f"max {stats['jitter_max_us']:.1f} µs")
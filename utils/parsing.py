@@ -1,6 +1,22 @@
 import argparse
+import os
 
-from utils.validation import validate_ip, validate_port, validate_chance, validate_delay_time
+from utils.congestion import CONGESTION_CONTROLS
+from utils.delivery import DEFAULT_MAX_PENDING
+from utils.journal import DEFAULT_JOURNAL_BYTES
+from utils.protocol import (COMPRESSION_CODECS, DEFAULT_BATCH_BYTES, DEFAULT_COMPRESSION_THRESHOLD, DEFAULT_MTU_BYTES,
+                            DEFAULT_RECEIVE_WINDOW)
+from utils.reassembly import MAX_REASSEMBLY_BYTES, REASSEMBLY_TIMEOUT
+from utils.validation import (validate_ip, validate_port, validate_chance, validate_delay_time, validate_count,
+                              validate_fec, validate_positive, validate_rate)
+
+
+def add_socket_buffer_arguments(parser):
+    """Add --recv-buffer and --send-buffer, shared by the client, server and proxy."""
+    parser.add_argument('--recv-buffer', default=None, type=lambda value: validate_count(value, minimum=1),
+                        help="Socket receive buffer (SO_RCVBUF) to request in bytes (default: system default)")
+    parser.add_argument('--send-buffer', default=None, type=lambda value: validate_count(value, minimum=1),
+                        help="Socket send buffer (SO_SNDBUF) to request in bytes (default: system default)")
 
 
 def parse_client():
@@ -8,6 +24,31 @@ def parse_client():
     parser.add_argument('--target-ip', required=True, help="Server IP address")
     parser.add_argument('--target-port', required=True, help="Server port")
     parser.add_argument('--timeout', required=True, help="Acknowledgment timeout in milliseconds")
+    parser.add_argument('--auto-send', default=4, type=validate_count,
+                        help="Number of 'hi N' messages sent automatically after each typed message")
+    parser.add_argument('--cc', choices=sorted(CONGESTION_CONTROLS),
+                        help="Congestion control algorithm for windowed sending (default: stop-and-wait)")
+    parser.add_argument('--max-window', default=64, type=lambda value: validate_count(value, minimum=1),
+                        help="Upper bound for the congestion window in packets")
+    parser.add_argument('--mtu', default=DEFAULT_MTU_BYTES, type=lambda value: validate_count(value, minimum=64),
+                        help="Largest datagram to send; bigger messages are split into fragments")
+    parser.add_argument('--batch-bytes', default=0, type=validate_count,
+                        help=f"Coalesce consecutive messages into datagrams of up to this many bytes "
+                             f"(e.g. {DEFAULT_BATCH_BYTES} for one MTU; 0 disables batching)")
+    parser.add_argument('--batch-linger', default=0.0, type=lambda value: validate_count(value) / 1000.0,
+                        help="Milliseconds a typed message waits for the lines entered after it, so that they share "
+                             "a BATCH datagram (default: 0, send at once; enables --batch-bytes)")
+    parser.add_argument('--compress', choices=COMPRESSION_CODECS,
+                        help="Offer this payload compression to the server (default: uncompressed)")
+    parser.add_argument('--compress-threshold', default=DEFAULT_COMPRESSION_THRESHOLD, type=validate_count,
+                        help="Only compress messages of at least this many bytes")
+    parser.add_argument('--fec', default=None, type=validate_fec,
+                        help="Send one XOR parity datagram per this many data datagrams, or 'auto' to adapt the "
+                             "block size to the observed losses (default: no parity)")
+    parser.add_argument('--rate', default=None, type=validate_rate,
+                        help="Pace sends at this many packets per second ('200' or '200pps') or bytes per second "
+                             "('64KB/s'; B/s, KB/s and MB/s) (default: unpaced)")
+    add_socket_buffer_arguments(parser)
     args = parser.parse_args()
 
     # Validate and process IP
@@ -46,6 +87,15 @@ def parse_proxy():
     parser.add_argument('--server-delay-time', required=True,
                         help="Delay time for server-to-client (e.g., '100' or '100-500')")
     parser.add_argument('--control-port', required=True, help="Control port for dynamic configuration updates")
+    parser.add_argument('--schedule', default=None,
+                        help="JSON impairment profile to apply over time (see README, Impairment Schedules)")
+    parser.add_argument('--rules', default=None,
+                        help="JSON table of per-flow impairment rules (see README, Per-Flow Rules)")
+    parser.add_argument('--pcap', default=None,
+                        help="Record every datagram and its fate (forwarded, dropped, delayed) to this pcapng file")
+    parser.add_argument('--queue-size', default=256, type=lambda value: validate_count(value, minimum=1),
+                        help="Datagrams each direction may queue for its worker before new ones are dropped")
+    add_socket_buffer_arguments(parser)
     args = parser.parse_args()
 
     # Validate arguments using validation functions
@@ -70,6 +120,27 @@ def parse_server():
     parser = argparse.ArgumentParser(description="UDP Server with Latency Tracking")
     parser.add_argument('--listen-ip', required=True, help="IP address to bind")
     parser.add_argument('--listen-port', required=True, help="Port to listen on")
+    parser.add_argument('--reassembly-timeout', default=REASSEMBLY_TIMEOUT,
+                        type=lambda value: validate_count(value, minimum=1) / 1000.0,
+                        help="Milliseconds without a new fragment before a partial message is discarded")
+    parser.add_argument('--reassembly-memory', default=MAX_REASSEMBLY_BYTES,
+                        type=lambda value: validate_count(value, minimum=1),
+                        help="Maximum bytes held by partially reassembled messages")
+    parser.add_argument('--sink', default=None,
+                        help="Write delivered messages, one per line, to this file or named pipe in large batches "
+                             "instead of printing them")
+    parser.add_argument('--sink-max-pending', default=DEFAULT_MAX_PENDING,
+                        type=lambda value: validate_count(value, minimum=1),
+                        help="Messages waiting to be written at which the receive window closes")
+    parser.add_argument('--receive-window', default=DEFAULT_RECEIVE_WINDOW,
+                        type=lambda value: validate_count(value, minimum=1),
+                        help="Out-of-order messages the server buffers, advertised to the client as its window")
+    parser.add_argument('--journal', default=None,
+                        help="Journal delivered messages to this memory-mapped file and resume from it on restart")
+    parser.add_argument('--journal-size', default=DEFAULT_JOURNAL_BYTES,
+                        type=lambda value: validate_count(value, minimum=8192),
+                        help="Bytes to preallocate for a new journal (doubled whenever it fills up)")
+    add_socket_buffer_arguments(parser)
     arguments = parser.parse_args()
 
     # Validate and process IP
@@ -79,3 +150,92 @@ def parse_server():
     arguments.listen_port = validate_port(arguments.listen_port)
 
     return arguments
+
+
+def parse_replay():
+    parser = argparse.ArgumentParser(description="Replay recorded UDP traffic against the server or proxy")
+    parser.add_argument('--trace', required=True,
+                        help="pcap/pcapng capture (e.g. from proxy.py --pcap) or server log to replay")
+    parser.add_argument('--target-ip', required=True, help="IP address to send the datagrams to")
+    parser.add_argument('--target-port', required=True, help="Port to send the datagrams to")
+    parser.add_argument('--speed', default=1.0, type=validate_positive,
+                        help="Replay N times faster than recorded (default 1, the original timing)")
+    parser.add_argument('--max-speed', action='store_true', help="Ignore the recorded timing and send back to back")
+    parser.add_argument('--direction', default="client-to-server", choices=["client-to-server", "server-to-client"],
+                        help="Direction to replay from proxy captures")
+    parser.add_argument('--trace-port', default=None, type=validate_port,
+                        help="Only replay captured datagrams sent to this port")
+    args = parser.parse_args()
+
+    args.target_ip = validate_ip(args.target_ip)
+    args.target_port = validate_port(args.target_port)
+    return args
+
+
+def parse_packet_journey():
+    parser = argparse.ArgumentParser(description="Index the packet logs and follow packets through them")
+    parser.add_argument('--db', default="packet_index.db", help="SQLite index file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser('ingest', help="Add new log lines (including rotated segments) to the index")
+    ingest.add_argument('--log-dir', default=".", help="Directory holding the packet_logs_*.log files")
+
+    show = commands.add_parser('show', help="Show the lifecycle of one packet across client, proxy and server")
+    show.add_argument('seq', type=lambda value: validate_count(value, minimum=0), help="Sequence number")
+    show.add_argument('--session', type=validate_count, help="Session number (default: the latest with this packet)")
+
+    slowest = commands.add_parser('slowest', help="List the packets with the longest lifecycles")
+    slowest.add_argument('--limit', default=10, type=lambda value: validate_count(value, minimum=1))
+    slowest.add_argument('--session', type=validate_count, help="Only look at this session")
+    return parser.parse_args()
+
+
+def parse_simulate():
+    parser = argparse.ArgumentParser(description="Simulate a client/proxy/server session on a virtual clock")
+    parser.add_argument('--client-drop', default=0.0, type=validate_chance,
+                        help="Drop chance (0.0 to 1.0) for client-to-server")
+    parser.add_argument('--server-drop', default=0.0, type=validate_chance,
+                        help="Drop chance (0.0 to 1.0) for server-to-client")
+    parser.add_argument('--client-delay', default=0.0, type=validate_chance,
+                        help="Delay chance (0.0 to 1.0) for client-to-server")
+    parser.add_argument('--server-delay', default=0.0, type=validate_chance,
+                        help="Delay chance (0.0 to 1.0) for server-to-client")
+    parser.add_argument('--client-delay-time', default=(0, 0), type=validate_delay_time,
+                        help="Delay time for client-to-server (e.g., '100' or '100-500')")
+    parser.add_argument('--server-delay-time', default=(0, 0), type=validate_delay_time,
+                        help="Delay time for server-to-client (e.g., '100' or '100-500')")
+    parser.add_argument('--timeout', default=2.0, type=lambda value: validate_count(value, minimum=1) / 1000.0,
+                        help="Client acknowledgment timeout in milliseconds (default 2000)")
+    parser.add_argument('--rounds', default=20, type=lambda value: validate_count(value, minimum=1),
+                        help="Messages 'typed' into the client")
+    parser.add_argument('--auto-send', default=4, type=validate_count,
+                        help="Number of 'hi N' messages sent automatically after each typed message")
+    parser.add_argument('--cc', choices=sorted(CONGESTION_CONTROLS),
+                        help="Congestion control algorithm for windowed sending (default: stop-and-wait)")
+    parser.add_argument('--max-window', default=64, type=lambda value: validate_count(value, minimum=1),
+                        help="Upper bound for the congestion window in packets")
+    parser.add_argument('--link-latency', default=0.0, type=lambda value: validate_count(value) / 1000.0,
+                        help="One-way latency in milliseconds of each hop (client-proxy, proxy-server)")
+    parser.add_argument('--runs', default=1, type=lambda value: validate_count(value, minimum=1),
+                        help="Repeat the session with consecutive seeds and report the totals")
+    parser.add_argument('--seed', default=0, type=validate_count, help="Seed of the first run")
+    parser.add_argument('--fec', default=None, type=validate_fec,
+                        help="FEC block size of the client, or 'auto' (default: no parity)")
+    return parser.parse_args()
+
+
+def parse_experiments():
+    parser = argparse.ArgumentParser(description="Run client/proxy/server trios over a parameter grid in parallel")
+    parser.add_argument('--grid', required=True, help="JSON parameter grid (see utils/experiment.py)")
+    parser.add_argument('--jobs', default=max(1, (os.cpu_count() or 1) // 3),
+                        type=lambda value: validate_count(value, minimum=1),
+                        help="Trios running at the same time (default: a third of the CPUs, one per process)")
+    parser.add_argument('--repeat', default=1, type=lambda value: validate_count(value, minimum=1),
+                        help="Run every combination this many times")
+    parser.add_argument('--output', default=None,
+                        help="Directory for the run directories and results.csv (default: experiments/<time>)")
+    parser.add_argument('--base-port', default=20000, type=validate_port,
+                        help="First port to hand out; each run uses the next three")
+    parser.add_argument('--run-timeout', default=600.0, type=validate_positive,
+                        help="Seconds before a client that has not finished is killed")
+    return parser.parse_args()
@@ -0,0 +1,278 @@
+"""
+Packet capture of proxy traffic in pcapng format.
+
+Every datagram is stored as a synthetic IPv4/UDP packet from its original sender to its final
+destination, so Wireshark and tcpdump show the client/server conversation as if the proxy were a
+wire. The proxy's verdict ("forwarded", "dropped" or "delayed") and the direction are stored in
+the packet comment (Wireshark filter: frame.comment contains "dropped"). Timestamps have
+nanosecond resolution and are taken when the packet actually left the proxy (or was dropped).
+"""
+import queue
+import socket
+import struct
+import threading
+import time
+
+LINKTYPE_IPV4 = 228  # Raw IPv4 packets, no link-layer header
+SNAPLEN = 0  # No limit
+FLUSH_INTERVAL = 0.5  # Seconds between flushes of the file buffer
+WRITE_BUFFER_BYTES = 1024 * 1024
+MAX_PENDING_RECORDS = 100000  # Records queued for the writer before new ones are discarded
+
+SECTION_HEADER_BLOCK = 0x0A0D0D0A
+INTERFACE_DESCRIPTION_BLOCK = 0x00000001
+ENHANCED_PACKET_BLOCK = 0x00000006
+BYTE_ORDER_MAGIC = 0x1A2B3C4D
+OPT_ENDOFOPT, OPT_COMMENT, OPT_IF_NAME, OPT_IF_TSRESOL = 0, 1, 2, 9
+
+
+def pad(data):
+    """Pad a block body to a multiple of four bytes."""
+    return data + b"\0" * (-len(data) % 4)
+
+
+def option(code, value):
+    return struct.pack("<HH", code, len(value)) + pad(value)
+
+
+def block(block_type, body):
+    total_length = 12 + len(body)
+    return struct.pack("<II", block_type, total_length) + body + struct.pack("<I", total_length)
+
+
+def ipv4_checksum(header):
+    total = sum(struct.unpack("!10H", header))
+    while total > 0xFFFF:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+def udp_packet(source, destination, payload, identification=0):
+    """
+    Wrap a payload in synthetic IPv4 and UDP headers.
+
+    Args:
+        source (tuple[str, int]): Sender address.
+        destination (tuple[str, int]): Receiver address.
+        payload (bytes): The UDP payload.
+        identification (int): IPv4 identification field.
+
+    Returns:
+        bytes: The IPv4 packet.
+    """
+    udp_length = 8 + len(payload)
+    header = struct.pack("!BBHHHBBH4s4s", 0x45, 0, 20 + udp_length, identification & 0xFFFF, 0x4000, 64,
+                         socket.IPPROTO_UDP, 0, socket.inet_aton(source[0]), socket.inet_aton(destination[0]))
+    header = header[:10] + struct.pack("!H", ipv4_checksum(header)) + header[12:]
+    # A zero UDP checksum means "not computed", which is valid over IPv4
+    return header + struct.pack("!HHHH", source[1], destination[1], udp_length, 0) + payload
+
+
+class PcapWriter:
+    """
+    Buffered pcapng writer fed from the forwarding threads.
+
+    record() only copies the datagram and queues it; a background thread builds the packet
+    blocks and writes them through a large file buffer that is flushed every FLUSH_INTERVAL
+    seconds. If the writer falls MAX_PENDING_RECORDS behind, new records are discarded (and
+    counted) rather than slowing down forwarding.
+    """
+
+    def __init__(self, path, interface="udp-proxy"):
+        self.path = path
+        self.file = open(path, "wb", buffering=WRITE_BUFFER_BYTES)
+        self.file.write(block(SECTION_HEADER_BLOCK, struct.pack("<IHHq", BYTE_ORDER_MAGIC, 1, 0, -1)))
+        options = (option(OPT_IF_NAME, interface.encode()) + option(OPT_IF_TSRESOL, bytes([9])) +
+                   option(OPT_ENDOFOPT, b""))  # Nanosecond timestamps
+        self.file.write(block(INTERFACE_DESCRIPTION_BLOCK, struct.pack("<HHI", LINKTYPE_IPV4, 0, SNAPLEN) + options))
+        self.pending = queue.SimpleQueue()
+        self.records = 0
+        self.bytes_written = 0
+        self.discarded = 0
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name="pcap-writer", daemon=True)
+        self.thread.start()
+
+    def record(self, source, destination, data, verdict, timestamp_ns=None):
+        """
+        Queue a datagram for capture.
+
+        Args:
+            source (tuple[str, int]): Original sender.
+            destination (tuple[str, int]): Final destination.
+            data (bytes-like): The datagram; copied, so pooled buffers can be released right after.
+            verdict (str): What the proxy did with it, stored as the packet comment.
+            timestamp_ns (int, optional): When it was sent or dropped. Defaults to now.
+        """
+        if self.closed:
+            return
+        if self.pending.qsize() >= MAX_PENDING_RECORDS:
+            self.discarded += 1
+            return
+        self.pending.put((timestamp_ns or time.time_ns(), source, destination, bytes(data), verdict))
+
+    def run(self):
+        identification = 0
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self.pending.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                item = None
+            if item is not None:
+                if item is StopIteration:
+                    break
+                timestamp_ns, source, destination, payload, verdict = item
+                identification += 1
+                packet = udp_packet(source, destination, payload, identification)
+                body = (struct.pack("<IIIII", 0, timestamp_ns >> 32, timestamp_ns & 0xFFFFFFFF, len(packet),
+                                    len(packet)) + pad(packet) +
+                        option(OPT_COMMENT, verdict.encode()) + option(OPT_ENDOFOPT, b""))
+                encoded = block(ENHANCED_PACKET_BLOCK, body)
+                self.file.write(encoded)
+                self.records += 1
+                self.bytes_written += len(encoded)
+            if time.monotonic() - last_flush >= FLUSH_INTERVAL:
+                self.file.flush()
+                last_flush = time.monotonic()
+        self.file.flush()
+
+    def close(self):
+        """Write out everything queued so far and close the file."""
+        if self.closed:
+            return
+        self.closed = True
+        self.pending.put(StopIteration)
+        self.thread.join()
+        self.file.close()
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "records": self.records,
+            "bytes": self.bytes_written,
+            "pending": self.pending.qsize(),
+            "discarded": self.discarded,
+        }
+
+
+# Bytes of link-layer header before the IP packet, by pcap link type
+LINK_HEADER_BYTES = {
+    0: 4,  # BSD loopback
+    1: 14,  # Ethernet
+    101: 0,  # Raw IP
+    113: 16,  # Linux cooked capture
+    228: 0,  # Raw IPv4
+    276: 20,  # Linux cooked capture v2
+}
+CLASSIC_MAGIC = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1000),  # Microsecond timestamps, little-endian
+    b"\xa1\xb2\xc3\xd4": (">", 1000),
+    b"\x4d\x3c\xb2\xa1": ("<", 1),  # Nanosecond timestamps
+    b"\xa1\xb2\x3c\x4d": (">", 1),
+}
+
+
+def parse_udp(frame, link_type):
+    """
+    Extract addresses and payload from a captured IPv4/UDP frame.
+
+    Returns:
+        tuple[tuple, tuple, bytes]: Source, destination and payload, or None for other traffic.
+    """
+    link_bytes = LINK_HEADER_BYTES.get(link_type)
+    if link_bytes is None:
+        return None
+    if link_type == 1 and frame[12:14] != b"\x08\x00":
+        return None  # Not IPv4 over Ethernet
+    packet = frame[link_bytes:]
+    if len(packet) < 28 or packet[0] >> 4 != 4 or packet[9] != socket.IPPROTO_UDP:
+        return None
+    header_length = (packet[0] & 0x0F) * 4
+    total_length = struct.unpack_from("!H", packet, 2)[0]
+    source_port, destination_port, udp_length = struct.unpack_from("!HHH", packet, header_length)
+    payload = packet[header_length + 8:min(header_length + udp_length, total_length)]
+    return ((socket.inet_ntoa(packet[12:16]), source_port), (socket.inet_ntoa(packet[16:20]), destination_port),
+            payload)
+
+
+def read_classic(data):
+    endian, scale = CLASSIC_MAGIC[data[:4]]
+    link_type = struct.unpack_from(endian + "I", data, 20)[0] & 0x0FFFFFFF
+    offset = 24
+    while offset + 16 <= len(data):
+        seconds, fraction, captured, _ = struct.unpack_from(endian + "IIII", data, offset)
+        frame = data[offset + 16:offset + 16 + captured]
+        offset += 16 + captured
+        udp = parse_udp(frame, link_type)
+        if udp is not None:
+            yield (seconds * 1_000_000_000 + fraction * scale,) + udp + ("",)
+
+
+def read_pcapng(data):
+    endian = "<"
+    interfaces = []  # (link type, nanoseconds per timestamp unit) of each interface in the section
+    offset = 0
+    while offset + 12 <= len(data):
+        block_type = struct.unpack_from(endian + "I", data, offset)[0]
+        if block_type == SECTION_HEADER_BLOCK:
+            endian = "<" if struct.unpack_from("<I", data, offset + 8)[0] == BYTE_ORDER_MAGIC else ">"
+            interfaces = []
+        total_length = struct.unpack_from(endian + "I", data, offset + 4)[0]
+        if total_length < 12 or offset + total_length > len(data):
+            raise ValueError(f"Truncated pcapng block at offset {offset}")
+        body = data[offset + 8:offset + total_length - 4]
+        offset += total_length
+
+        if block_type == INTERFACE_DESCRIPTION_BLOCK:
+            link_type = struct.unpack_from(endian + "H", body)[0]
+            resolution = 6
+            for code, value in read_options(body, 8, endian):
+                if code == OPT_IF_TSRESOL:
+                    resolution = value[0]
+            # The high bit selects a power of two instead of a power of ten
+            units_per_second = 2 ** (resolution & 0x7F) if resolution & 0x80 else 10 ** resolution
+            interfaces.append((link_type, 1_000_000_000 / units_per_second))
+        elif block_type == ENHANCED_PACKET_BLOCK:
+            interface, high, low, captured, _ = struct.unpack_from(endian + "IIIII", body)
+            link_type, unit_ns = interfaces[interface]
+            frame = body[20:20 + captured]
+            verdict = ""
+            for code, value in read_options(body, 20 + captured + (-captured % 4), endian):
+                if code == OPT_COMMENT:
+                    verdict = value.decode(errors="replace")
+            udp = parse_udp(frame, link_type)
+            if udp is not None:
+                yield (round(((high << 32) | low) * unit_ns),) + udp + (verdict,)
+
+
+def read_options(body, position, endian):
+    """Yield (code, value) pairs of the options starting at `position` in a block body."""
+    while position + 4 <= len(body):
+        code, length = struct.unpack_from(endian + "HH", body, position)
+        if code == OPT_ENDOFOPT:
+            return
+        yield code, body[position + 4:position + 4 + length]
+        position += 4 + length + (-length % 4)
+
+
+def read_capture(path):
+    """
+    Read the UDP datagrams of a capture: pcapng (including those written by PcapWriter) or
+    classic pcap, over Ethernet, raw IP or Linux cooked links. Other traffic is skipped.
+
+    Yields:
+        tuple[int, tuple, tuple, bytes, str]: Timestamp in nanoseconds, source and destination
+        addresses, UDP payload and the packet comment (the proxy's verdict, or "" if there is
+        none), in capture order.
+
+    Raises:
+        ValueError: If the file is not a pcap or pcapng capture.
+    """
+    with open(path, "rb") as capture_file:
+        data = capture_file.read()
+    if data[:4] in CLASSIC_MAGIC:
+        return read_classic(data)
+    if len(data) >= 12 and struct.unpack_from("<I", data)[0] == SECTION_HEADER_BLOCK:
+        return read_pcapng(data)
+    raise ValueError(f"{path} is not a pcap or pcapng capture")
@@ -0,0 +1,184 @@
+import os
+import signal
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+# Threads that the sampling profiler should look at (thread ident -> name)
+registered_threads = {}
+registry_lock = threading.Lock()
+
+# The currently running sampler, if any
+active_sampler = None
+DEFAULT_SAMPLE_INTERVAL_MS = 5
+
+
+def register_thread(name=None):
+    """Register the calling thread as a profiling target."""
+    thread = threading.current_thread()
+    with registry_lock:
+        registered_threads[thread.ident] = name or thread.name
+
+
+def describe_frame(frame):
+    """Return a short 'function (file:line)' label for a stack frame."""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Low-overhead statistical profiler for already-running threads.
+
+    A background thread periodically reads the stacks of the registered threads through
+    sys._current_frames() and counts identical stacks, so the profiled threads never need
+    to be restarted or instrumented.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            with registry_lock:
+                targets = dict(registered_threads)
+            frames = sys._current_frames()
+            for ident, name in targets.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(describe_frame(frame))
+                    frame = frame.f_back
+                stack.append(name)
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def dump(self, path):
+        """
+        Write the collected samples in collapsed-stack format (one 'stack count' line each),
+        which flamegraph.pl, speedscope and similar tools read directly.
+        """
+        with open(path, "w") as output:
+            for stack, count in self.samples.most_common():
+                output.write(f"{stack} {count}\n")
+
+
+def start_profiling(interval_ms=DEFAULT_SAMPLE_INTERVAL_MS):
+    """
+    Start sampling the registered threads.
+
+    Args:
+        interval_ms (float): Time between samples in milliseconds.
+
+    Raises:
+        RuntimeError: If profiling is already running.
+    """
+    global active_sampler
+    if active_sampler is not None:
+        raise RuntimeError("Profiling is already running.")
+    if interval_ms <= 0:
+        raise ValueError(f"Sample interval must be positive. Got: {interval_ms}")
+    active_sampler = SamplingProfiler(interval_ms / 1000)
+    active_sampler.start()
+
+
+def stop_profiling(path):
+    """
+    Stop sampling and write the collapsed stacks to a file.
+
+    Args:
+        path (str): Output file for the collapsed stacks.
+
+    Returns:
+        int: Number of sampling ticks taken.
+
+    Raises:
+        RuntimeError: If profiling is not running.
+        OSError: If the file cannot be written. Sampling stays stopped, but the samples are kept
+            so that stop_profiling() can be retried with another path.
+    """
+    global active_sampler
+    if active_sampler is None:
+        raise RuntimeError("Profiling is not running.")
+    active_sampler.stop()
+    active_sampler.dump(path)
+    sampler, active_sampler = active_sampler, None
+    return sampler.sample_count
+
+
+def is_profiling():
+    return active_sampler is not None
+
+
+def take_memory_snapshot(path, top=5):
+    """
+    Dump a tracemalloc snapshot to a file.
+
+    Tracing only sees allocations made after it starts, so the first call turns tracemalloc
+    on and returns None; later calls write a snapshot that tracemalloc.Snapshot.load() reads.
+
+    Args:
+        path (str): Output file for the snapshot.
+        top (int): Number of top allocation sites to summarize.
+
+    Returns:
+        list[str] or None: Summary lines for the largest allocation sites.
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        return None
+    snapshot = tracemalloc.take_snapshot()
+    snapshot.dump(path)
+    return [str(stat) for stat in snapshot.statistics("lineno")[:top]]
+
+
+def install_signal_handlers(component):
+    """
+    Let a running process be profiled from the shell (e.g. `kill -USR1 <pid>`).
+
+    SIGUSR1 starts sampling, and a second SIGUSR1 stops it and writes
+    '<component>_profile_<timestamp>.folded'. SIGUSR2 writes '<component>_memsnap_<timestamp>.tracemalloc'
+    (the first SIGUSR2 only turns tracemalloc on). Does nothing on platforms without these signals.
+
+    Args:
+        component (str): Prefix for the output file names (e.g. 'server').
+    """
+    if not hasattr(signal, "SIGUSR1"):
+        return
+
+    def toggle_profiling(signum, frame):
+        if not is_profiling():
+            start_profiling()
+            print(f"🔬 Profiling started. Send SIGUSR1 again to stop.")
+            return
+        path = f"{component}_profile_{datetime.now():%Y%m%d_%H%M%S}.folded"
+        samples = stop_profiling(path)
+        print(f"🔬 Profiling stopped after {samples} samples, written to {path}")
+
+    def dump_memory(signum, frame):
+        path = f"{component}_memsnap_{datetime.now():%Y%m%d_%H%M%S}.tracemalloc"
+        top_stats = take_memory_snapshot(path)
+        if top_stats is None:
+            print("🔬 tracemalloc started. Send SIGUSR2 again to capture a snapshot.")
+            return
+        print(f"🔬 Memory snapshot written to {path}")
+        for line in top_stats:
+            print(f"   {line}")
+
+    signal.signal(signal.SIGUSR1, toggle_profiling)
+    signal.signal(signal.SIGUSR2, dump_memory)
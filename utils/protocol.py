@@ -0,0 +1,358 @@
+"""
+Wire formats shared by the client, proxy and server.
+
+    <seq>:<message>                         single data message
+    BATCH:<first_seq>:<len1>,<len2>,...:<messages>
+                                            several messages with consecutive sequence numbers
+    FRAG:<seq>:<offset>:<total_len>:<bytes> one fragment of a message larger than one datagram
+    ACK:<seq>[:<window>]                    cumulative acknowledgment, with the receive window
+    RESEND_ACK:<seq>                        request to repeat an acknowledgment (also a window probe)
+    FEC:<first_seq>:<len1>,<len2>,...:<parity>
+                                            XOR parity of a block of data datagrams (see utils.fec)
+    HELLO:<codec>                           compression negotiation (client offer, server answer)
+    TERMINATE                               end of the client session
+
+The receive window is how many sequence numbers past <seq> the server is ready to take; a
+client may send up to <seq> + <window> and waits, probing with RESEND_ACK, while it is zero.
+ACKs without a window (from older servers) leave the client's window unchanged.
+
+A message whose payload is compressed carries COMPRESSION_FLAG after its sequence number
+('<seq>z:', 'FRAG:<seq>z:...') or, inside a BATCH, after its length ('12,40z,3'). Compression
+is only used once the server has answered the client's HELLO with a codec.
+
+Headers are ASCII so the proxy can read sequence numbers without touching the payloads. The
+parsers accept any bytes-like object, including memoryviews of pooled receive buffers, and only
+copy the header.
+"""
+import time
+import zlib
+
+BATCH_PREFIX = b"BATCH:"
+FRAG_PREFIX = b"FRAG:"
+DEFAULT_MTU_BYTES = 1400  # Fits in a typical 1500-byte Ethernet MTU after IP/UDP headers
+DEFAULT_BATCH_BYTES = DEFAULT_MTU_BYTES
+HEADER_PEEK_BYTES = 64  # Enough to classify a datagram and read its sequence number
+
+ACK_PREFIX = b"ACK:"
+DEFAULT_RECEIVE_WINDOW = 1024  # Messages the server buffers out of order, and its initial advertised window
+HELLO_PREFIX = b"HELLO:"
+COMPRESSION_FLAG = b"z"
+COMPRESSION_CODECS = ("zlib",)  # Codecs this build can negotiate, in order of preference
+NO_COMPRESSION = "none"
+DEFAULT_COMPRESSION_THRESHOLD = 256  # Smaller messages are sent as they are
+MAX_DECOMPRESSED_BYTES = 16 * 1024 * 1024  # Refuse payloads that inflate beyond this
+
+
+def compress_payload(payload, threshold=DEFAULT_COMPRESSION_THRESHOLD):
+    """
+    Compress a message payload with zlib if it is large enough and compression pays off.
+
+    Returns:
+        tuple[bytes, bool]: The payload to send and whether it was compressed.
+    """
+    if len(payload) < threshold:
+        return payload, False
+    compressed = zlib.compress(payload)
+    if len(compressed) >= len(payload):
+        return payload, False
+    return compressed, True
+
+
+def decompress_payload(payload, limit=MAX_DECOMPRESSED_BYTES):
+    """
+    Inflate a compressed payload.
+
+    Raises:
+        ValueError: If the payload is corrupt or inflates to more than `limit` bytes.
+    """
+    inflater = zlib.decompressobj()
+    try:
+        message = inflater.decompress(payload, limit)
+    except zlib.error as e:
+        raise ValueError(f"Corrupt compressed payload: {e}")
+    if inflater.unconsumed_tail or not inflater.eof:
+        raise ValueError(f"Compressed payload is truncated or larger than {limit} bytes")
+    return message
+
+
+def parse_sequence(field):
+    """
+    Parse a sequence number (or BATCH length) header field.
+
+    Returns:
+        tuple[int, bool]: The number and whether the payload it describes is compressed.
+    """
+    if field.endswith(COMPRESSION_FLAG):
+        return int(field[:-1]), True
+    return int(field), False
+
+
+def encode_message(sequence_number, payload, compressed=False):
+    """Frame a single message as '<seq>:<payload>', flagging compressed payloads."""
+    return b"%d%s:%s" % (sequence_number, COMPRESSION_FLAG if compressed else b"", payload)
+
+
+def decode_message(data):
+    """
+    Parse a single '<seq>:<payload>' datagram, inflating compressed payloads.
+
+    Returns:
+        tuple[int, bytes]: The sequence number and the message payload.
+
+    Raises:
+        ValueError: If the datagram is malformed.
+    """
+    (sequence_number,), payload = split_header(data, 1)
+    sequence_number, compressed = parse_sequence(sequence_number)
+    return sequence_number, decompress_payload(payload) if compressed else bytes(payload)
+
+
+def split_header(data, fields):
+    """
+    Split the first `fields` colon-terminated header fields off a datagram.
+
+    Args:
+        data (bytes-like): The datagram (bytes, bytearray or memoryview).
+        fields (int): Number of header fields, including the prefix.
+
+    Returns:
+        tuple[list[bytes], memoryview]: The header fields and a view of the remaining payload.
+
+    Raises:
+        ValueError: If the datagram ends before the header does.
+    """
+    view = memoryview(data)
+    limit = HEADER_PEEK_BYTES
+    while True:
+        head = bytes(view[:limit])
+        parts = head.split(b":", fields)
+        if len(parts) > fields:
+            return parts[:fields], view[len(head) - len(parts[-1]):]
+        if limit >= len(view):
+            raise ValueError("Truncated header")
+        limit *= 4
+
+
+def encode_batch(first_sequence, messages, compressed=None):
+    """
+    Pack messages with consecutive sequence numbers into one BATCH datagram.
+
+    Args:
+        first_sequence (int): Sequence number of the first message.
+        messages (list[bytes]): Encoded message payloads, in sequence order.
+        compressed (list[bool], optional): Which payloads are compressed.
+
+    Returns:
+        bytes: The framed datagram.
+    """
+    flags = compressed or [False] * len(messages)
+    lengths = ",".join(f"{len(message)}{'z' if flag else ''}" for message, flag in zip(messages, flags))
+    return b"%s%d:%s:%s" % (BATCH_PREFIX, first_sequence, lengths.encode(), b"".join(messages))
+
+
+def decode_batch(data):
+    """
+    Unpack a BATCH datagram.
+
+    Args:
+        data (bytes-like): The datagram, starting with BATCH_PREFIX.
+
+    Returns:
+        list[tuple[int, memoryview]]: (sequence number, payload view) pairs in sequence order.
+        Compressed payloads are inflated into bytes.
+
+    Raises:
+        ValueError: If the header is malformed or the lengths do not match the payload.
+    """
+    (_, first_sequence, lengths), body = split_header(data, 3)
+    sequence_number = int(first_sequence)
+    messages = []
+    offset = 0
+    for length, compressed in map(parse_sequence, lengths.split(b",")):
+        if length < 0 or offset + length > len(body):
+            raise ValueError("BATCH lengths exceed the datagram size")
+        payload = body[offset:offset + length]
+        messages.append((sequence_number, decompress_payload(payload) if compressed else payload))
+        sequence_number += 1
+        offset += length
+    if offset != len(body):
+        raise ValueError("BATCH lengths do not cover the datagram")
+    return messages
+
+
+def batch_sequence_range(data):
+    """Return the (first, last) sequence numbers of a BATCH datagram without unpacking it."""
+    (_, first_sequence, lengths), _ = split_header(data, 3)
+    first_sequence = int(first_sequence)
+    return first_sequence, first_sequence + lengths.count(b",")
+
+
+def batch_overhead(first_sequence, count):
+    """Upper bound for the bytes a BATCH header adds on top of `count` payloads."""
+    return len(BATCH_PREFIX) + len(str(first_sequence)) + 2 + count * 7  # Up to 5 digits, flag and comma each
+
+
+class MessageCoalescer:
+    """
+    Collects consecutive messages into BATCH datagrams.
+
+    A batch is closed when the next message would push it past `max_bytes`, or once `linger`
+    seconds have passed since its first message (checked by the caller through due()).
+    A batch holding a single message is sent in the plain '<seq>:<message>' format.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_BATCH_BYTES, linger=0.0):
+        self.max_bytes = max_bytes
+        self.linger = linger
+        self.pending = []
+        self.compressed = []  # Per-message compression flags of the pending batch
+        self.first_sequence = None
+        self.size = 0
+        self.deadline = None
+
+    def add(self, sequence_number, message, compressed=False):
+        """
+        Queue a message (its payload, compressed if `compressed` is set).
+
+        Returns:
+            list[tuple[int, int, bytes]]: Datagrams closed by this message, as (first sequence,
+            last sequence, datagram) tuples.
+        """
+        closed = []
+        if self.pending and (sequence_number != self.first_sequence + len(self.pending) or
+                             batch_overhead(self.first_sequence, len(self.pending) + 1) + self.size +
+                             len(message) > self.max_bytes):
+            closed.append(self.flush())
+        if not self.pending:
+            self.first_sequence = sequence_number
+            self.deadline = time.monotonic() + self.linger
+        self.pending.append(message)
+        self.compressed.append(compressed)
+        self.size += len(message)
+        return closed
+
+    def due(self, now=None):
+        """Return True if the pending batch has lingered long enough to be sent."""
+        return bool(self.pending) and (now if now is not None else time.monotonic()) >= self.deadline
+
+    def flush(self):
+        """Close the pending batch. Returns (first sequence, last sequence, datagram) or None."""
+        if not self.pending:
+            return None
+        first_sequence, messages, compressed = self.first_sequence, self.pending, self.compressed
+        self.pending, self.compressed, self.first_sequence, self.size, self.deadline = [], [], None, 0, None
+        if len(messages) == 1:
+            return first_sequence, first_sequence, encode_message(first_sequence, messages[0], compressed[0])
+        return (first_sequence, first_sequence + len(messages) - 1,
+                encode_batch(first_sequence, messages, compressed))
+
+
+def encode_fragments(sequence_number, payload, max_datagram=DEFAULT_MTU_BYTES, compressed=False):
+    """
+    Split a payload into FRAG datagrams of at most `max_datagram` bytes each.
+
+    Args:
+        sequence_number (int): Sequence number shared by all fragments.
+        payload (bytes): The message payload.
+        max_datagram (int): Size limit for each datagram, header included.
+        compressed (bool): Whether the payload is compressed (flagged on every fragment).
+
+    Returns:
+        list[bytes]: The fragments, in offset order.
+    """
+    total = len(payload)
+    sequence_field = b"%d%s" % (sequence_number, COMPRESSION_FLAG if compressed else b"")
+    # Size the chunks for the longest possible header so every fragment fits
+    chunk_size = max_datagram - len(b"%s%s:%d:%d:" % (FRAG_PREFIX, sequence_field, total, total))
+    if chunk_size <= 0:
+        raise ValueError(f"Datagram size {max_datagram} is too small for a fragment header")
+    view = memoryview(payload)
+    return [b"%s%s:%d:%d:%s" % (FRAG_PREFIX, sequence_field, offset, total, view[offset:offset + chunk_size])
+            for offset in range(0, total, chunk_size)]
+
+
+def parse_fragment(data):
+    """
+    Parse a FRAG datagram (bytes-like) without copying its payload.
+
+    Returns:
+        tuple[int, int, int, memoryview, bool]: Sequence number, offset, total (possibly compressed)
+        payload length, a view of the fragment bytes and whether the payload is compressed.
+
+    Raises:
+        ValueError: If the header is malformed.
+    """
+    (_, sequence_number, offset, total), fragment = split_header(data, 4)
+    sequence_number, compressed = parse_sequence(sequence_number)
+    return sequence_number, int(offset), int(total), fragment, compressed
+
+
+def build_datagrams(messages, sequence_number, batch_bytes=0, mtu=DEFAULT_MTU_BYTES, compress_threshold=None):
+    """
+    Turn messages (str, or UTF-8 bytes) into datagrams. Consecutive small messages are coalesced
+    into BATCH datagrams of at most `batch_bytes` bytes when batching is enabled, and messages
+    that do not fit in `mtu` bytes are split into FRAG datagrams. With a `compress_threshold`,
+    messages at least that long are compressed first (and flagged) when it makes them smaller.
+
+    Returns:
+        list[tuple[int, int, list[bytes]]]: (first sequence, last sequence, datagrams) units. The
+        window and retransmissions work on whole units, so all fragments of a message travel together.
+    """
+    coalescer = MessageCoalescer(min(batch_bytes, mtu)) if batch_bytes else None
+    units = []
+
+    def close_batch():
+        if coalescer is not None and coalescer.pending:
+            first, last, datagram = coalescer.flush()
+            units.append((first, last, [datagram]))
+
+    for seq, message in enumerate(messages, sequence_number):
+        payload, compressed = message.encode() if isinstance(message, str) else bytes(message), False
+        if compress_threshold is not None:
+            payload, compressed = compress_payload(payload, compress_threshold)
+        datagram = encode_message(seq, payload, compressed)
+        if len(datagram) > mtu:
+            close_batch()
+            units.append((seq, seq, encode_fragments(seq, payload, mtu, compressed)))
+        elif coalescer is not None:
+            units.extend((first, last, [batched]) for first, last, batched in coalescer.add(seq, payload, compressed))
+        else:
+            units.append((seq, seq, [datagram]))
+    close_batch()
+    return units
+
+
+def advertise_window(ack_message, window):
+    """Append the receive window to an acknowledgment ('ACK:<seq>' -> 'ACK:<seq>:<window>')."""
+    return f"{ack_message}:{window}"
+
+
+def parse_ack(data):
+    """
+    Parse an acknowledgment.
+
+    Returns:
+        tuple[int, int or None]: The acknowledged sequence number and the advertised receive
+        window, or None if the ACK carries none.
+
+    Raises:
+        ValueError: If the datagram is not a well-formed ACK.
+    """
+    data = bytes(data[:HEADER_PEEK_BYTES])
+    if not data.startswith(ACK_PREFIX):
+        raise ValueError("Not an acknowledgment")
+    sequence_number, _, window = data[len(ACK_PREFIX):].partition(b":")
+    return int(sequence_number), int(window) if window else None
+
+
+def negotiate_compression(offer, supported=COMPRESSION_CODECS):
+    """
+    Pick the codec for a session from the client's HELLO offer ('zlib' or 'zlib,lz4', ...).
+
+    Returns:
+        str: The first offered codec that is supported, or NO_COMPRESSION.
+    """
+    for codec in offer.split(","):
+        if codec.strip() in supported:
+            return codec.strip()
+    return NO_COMPRESSION
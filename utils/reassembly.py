@@ -0,0 +1,108 @@
+import time
+
+REASSEMBLY_TIMEOUT = 5.0  # Seconds without progress before a partial message is discarded
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024  # Largest message the server agrees to reassemble
+MAX_REASSEMBLY_BYTES = 64 * 1024 * 1024  # Memory budget for all partial messages together
+
+
+class PartialMessage:
+    """A message being reassembled: one preallocated buffer plus the offsets already filled."""
+
+    __slots__ = ("buffer", "view", "received", "offsets", "deadline")
+
+    def __init__(self, total, deadline):
+        self.buffer = bytearray(total)
+        self.view = memoryview(self.buffer)
+        self.received = 0
+        self.offsets = set()
+        self.deadline = deadline
+
+
+class Reassembler:
+    """
+    Reassembles FRAG datagrams.
+
+    Each message gets a bytearray of its final size as soon as its first fragment arrives, and
+    fragments are copied straight into place through memoryview slices, so no intermediate
+    bytes objects are concatenated. Retransmitted fragments are ignored, partial messages that
+    stop making progress expire, and the total buffered size is capped.
+    """
+
+    def __init__(self, timeout=REASSEMBLY_TIMEOUT, max_bytes=MAX_REASSEMBLY_BYTES, max_message=MAX_MESSAGE_BYTES):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_message = max_message
+        self.partial = {}  # Maps sequence numbers to PartialMessage
+        self.buffered_bytes = 0
+
+    def add(self, sequence_number, offset, total, fragment, now=None):
+        """
+        Store a fragment.
+
+        Args:
+            sequence_number (int): Sequence number of the message.
+            offset (int): Position of the fragment in the message.
+            total (int): Total message length.
+            fragment (memoryview): The fragment bytes.
+            now (float, optional): Current time.monotonic() value.
+
+        Returns:
+            bytearray or None: The complete message once the last fragment arrived, else None.
+
+        Raises:
+            ValueError: If the fragment is inconsistent or would exceed the memory limits.
+        """
+        now = time.monotonic() if now is None else now
+        partial = self.partial.get(sequence_number)
+        if partial is None:
+            if total > self.max_message:
+                raise ValueError(f"Message of {total} bytes exceeds the {self.max_message}-byte limit")
+            if self.buffered_bytes + total > self.max_bytes:
+                self.expire(now)
+                if self.buffered_bytes + total > self.max_bytes:
+                    raise ValueError(f"Reassembly memory limit of {self.max_bytes} bytes reached")
+            partial = self.partial[sequence_number] = PartialMessage(total, now + self.timeout)
+            self.buffered_bytes += total
+        elif len(partial.buffer) != total:
+            raise ValueError(f"Fragment length {total} does not match the message length {len(partial.buffer)}")
+
+        end = offset + len(fragment)
+        if offset < 0 or end > total:
+            raise ValueError(f"Fragment {offset}-{end} lies outside the {total}-byte message")
+        if offset in partial.offsets:
+            return None  # Retransmitted fragment
+
+        partial.view[offset:end] = fragment
+        partial.offsets.add(offset)
+        partial.received += len(fragment)
+        partial.deadline = now + self.timeout
+        if partial.received < total:
+            return None
+
+        del self.partial[sequence_number]
+        self.buffered_bytes -= total
+        partial.view.release()
+        return partial.buffer
+
+    def expire(self, now=None):
+        """
+        Discard partial messages that made no progress within the timeout.
+
+        Returns:
+            list[int]: Sequence numbers of the discarded messages.
+        """
+        now = time.monotonic() if now is None else now
+        expired = [seq for seq, partial in self.partial.items() if partial.deadline <= now]
+        for seq in expired:
+            self.discard(seq)
+        return expired
+
+    def discard(self, sequence_number):
+        partial = self.partial.pop(sequence_number, None)
+        if partial is not None:
+            self.buffered_bytes -= len(partial.buffer)
+            partial.view.release()
+
+    def clear(self):
+        for seq in list(self.partial):
+            self.discard(seq)
@@ -0,0 +1,285 @@
+"""
+Per-flow impairment rules for the proxy.
+
+A rule table is a JSON document with an ordered list of rules. Each rule matches packets on
+their flow (addresses and ports of the sender and receiver) and type, and overrides some of the
+proxy parameters for the packets it matches:
+
+    {
+      "rules": [
+        {"match": {"type": "ack"}, "set": {"server-drop": 0.5}},
+        {"match": {"src-port": "40000-40099", "type": ["data", "batch"]},
+         "set": {"client-delay": 1.0, "client-delay-time": "200-400"}}
+      ]
+    }
+
+Match fields are "direction" ("client-to-server" or "server-to-client"), "type" (one of
+PACKET_TYPES), "src-ip", "dst-ip", "src-port" and "dst-port"; a field can list several values and
+ports can be 'min-max' ranges. A missing field matches anything. The first matching rule wins,
+and parameters it does not set keep their global value (SET, schedules).
+
+The table is compiled so a lookup costs the same however many rules there are: for every field,
+an exact-match dict (addresses, direction, type) or a sorted list of port boundaries maps the
+packet's value to the bitmask of the rules it satisfies, and the lowest bit of the AND of the
+masks is the first matching rule. The result is cached per flow. Edits build a new table and
+swap it in with one assignment, so the data path never sees a half-edited table.
+"""
+import ipaddress
+import json
+import threading
+from bisect import bisect_right
+
+from utils.schedule import parse_value
+
+DIRECTIONS = ("client-to-server", "server-to-client")
+PACKET_TYPES = ("data", "batch", "frag", "fec", "ack", "resend_ack")
+EXACT_FIELDS = ("direction", "type", "src-ip", "dst-ip")
+PORT_FIELDS = ("src-port", "dst-port")
+MAX_PORT = 65535
+FLOW_CACHE_SIZE = 4096  # Flows remembered per table before the cache starts over
+
+
+def parse_exact(field, value):
+    """Validate the accepted values of an exact-match field. Returns them as a tuple of strings."""
+    values = value if isinstance(value, list) else [value]
+    if not values:
+        raise ValueError(f"{field} needs at least one value")
+    parsed = []
+    for item in values:
+        item = str(item)
+        if field == "direction" and item not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}. Got: {item}")
+        if field == "type" and item not in PACKET_TYPES:
+            raise ValueError(f"type must be one of {', '.join(PACKET_TYPES)}. Got: {item}")
+        if field in ("src-ip", "dst-ip"):
+            item = str(ipaddress.IPv4Address(item))
+        parsed.append(item)
+    return tuple(parsed)
+
+
+def parse_ports(field, value):
+    """Validate ports and 'min-max' port ranges. Returns them as a tuple of (min, max) ranges."""
+    values = value if isinstance(value, list) else [value]
+    if not values:
+        raise ValueError(f"{field} needs at least one value")
+    ranges = []
+    for item in values:
+        bounds = str(item).split("-") if "-" in str(item) else [item, item]
+        if len(bounds) != 2:
+            raise ValueError(f"{field} must be a port or a 'min-max' range. Got: {item}")
+        low, high = int(bounds[0]), int(bounds[1])
+        if not 0 <= low <= high <= MAX_PORT:
+            raise ValueError(f"{field} must be within 0-{MAX_PORT} with min <= max. Got: {item}")
+        ranges.append((low, high))
+    return tuple(ranges)
+
+
+class Rule:
+    """A validated rule: what it matches and the proxy parameters it overrides."""
+
+    def __init__(self, spec, index=0):
+        if not isinstance(spec, dict) or not isinstance(spec.get("set"), dict) or not spec["set"]:
+            raise ValueError(f"A rule needs a 'set' of parameters: {spec}")
+        match = spec.get("match", {})
+        if not isinstance(match, dict):
+            raise ValueError(f"A rule's 'match' must be an object: {spec}")
+        self.match = {}
+        for field, value in match.items():
+            if field in EXACT_FIELDS:
+                self.match[field] = parse_exact(field, value)
+            elif field in PORT_FIELDS:
+                self.match[field] = parse_ports(field, value)
+            else:
+                raise ValueError(f"Invalid match field: {field}")
+        self.settings = {param: parse_value(param, value) for param, value in spec["set"].items()}
+        self.spec = spec
+        self.index = index  # Position in its table
+
+    def matches(self, direction, packet_type, source, destination):
+        """Match a packet field by field (the reference the compiled table must agree with)."""
+        packet = {"direction": direction, "type": packet_type, "src-ip": source[0], "dst-ip": destination[0],
+                  "src-port": source[1], "dst-port": destination[1]}
+        for field, accepted in self.match.items():
+            if field in PORT_FIELDS:
+                if not any(low <= packet[field] <= high for low, high in accepted):
+                    return False
+            elif packet[field] not in accepted:
+                return False
+        return True
+
+
+class RuleTable:
+    """
+    An ordered list of rules, compiled for constant-time lookups.
+
+    Args:
+        specs (list[dict]): Rules as in the JSON document, highest priority first.
+
+    Raises:
+        ValueError: If a rule is invalid.
+    """
+
+    def __init__(self, specs):
+        self.rules = [Rule(spec, index) for index, spec in enumerate(specs)]
+        self.flows = {}  # Maps (direction, type, source, destination) to the matching Rule or None
+        self.exact = {field: self.compile_exact(field) for field in EXACT_FIELDS}
+        self.ranges = {field: self.compile_ports(field) for field in PORT_FIELDS}
+
+    @classmethod
+    def load(cls, path):
+        """Read a rule table from a JSON file. Raises ValueError or OSError on invalid tables."""
+        with open(path) as rules_file:
+            data = json.load(rules_file)
+        if isinstance(data, dict):
+            data = data.get("rules", [])
+        if not isinstance(data, list):
+            raise ValueError("A rule table is a list of rules")
+        return cls(data)
+
+    def wildcard_mask(self, field):
+        """Bitmask of the rules that do not constrain `field`."""
+        return sum(1 << index for index, rule in enumerate(self.rules) if field not in rule.match)
+
+    def compile_exact(self, field):
+        """Returns (dict of value -> mask of the rules accepting it, mask for any other value)."""
+        wildcard = self.wildcard_mask(field)
+        masks = {}
+        for index, rule in enumerate(self.rules):
+            for value in rule.match.get(field, ()):
+                masks[value] = masks.get(value, wildcard) | 1 << index
+        return masks, wildcard
+
+    def compile_ports(self, field):
+        """Returns (sorted segment starts, mask of the rules accepting each segment's ports)."""
+        wildcard = self.wildcard_mask(field)
+        starts = {0}
+        for rule in self.rules:
+            for low, high in rule.match.get(field, ()):
+                starts.add(low)
+                if high < MAX_PORT:
+                    starts.add(high + 1)
+        starts = sorted(starts)
+        masks = []
+        for start in starts:
+            mask = wildcard
+            for index, rule in enumerate(self.rules):
+                if any(low <= start <= high for low, high in rule.match.get(field, ())):
+                    mask |= 1 << index
+            masks.append(mask)
+        return starts, masks
+
+    def classify(self, direction, packet_type, source, destination):
+        """Find the first rule matching a packet, without the flow cache."""
+        mask = (1 << len(self.rules)) - 1
+        for field, value in (("direction", direction), ("type", packet_type), ("src-ip", source[0]),
+                             ("dst-ip", destination[0])):
+            masks, wildcard = self.exact[field]
+            mask &= masks.get(value, wildcard)
+        for field, port in (("src-port", source[1]), ("dst-port", destination[1])):
+            starts, masks = self.ranges[field]
+            mask &= masks[bisect_right(starts, port) - 1]
+        if not mask:
+            return None
+        return self.rules[(mask & -mask).bit_length() - 1]  # Lowest bit: the earliest rule
+
+    def lookup(self, direction, packet_type, source, destination):
+        """
+        Find the rule for a packet.
+
+        Args:
+            direction (str): "client-to-server" or "server-to-client".
+            packet_type (str): One of PACKET_TYPES.
+            source (tuple[str, int]): Address the packet came from.
+            destination (tuple[str, int]): Address the packet is sent to.
+
+        Returns:
+            Rule or None: The first matching rule, or None to use the global parameters.
+        """
+        if not self.rules:
+            return None
+        flow = (direction, packet_type, source, destination)
+        rule = self.flows.get(flow, self)  # The table itself marks flows not looked up yet
+        if rule is self:
+            rule = self.classify(direction, packet_type, source, destination)
+            if len(self.flows) >= FLOW_CACHE_SIZE:
+                self.flows.clear()
+            self.flows[flow] = rule
+        return rule
+
+    def status(self):
+        return {
+            "rules": [dict(rule.spec, index=rule.index) for rule in self.rules],
+            "cached_flows": len(self.flows),
+        }
+
+
+# The table the proxy applies; replaced as a whole, so readers need no lock
+active_table = RuleTable([])
+# Serializes edits, so two concurrent edits cannot lose one another
+rules_lock = threading.Lock()
+
+
+def install_rules(specs):
+    """Compile `specs` and make them the active table. Raises ValueError, leaving the table as it was."""
+    global active_table
+    table = RuleTable(specs)
+    active_table = table
+    return table
+
+
+def load_rules(path):
+    """
+    Replace the active table with the rules of a JSON file.
+
+    Returns:
+        RuleTable: The new table.
+
+    Raises:
+        ValueError, OSError: If the file cannot be read or a rule is invalid.
+    """
+    global active_table
+    table = RuleTable.load(path)
+    with rules_lock:
+        active_table = table
+    return table
+
+
+def add_rule(spec, position=None):
+    """Insert a rule (at the end by default). Raises ValueError if it is invalid."""
+    with rules_lock:
+        specs = [rule.spec for rule in active_table.rules]
+        specs.insert(len(specs) if position is None else position, spec)
+        return install_rules(specs)
+
+
+def delete_rule(index):
+    """Remove the rule at `index`. Raises IndexError if there is none (negative indexes included)."""
+    with rules_lock:
+        specs = [rule.spec for rule in active_table.rules]
+        if not 0 <= index < len(specs):
+            raise IndexError(f"no rule {index}; indexes run from 0 to {len(specs) - 1}")
+        del specs[index]
+        return install_rules(specs)
+
+
+def clear_rules():
+    """Remove every rule. Returns the number of rules removed."""
+    with rules_lock:
+        removed = len(active_table.rules)
+        install_rules([])
+    return removed
+
+
+def rule_specs():
+    """The specs of the active rules, in order, as they were given."""
+    return [rule.spec for rule in active_table.rules]
+
+
+def match_flow(direction, packet_type, source, destination):
+    """Find the active rule for a packet (see RuleTable.lookup)."""
+    return active_table.lookup(direction, packet_type, source, destination)
+
+
+def rules_status():
+    """The active rules and the number of flows cached, as a dictionary."""
+    return active_table.status()
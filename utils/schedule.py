@@ -0,0 +1,229 @@
+"""
+Time-varying impairment profiles for the proxy.
+
+A profile is a JSON document with a timeline of steps, applied relative to the moment it is loaded:
+
+    {
+      "loop": false,
+      "steps": [
+        {"at": 0, "set": {"client-drop": 0.0, "client-delay-time": "100-200"}},
+        {"at": 10, "ramp": {"client-drop": 0.3}, "duration": 60},
+        {"at": 80, "set": {"client-delay": 0.5, "client-delay-time": [200, 600]}}
+      ]
+    }
+
+"set" changes parameters at `at` seconds; "ramp" moves them linearly from their current value to
+the target over `duration` seconds. Every change of a tick is applied to proxy_config in a
+single locked update, so the data path never sees half of a multi-parameter step.
+"""
+import json
+import threading
+import time
+
+from utils.events import publish_config
+from utils.logger import control_logger
+
+DELAY_TIME_PARAMS = ("client-delay-time", "server-delay-time")
+CHANCE_PARAMS = ("client-drop", "server-drop", "client-delay", "server-delay")
+RAMP_TICK = 0.1  # Seconds between updates while a ramp is in progress
+
+# The schedule currently driving the proxy, if any
+active_runner = None
+
+
+def parse_value(param, value):
+    """
+    Validate a profile value for a proxy parameter.
+
+    Raises:
+        ValueError: If the parameter is unknown or the value is out of range.
+    """
+    if param in CHANCE_PARAMS:
+        chance = float(value)
+        if not 0.0 <= chance <= 1.0:
+            raise ValueError(f"{param} must be between 0.0 and 1.0. Got: {value}")
+        return chance
+    if param in DELAY_TIME_PARAMS:
+        if isinstance(value, str):
+            bounds = value.split("-") if "-" in value else [value, value]
+        elif isinstance(value, (list, tuple)):
+            bounds = value
+        else:
+            bounds = [value, value]
+        if len(bounds) != 2:
+            raise ValueError(f"{param} must be a delay or a 'min-max' range. Got: {value}")
+        min_val, max_val = int(bounds[0]), int(bounds[1])
+        if min_val < 0 or min_val > max_val:
+            raise ValueError(f"{param} must be non-negative with min <= max. Got: {value}")
+        return min_val, max_val
+    raise ValueError(f"Invalid parameter: {param}")
+
+
+def interpolate(start, end, fraction):
+    """Linear interpolation for chances (floats) and delay ranges (int tuples)."""
+    if isinstance(start, tuple):
+        return tuple(round(a + (b - a) * fraction) for a, b in zip(start, end))
+    return round(start + (end - start) * fraction, 4)
+
+
+class ImpairmentSchedule:
+    """A validated timeline of 'set' and 'ramp' steps."""
+
+    def __init__(self, steps, loop=False):
+        self.steps = []
+        for step in sorted(steps, key=lambda item: float(item.get("at", 0))):
+            at = float(step.get("at", 0))
+            duration = float(step.get("duration", 0))
+            if at < 0 or duration < 0:
+                raise ValueError(f"Step times must be non-negative: {step}")
+            if "set" in step:
+                kind, values = "set", step["set"]
+            elif "ramp" in step:
+                if duration <= 0:
+                    raise ValueError(f"A ramp needs a positive duration: {step}")
+                kind, values = "ramp", step["ramp"]
+            else:
+                raise ValueError(f"A step needs 'set' or 'ramp': {step}")
+            parsed = {param: parse_value(param, value) for param, value in values.items()}
+            self.steps.append((at, duration, kind, parsed))
+        if not self.steps:
+            raise ValueError("A profile needs at least one step")
+        self.loop = loop
+        self.duration = max(at + duration for at, duration, _, _ in self.steps)
+
+    @classmethod
+    def load(cls, path):
+        """Read a profile from a JSON file. Raises ValueError or OSError on invalid profiles."""
+        with open(path) as profile_file:
+            data = json.load(profile_file)
+        if isinstance(data, list):
+            data = {"steps": data}
+        return cls(data.get("steps", []), bool(data.get("loop", False)))
+
+    def values_at(self, elapsed, initial):
+        """
+        Compute the scheduled parameter values.
+
+        Args:
+            elapsed (float): Seconds since the schedule started.
+            initial (dict): Parameter values when the schedule started.
+
+        Returns:
+            dict: Values for every parameter the timeline has touched by `elapsed`.
+        """
+        if self.loop and self.duration > 0:
+            elapsed %= self.duration
+        current = {}
+        for at, duration, kind, values in self.steps:
+            if elapsed < at:
+                break
+            for param, target in values.items():
+                if kind == "set" or elapsed >= at + duration:
+                    current[param] = target
+                else:
+                    start = current.get(param, initial[param])
+                    current[param] = interpolate(start, target, (elapsed - at) / duration)
+        return current
+
+    def next_wakeup(self, elapsed):
+        """Seconds until the schedule can change again, or None once it is finished."""
+        position = elapsed % self.duration if self.loop and self.duration > 0 else elapsed
+        if any(at <= position < at + duration for at, duration, kind, _ in self.steps if kind == "ramp"):
+            return RAMP_TICK
+        upcoming = [at - position for at, _, _, _ in self.steps if at > position]
+        if upcoming:
+            return min(upcoming)
+        if self.loop:
+            return max(self.duration - position, RAMP_TICK)
+        return None
+
+
+class ScheduleRunner:
+    """Drives proxy_config from an ImpairmentSchedule with a single timer thread."""
+
+    def __init__(self, schedule, proxy_config, config_lock, name="profile"):
+        self.schedule = schedule
+        self.proxy_config = proxy_config
+        self.config_lock = config_lock
+        self.name = name
+        self.started = None
+        self.updates = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="impairment-schedule", daemon=True)
+
+    def start(self):
+        self.started = time.monotonic()
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def run(self):
+        with self.config_lock:
+            initial = dict(self.proxy_config)
+        wait = 0.0
+        while not self.stop_event.wait(wait):
+            elapsed = self.elapsed()
+            scheduled = self.schedule.values_at(elapsed, initial)
+            with self.config_lock:
+                changes = {param: value for param, value in scheduled.items() if self.proxy_config[param] != value}
+                previous = {param: self.proxy_config[param] for param in changes}
+                self.proxy_config.update(changes)
+            if changes:
+                self.updates += 1
+                control_logger.info(f"Schedule '{self.name}' at {elapsed:.1f}s applied {changes}")
+                for param, value in changes.items():
+                    publish_config(param, previous[param], value, "SCHEDULE")
+            wait = self.schedule.next_wakeup(elapsed)
+            if wait is None:
+                control_logger.info(f"Schedule '{self.name}' finished after {self.updates} update(s)")
+                break
+
+    def status(self):
+        return {
+            "name": self.name,
+            "elapsed": round(self.elapsed(), 2),
+            "duration": self.schedule.duration,
+            "loop": self.schedule.loop,
+            "running": self.thread.is_alive(),
+            "updates": self.updates,
+        }
+
+
+def start_schedule(path, proxy_config, config_lock):
+    """
+    Load a profile and start applying it, replacing any running schedule.
+
+    Returns:
+        ScheduleRunner: The running schedule.
+
+    Raises:
+        ValueError, OSError: If the profile cannot be read or is invalid.
+    """
+    global active_runner
+    schedule = ImpairmentSchedule.load(path)
+    stop_schedule()
+    active_runner = ScheduleRunner(schedule, proxy_config, config_lock, name=path)
+    active_runner.start()
+    return active_runner
+
+
+def stop_schedule():
+    """Stop the running schedule. Returns True if one was running."""
+    global active_runner
+    runner, active_runner = active_runner, None
+    if runner is None:
+        return False
+    runner.stop()
+    return True
+
+
+def schedule_status():
+    """Status of the running schedule as a dictionary."""
+    runner = active_runner
+    return runner.status() if runner is not None else {"running": False}
@@ -0,0 +1,91 @@
+"""
+Socket buffer sizes and kernel drop accounting.
+
+When a UDP socket's receive buffer is full, the kernel drops the datagrams that arrive next before
+recvfrom() could see them. Unlike the proxy's simulated drops, those losses are real, so the client,
+server and proxy report them next to their own counters. Linux counts them per socket in the
+"drops" column of /proc/net/udp, where the socket is found by its inode. Reading that file only
+when asked keeps the receive path unchanged, whereas SO_RXQ_OVFL would need a recvmsg() with
+ancillary data for every datagram. Elsewhere the drops cannot be counted and are reported as None.
+
+Linux doubles a requested buffer size for its own bookkeeping and caps it at net.core.rmem_max
+(receive) or net.core.wmem_max (send), so the sizes granted are read back, and a request the
+kernel cut short is reported.
+"""
+import os
+import socket
+
+PROC_NET_UDP = ("/proc/net/udp", "/proc/net/udp6")
+INODE_COLUMN, DROPS_COLUMN = 9, 12
+BUFFER_OPTIONS = {"receive": (socket.SO_RCVBUF, "net.core.rmem_max"), "send": (socket.SO_SNDBUF, "net.core.wmem_max")}
+
+
+def buffer_sizes(sock):
+    """The socket's receive and send buffer sizes in bytes, as the kernel reports them."""
+    return {name: sock.getsockopt(socket.SOL_SOCKET, option) for name, (option, _) in BUFFER_OPTIONS.items()}
+
+
+def set_buffer_sizes(sock, receive_bytes=None, send_bytes=None):
+    """
+    Request socket buffer sizes, printing the sizes granted.
+
+    Args:
+        sock (socket.socket): The socket to configure.
+        receive_bytes (int, optional): SO_RCVBUF to request; None keeps the system default.
+        send_bytes (int, optional): SO_SNDBUF to request; None keeps the system default.
+
+    Returns:
+        dict: The receive and send buffer sizes granted, in bytes.
+    """
+    requested = {"receive": receive_bytes, "send": send_bytes}
+    for name, size in requested.items():
+        if size is not None:
+            sock.setsockopt(socket.SOL_SOCKET, BUFFER_OPTIONS[name][0], size)
+    sizes = buffer_sizes(sock)
+    if receive_bytes is not None or send_bytes is not None:
+        print(f"📦 Socket buffers: receive {sizes['receive']} bytes, send {sizes['send']} bytes")
+    for name, size in requested.items():
+        if size is not None and sizes[name] < size:
+            print(f"⚠️ The kernel granted a {name} buffer of {sizes[name]} bytes for the {size} requested "
+                  f"(raise {BUFFER_OPTIONS[name][1]})")
+    return sizes
+
+
+def kernel_drops(sock):
+    """
+    Datagrams the kernel dropped for the socket since it was created, mostly because its receive
+    buffer was full.
+
+    Returns:
+        int or None: The count, or None where the kernel does not expose it (not Linux, or the
+        socket is closed).
+    """
+    try:
+        inode = str(os.fstat(sock.fileno()).st_ino)
+    except (OSError, ValueError):
+        return None
+    for path in PROC_NET_UDP:
+        try:
+            with open(path) as table:
+                next(table)  # Header
+                for line in table:
+                    fields = line.split()
+                    if len(fields) > DROPS_COLUMN and fields[INODE_COLUMN] == inode:
+                        return int(fields[DROPS_COLUMN])
+        except (OSError, StopIteration):
+            continue
+    return None
+
+
+def socket_statistics(sock):
+    """The socket's buffer sizes and kernel drops, as a dictionary."""
+    sizes = buffer_sizes(sock)
+    return {"receive_buffer": sizes["receive"], "send_buffer": sizes["send"], "kernel_drops": kernel_drops(sock)}
+
+
+def describe_kernel_drops(sock):
+    """The kernel drops as a printable line."""
+    stats = socket_statistics(sock)
+    drops = stats["kernel_drops"]
+    counted = f"{drops} datagram(s)" if drops is not None else "unknown (not counted on this system)"
+    return f"🕳️ Kernel receive drops: {counted} (receive buffer {stats['receive_buffer']} bytes)"
@@ -0,0 +1,102 @@
+import heapq
+import math
+
+DEFAULT_TICK = 0.005  # Seconds per slot
+DEFAULT_SLOTS = 1024  # One revolution covers DEFAULT_TICK * DEFAULT_SLOTS seconds
+
+
+class TimerWheel:
+    """
+    Hashed timing wheel for retransmission timers.
+
+    Time is divided into ticks, and a timer due at tick t lives in slot t % slots. Cancelling a
+    timer touches a single slot, and expiring walks only the slots whose ticks have passed since
+    the previous call. Timers never fire early; they may fire up to one tick late.
+
+    The earliest deadline comes from a min-heap of (due tick, key) that is cleaned lazily: arming
+    pushes onto it (O(log n)), cancelling leaves the entry behind, and next_deadline() pops the
+    stale entries it finds on top. The client cancels its earliest timer on every in-order ACK,
+    so this keeps the wait for the next deadline cheap however far expire() has fallen behind.
+
+    Timers are identified by a hashable key (the client uses datagram indexes); the keys of a
+    wheel must be comparable with each other, as they break ties in the heap. Arming a key that
+    is already armed moves its timer.
+    """
+
+    def __init__(self, tick=DEFAULT_TICK, slots=DEFAULT_SLOTS, now=0.0):
+        self.tick = tick
+        self.slots = [{} for _ in range(slots)]  # Each slot maps keys to their absolute due tick
+        self.timers = {}  # Maps keys to the slot holding their timer
+        self.current = int(now / tick)  # Last tick that has been expired
+        self.heap = []  # (due tick, key) per arming, including timers since cancelled, expired or moved
+
+    def __len__(self):
+        return len(self.timers)
+
+    def __contains__(self, key):
+        return key in self.timers
+
+    def schedule(self, key, deadline):
+        """Arm (or re-arm) the timer for `key` to expire at `deadline` seconds."""
+        self.cancel(key)
+        due = max(math.ceil(deadline / self.tick), self.current + 1)
+        slot = due % len(self.slots)
+        self.slots[slot][key] = due
+        self.timers[key] = slot
+        if len(self.heap) > 2 * len(self.timers) + 64:
+            # Mostly stale entries: rebuild from the armed timers, so the heap stays proportional to them
+            self.heap = [(self.slots[slot][key], key) for key, slot in self.timers.items()]
+            heapq.heapify(self.heap)
+        else:
+            heapq.heappush(self.heap, (due, key))
+
+    def cancel(self, key):
+        """Disarm the timer for `key`. Returns True if it was armed."""
+        slot = self.timers.pop(key, None)
+        if slot is None:
+            return False
+        del self.slots[slot][key]
+        return True
+
+    def expire(self, now):
+        """
+        Remove and return the keys of all timers due by `now`.
+
+        Returns:
+            list: Expired keys, earliest deadline first.
+        """
+        target = int(now / self.tick)
+        expired = []
+        if target <= self.current:
+            return expired
+        if self.timers:
+            # After a full revolution every slot has been passed, so visit each one once
+            ticks = range(self.current + 1, min(target, self.current + len(self.slots)) + 1)
+            for tick in ticks:
+                slot = self.slots[tick % len(self.slots)]
+                if not slot:
+                    continue
+                due_keys = [(due, key) for key, due in slot.items() if due <= target]
+                for due, key in due_keys:
+                    del slot[key]
+                    del self.timers[key]
+                expired.extend(due_keys)
+            expired.sort(key=lambda item: item[0])
+        self.current = target
+        return [key for _, key in expired]
+
+    def next_deadline(self):
+        """
+        Time of the earliest armed timer, or None if none is armed.
+
+        Pops the heap entries of timers that are no longer armed at that tick; each is popped once,
+        so a call costs O(log n) amortized.
+        """
+        heap = self.heap
+        while heap:
+            due, key = heap[0]
+            slot = self.timers.get(key)
+            if slot is not None and self.slots[slot][key] == due:
+                return due * self.tick
+            heapq.heappop(heap)
+        return None
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from utils.pcap import read_capture
+
+LOG_TIME_FORMAT = "%Y-%m-%d %H:%M:%S,%f"
+REPLAYED_LOG_EVENTS = ("Received", "Received (Buffered)", "Terminate")
+
+
+def read_server_log(path):
+    """
+    Rebuild the datagrams a server received from its structured log (packet_logs_server.log).
+
+    Yields:
+        tuple[int, bytes]: Timestamp in nanoseconds and the datagram, in log order.
+    """
+    with open(path, encoding="utf-8", errors="replace") as log_file:
+        for line in log_file:
+            # time, level, event, seq, ack, src ip, src port, dest ip, dest port, "message, latency"
+            fields = line.rstrip("\n").split(", ", 9)
+            if len(fields) < 10 or fields[2] not in REPLAYED_LOG_EVENTS:
+                continue
+            logged = datetime.strptime(fields[0], LOG_TIME_FORMAT)
+            timestamp_ns = int(logged.replace(microsecond=0).timestamp()) * 1_000_000_000 + logged.microsecond * 1000
+            if fields[2] == "Terminate":
+                datagram = b"TERMINATE"
+            else:
+                message = fields[9].rsplit(", ", 1)[0]  # The message itself may contain ", "
+                datagram = f"{fields[3]}:{message}".encode()
+            yield timestamp_ns, datagram
+
+
+def load_trace(path, direction="client-to-server", port=None):
+    """
+    Load the datagrams to replay from a capture or a server log.
+
+    Args:
+        path (str): A pcap/pcapng capture (for example from proxy.py --pcap) or a server log.
+        direction (str): For proxy captures, the direction to replay; packets whose comment
+            names another direction are skipped. Captures without comments are not filtered.
+        port (int, optional): Only replay captured packets sent to this UDP port.
+
+    Returns:
+        list[tuple[int, bytes]]: (timestamp in nanoseconds, datagram) pairs in recorded order.
+    """
+    try:
+        packets = read_capture(path)
+    except ValueError:
+        return list(read_server_log(path))
+    return [(timestamp, payload) for timestamp, _, destination, payload, verdict in packets
+            if (not verdict or direction in verdict) and (port is None or destination[1] == port)]
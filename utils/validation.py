@@ -1,5 +1,7 @@
 import re
 
+from utils.pacing import parse_rate
+
 
 def validate_ip(ip):
     """Validate IPv4 address format with graceful error handling."""
@@ -65,3 +67,43 @@ def validate_delay_time(delay_time):
     except ValueError:
         print(f"❌ Invalid delay time: {delay_time}. Must be a non-negative integer or range (e.g., '100-500').")
         exit(1)
+
+
+def validate_count(count, minimum=0):
+    """Validate an integer count (messages, window sizes) that must be at least `minimum`."""
+    try:
+        count = int(count)
+        if count < minimum:
+            raise ValueError(f"Value must be an integer of at least {minimum}. Got: {count}")
+    except ValueError as e:
+        print(f"❌ Invalid count: {e}")
+        exit(1)
+    return count
+
+
+def validate_positive(value):
+    """Validate a strictly positive number (rates, speed factors)."""
+    try:
+        value = float(value)
+        if not value > 0:
+            raise ValueError(f"Value must be a positive number. Got: {value}")
+    except ValueError as e:
+        print(f"❌ Invalid value: {e}")
+        exit(1)
+    return value
+
+
+def validate_fec(value):
+    """Validate an FEC block size: a positive integer, or 'auto' to adapt it to the observed losses."""
+    if value == "auto":
+        return value
+    return validate_count(value, minimum=1)
+
+
+def validate_rate(value):
+    """Validate a send rate in packets per second ('200', '200pps') or bytes per second ('64KB/s')."""
+    try:
+        return parse_rate(value)
+    except ValueError as e:
+        print(f"❌ Invalid rate: {e}")
+        exit(1)